@@ -1,89 +1,115 @@
-import ctypes
-import os
-import sys
+import contextlib
+import functools
+import threading
+import time
 
-def find_dll():
+from accesio import command_compiler
+# find_dll and load_library are re-exported here for existing callers
+from accesio.dio_backend import AIOUSBBackend, DEVICE_NOT_FOUND, find_dll, load_library
+from accesio.dio_stats import instrument
+
+
+# Win32 status of calls made through an AccesDIO after close()
+ERROR_INVALID_HANDLE = 6
+
+
+class DIOError(RuntimeError):
+    """AIOUSB.dll call returned a non-zero status. code holds the Win32 error code."""
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+def _synchronized(method):
+    """Runs an AccesDIO method under the object's lock (shadow and DLL calls stay consistent)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Shadow register verify policies (see AccesDIO)
+VERIFY_NEVER = "never"          # Trust the shadow; re-read only after it was invalidated
+VERIFY_EVERY_N = "every_n"      # Read back and compare after every verify_interval writes
+VERIFY_ON_ERROR = "on_error"    # Re-read the board immediately after a failed DLL call
+VERIFY_POLICIES = (VERIFY_NEVER, VERIFY_EVERY_N, VERIFY_ON_ERROR)
+
+
+class AccesDIO:
     """
-    Search for AIOUSB.dll in multiple locations:
-    1. Next to the executable (for PyInstaller bundles)
-    2. drivers/ subdirectory (for portable deployment)
-    3. C:\Windows\System32 (for system-installed DLL)
-    4. Current working directory
+    ACCESIO USB DIO board access through a DIOBackend (AIOUSB.dll by default).
+
+    Keeps a per-device shadow of the last port image written, so preserve-writes
+    are computed locally instead of reading every port back first. The shadow
+    is seeded with one DIO_ReadAll, refreshed by every successful write, and
+    dropped when a DLL call fails or a board ID moves to another device index.
+
+    The shadow assumes this object is the only writer of the board. If another
+    process (e.g. a testhead_control.exe step next to a running GUI) may write
+    the same board, set shadow_max_age: a shadow not synced with the board for
+    that long is read back before the next preserve-write or elision decision,
+    instead of silently undoing the other process's relay changes.
+
+    Args:
+        dio_model (str): Board model, e.g. "ACCESSIO_96".
+        dll_path (str): AIOUSB.dll path override. Searched for if None.
+        verify_policy (str): VERIFY_NEVER, VERIFY_EVERY_N or VERIFY_ON_ERROR.
+        verify_interval (int): Writes between read-back checks for VERIFY_EVERY_N.
+        backend (DIOBackend): Backend to use, e.g. a shared AIOUSBBackend or a
+                              SimulatedBackend. An AIOUSBBackend is created if None.
+        shadow_max_age (float): Seconds a shadow is trusted after the last write
+                                or read-back. None trusts it until invalidated.
+        stats (DIOStats): Collector of the DLL call timings. The process-wide
+                          one (accesio.dio_stats.get_dio_stats) if None.
+
+    Board operations are serialized with a per-object lock, so one AccesDIO can
+    be shared between threads. After close() every board call raises DIOError.
     """
-    # Get the directory where the executable/script is located
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        app_dir = os.path.dirname(sys.executable)
-    else:
-        # Running as script
-        app_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    search_paths = [
-        os.path.join(app_dir, "AIOUSB.dll"),                    # Next to exe
-        os.path.join(app_dir, "drivers", "AIOUSB.dll"),         # drivers/ subfolder
-        os.path.join(os.path.dirname(app_dir), "drivers", "AIOUSB.dll"),  # Parent/drivers/
-        r"C:\Windows\System32\AIOUSB.dll",                      # System directory
-        os.path.join(os.getcwd(), "AIOUSB.dll"),                # Current directory
-    ]
-    
-    for path in search_paths:
-        if os.path.exists(path):
-            return path
-    
-    return None
+    def __init__(self, dio_model="ACCESSIO_96", dll_path=None, verify_policy=VERIFY_NEVER, verify_interval=10, backend=None, stats=None,
+                 shadow_max_age=None):
+        if verify_policy not in VERIFY_POLICIES:
+            raise ValueError(f"verify_policy must be one of {VERIFY_POLICIES}")
+        if verify_interval < 1:
+            raise ValueError("verify_interval must be at least 1")
 
-class AccesDIO:
-    def __init__(self, dio_model="ACCESSIO_96", dll_path=None):
-        # Allow manual DLL path override, otherwise search automatically
-        if dll_path is None:
-            dll_path = find_dll()
-        
-        if dll_path is None:
-            raise FileNotFoundError(
-                "AIOUSB.dll not found. Searched locations:\n"
-                "  - Next to executable\n"
-                "  - drivers/ subdirectory\n"
-                "  - C:\\Windows\\System32\n"
-                "  - Current working directory"
-            )
-        
-        if not os.path.exists(dll_path):
-            raise FileNotFoundError(f"AIOUSB.dll not found at {dll_path}")
-        
-        print(f"Loading AIOUSB.dll from: {dll_path}")
-        self.dll = ctypes.windll.LoadLibrary(dll_path)
-        self._bind_functions()
+        # Reuse a shared backend (see accesio.dio_registry), otherwise load AIOUSB.dll.
+        # Every DLL call is timed into the DIOStats while collection is enabled.
+        self.backend = instrument(backend if backend is not None else AIOUSBBackend(dll_path), stats)
 
         self.dio_model = dio_model.upper()
-        self.model_line_map = {
-            "ACCESSIO_16": 16,
-            "ACCESSIO_48": 48,
-            "ACCESSIO_96": 96
-        }
-        self.max_lines = self.model_line_map.get(self.dio_model, 96)
+        self.model_line_map = dict(command_compiler.MODEL_LINE_COUNTS)
+        self.max_lines = command_compiler.model_max_lines(self.dio_model)
         self.port_count = self.max_lines // 8
 
-        self.dll.DIO_Configure.argtypes = [
-            ctypes.c_uint32,    # DeviceIndex
-            ctypes.c_ubyte,     # Tristate (0 = active, 1 = tristate)
-            ctypes.POINTER(ctypes.c_ushort),    # OutMask
-            ctypes.POINTER(ctypes.c_ubyte)      # Data
-        ]
-        self.dll.DIO_Configure.restype = ctypes.c_uint32
-
-    def _bind_functions(self):
-        self.dll.GetDeviceByEEPROMByte.restype = ctypes.c_uint32
-        self.dll.GetDeviceByEEPROMByte.argtypes = [ctypes.c_ubyte]
-
-        self.dll.GetDeviceByEEPROMData.argtypes = [ctypes.c_ubyte, ctypes.c_ubyte]
-        self.dll.GetDeviceByEEPROMData.restype = ctypes.c_uint32
-
-        self.dll.DIO_Write1.argtypes = [ctypes.c_uint32, ctypes.c_uint32, ctypes.c_ubyte]
-        self.dll.DIO_Write1.restype = ctypes.c_uint32
+        self.verify_policy = verify_policy
+        self.verify_interval = verify_interval
+        self.shadow_max_age = shadow_max_age
+        self._shadow = {}               # device_index -> list of port bytes last written
+        self._shadow_synced = {}        # device_index -> time.monotonic() of the last write or read-back
+        self._configured = set()        # device indexes whose ports this object set up as outputs
+        self._writes_since_verify = {}  # device_index -> writes since last read-back
+        self._board_devices = {}        # board_id -> device_index last returned
+        self._write_stats = {}          # device_index -> {"writes": n, "elided": n}
+        self._lock = threading.RLock()
+        self.closed = False
+
+    @_synchronized
+    def close(self):
+        """
+        Detaches the object from its backend before the backend is closed (see
+        DIORegistry.shutdown). Later board calls raise DIOError with
+        ERROR_INVALID_HANDLE instead of reaching an unloaded AIOUSB.dll.
+        """
+        self.closed = True
+        self.invalidate_shadow()
+        self._board_devices.clear()
 
-        self.dll.DIO_ReadAll.argtypes = [ctypes.c_uint32, ctypes.POINTER(ctypes.c_ubyte)]
-        self.dll.DIO_ReadAll.restype = ctypes.c_uint32
+    def _check_open(self):
+        if self.closed:
+            raise DIOError(f"{self.dio_model} board access was closed (DIO backend shut down)", ERROR_INVALID_HANDLE)
 
+    @_synchronized
     def get_device_by_eeprom_byte(self, board_id):
         """
         Retrieves the device index of the device with the specified EEPROM byte at address 0x00.
@@ -100,11 +126,157 @@ class AccesDIO:
         """
         if not (0 <= board_id <= 255):
             raise ValueError("board_id must be an integer between 0 and 255.")
-        device_index = self.dll.GetDeviceByEEPROMByte(ctypes.c_ubyte(board_id))
-        if device_index in (0xFFFFFFFF, -1):
+        self._check_open()
+        device_index = self.backend.get_device_by_eeprom_byte(board_id)
+        if device_index in (DEVICE_NOT_FOUND, -1):
             raise RuntimeError(f"No device found with EEPROM byte 0x{board_id:02X} at address 0x00.")
+
+        # A board showing up at a new index (re-plugged, enumeration order changed)
+        # means neither index's shadow can be trusted any more
+        previous_index = self._board_devices.get(board_id)
+        if previous_index is not None and previous_index != device_index:
+            self.invalidate_shadow(previous_index)
+            self.invalidate_shadow(device_index)
+        self._board_devices[board_id] = device_index
         return device_index
 
+    # ***********************************
+    # Shadow output register
+    # ***********************************
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Holds the board lock across several calls, so a multi-write sequence
+        (read image, write, wait, write) is not interleaved with other threads
+        using this object. The methods take the same (re-entrant) lock.
+        """
+        with self._lock:
+            yield self
+
+    @_synchronized
+    def get_shadow(self, device_index):
+        """Returns a copy of the shadow port image for a device, or None if unknown or expired."""
+        image = self._trusted_shadow(device_index)
+        return list(image) if image is not None else None
+
+    def _trusted_shadow(self, device_index):
+        """The shadow, or None if unknown or older than shadow_max_age (it is dropped then)."""
+        image = self._shadow.get(device_index)
+        if image is not None and self.shadow_max_age is not None:
+            if time.monotonic() - self._shadow_synced.get(device_index, 0.0) > self.shadow_max_age:
+                self.invalidate_shadow(device_index)
+                return None
+        return image
+
+    def _set_shadow(self, device_index, image):
+        self._shadow[device_index] = list(image)
+        self._shadow_synced[device_index] = time.monotonic()
+
+    @_synchronized
+    def invalidate_shadow(self, device_index=None):
+        """
+        Forgets the shadow port image so the next preserve-write reads the board.
+
+        Args:
+            device_index (int): Device to invalidate. None invalidates all devices.
+        """
+        if device_index is None:
+            self._shadow.clear()
+            self._shadow_synced.clear()
+            self._writes_since_verify.clear()
+            self._configured.clear()
+        else:
+            self._shadow.pop(device_index, None)
+            self._shadow_synced.pop(device_index, None)
+            self._writes_since_verify.pop(device_index, None)
+            self._configured.discard(device_index)
+
+    @_synchronized
+    def current_image(self, device_index):
+        """
+        Port image to build a preserve-write on: the shadow, or one read-back
+        if it is unknown or expired.
+
+        Returns:
+            list: A copy, one byte per port.
+        """
+        image = self._trusted_shadow(device_index)
+        if image is None:
+            image = self.read_all_lines(device_index)
+        return list(image)
+
+    def _handle_dll_error(self, device_index):
+        """Drops the shadow after a failed call; re-reads it right away for VERIFY_ON_ERROR."""
+        self.invalidate_shadow(device_index)
+        if self.verify_policy == VERIFY_ON_ERROR:
+            try:
+                self.read_all_lines(device_index)
+            except RuntimeError:
+                pass  # Still unknown, next preserve-write will read again
+
+    def get_write_stats(self, device_index):
+        """
+        Returns port-image write counters for a device.
+
+        Returns:
+            dict: {"writes": DIO_Configure calls made, "elided": writes skipped
+                   because the image already matched the shadow}
+        """
+        return dict(self._write_stats.get(device_index, {"writes": 0, "elided": 0}))
+
+    def _write_all_ports(self, device_index, image, error_message="DIO_Configure failed with code", force=False):
+        """
+        Writes a full port image with every port enabled as output and records it in the shadow.
+
+        The write is skipped when the shadow shows the board already holds the image,
+        unless force is set. A shadow that only comes from a read-back does not
+        count: the ports may still be inputs (e.g. a board just powered up), and
+        the first write is what configures them as outputs.
+
+        Returns:
+            list: Indexes of the ports whose value changed (all ports if the
+                  shadow was unknown or the ports not configured yet, empty if
+                  the write was elided).
+        """
+        stats = self._write_stats.setdefault(device_index, {"writes": 0, "elided": 0})
+        shadow = self._trusted_shadow(device_index)
+        if shadow is None or device_index not in self._configured:
+            changed_ports = list(range(self.port_count))
+        else:
+            changed_ports = [port for port in range(self.port_count) if shadow[port] != image[port]]
+            if not changed_ports and not force:
+                stats["elided"] += 1
+                return changed_ports
+
+        self._check_open()
+        out_mask = (1 << self.port_count) - 1
+        result = self.backend.dio_configure(device_index, 0, out_mask, list(image))
+        if result != 0:
+            self._handle_dll_error(device_index)
+            raise DIOError(f"{error_message} {result}", result)
+        stats["writes"] += 1
+        self._set_shadow(device_index, image)
+        self._configured.add(device_index)
+        self._verify_after_write(device_index)
+        return changed_ports
+
+    def _verify_after_write(self, device_index):
+        """Reads the board back every verify_interval writes when VERIFY_EVERY_N is set."""
+        if self.verify_policy != VERIFY_EVERY_N:
+            return
+        count = self._writes_since_verify.get(device_index, 0) + 1
+        if count < self.verify_interval:
+            self._writes_since_verify[device_index] = count
+            return
+        expected = self._shadow[device_index]
+        actual = self.read_all_lines(device_index)
+        if actual != expected:
+            raise RuntimeError(
+                f"Shadow verify failed on device {device_index}: "
+                f"wrote {[f'0x{b:02X}' for b in expected]}, read {[f'0x{b:02X}' for b in actual]}"
+            )
+
+    @_synchronized
     def configure_output(self, device_index, pin_values, default_low=True):
         """
         Configure specified pins as outputs and set their values.
@@ -114,8 +286,8 @@ class AccesDIO:
             pin_values (dict): Dictionary where keys are line numbers (0 to max lines) and values are 0 or 1.
             default_low (bool): If True, sets unspecified pins to low (0); otherwise, high (1).
         """
-        out_mask = ctypes.c_ushort(0x0000)
-        data = (ctypes.c_ubyte * self.port_count)(*([0x00 if default_low else 0xFF] * self.port_count))
+        out_mask = 0x0000
+        data = [0x00 if default_low else 0xFF] * self.port_count
 
         for line, value in pin_values.items():
             if not (0 <= line < self.max_lines):
@@ -125,22 +297,44 @@ class AccesDIO:
             if value:
                 data[port] |= (1 << bit)
             else:
-                data[port] &= ~(1 << bit)
-            out_mask.value |= (1 << port)
+                data[port] &= ~(1 << bit) & 0xFF
+            out_mask |= (1 << port)
 
-        result = self.dll.DIO_Configure(device_index, 0, ctypes.byref(out_mask), data)
+        self._check_open()
+        result = self.backend.dio_configure(device_index, 0, out_mask, data)
         if result != 0:
-            raise RuntimeError(f"DIO_Configure failed with code {result}")
+            self._handle_dll_error(device_index)
+            raise DIOError(f"DIO_Configure failed with code {result}", result)
+
+        # Ports left out of the mask become inputs, so only a full mask gives a known image
+        if out_mask == (1 << self.port_count) - 1:
+            self._set_shadow(device_index, data)
+            self._verify_after_write(device_index)
+        else:
+            self.invalidate_shadow(device_index)
 
     # line_number is 1-based and starts at 1. The code adjust for 0-based indexing.
+    @_synchronized
     def write_line(self, device_index, line_number, value):
         line_number -= 1
         if not (0 <= line_number < self.max_lines):
             raise ValueError("line_number out of range")
-        result = self.dll.DIO_Write1(device_index, line_number, value)
+        self._check_open()
+        result = self.backend.dio_write1(device_index, line_number, value)
         if result != 0:
-            raise RuntimeError(f"DIO_Write1 failed for line {line_number}, value {value}, code={result}")
+            self._handle_dll_error(device_index)
+            raise DIOError(f"DIO_Write1 failed for line {line_number}, value {value}, code={result}", result)
+
+        image = self._trusted_shadow(device_index)
+        if image is not None:
+            self._shadow_synced[device_index] = time.monotonic()
+            port = line_number // 8
+            if value:
+                image[port] |= (1 << (line_number % 8))
+            else:
+                image[port] &= ~(1 << (line_number % 8)) & 0xFF
 
+    @_synchronized
     def read_all_lines(self, device_index):
         """
         Reads the current state of all digital lines (inputs and outputs).
@@ -151,12 +345,14 @@ class AccesDIO:
         Returns:
             list: A list of integers representing the state of each line (0 or 1).
         """        
-        buffer = (ctypes.c_ubyte * self.port_count)()
-        #result = self.dll.DIO_ReadAll(ctypes.c_uint32(device_index), ctypes.byref(buffer))
-        result = self.dll.DIO_ReadAll(ctypes.c_uint32(device_index), buffer)
+        self._check_open()
+        result, ports = self.backend.dio_read_all(device_index, self.port_count)
         if result != 0:
-            raise RuntimeError(f"DIO_ReadAll failed with code {result}")
-        return list(buffer)
+            self.invalidate_shadow(device_index)
+            raise DIOError(f"DIO_ReadAll failed with code {result}", result)
+        self._set_shadow(device_index, ports)
+        self._writes_since_verify[device_index] = 0
+        return list(ports)
 
     # Convert GroupPortBit to line number (1-based)
     # There are 4 Groups: 0-3, one for each connector
@@ -176,15 +372,8 @@ class AccesDIO:
         Raises:
             ValueError: If the input format is invalid. Exceeds max line count for the model.
         """
-        if len(groupportbit) != 3 or groupportbit[0] not in '0123' or groupportbit[1] not in 'ABC' or not groupportbit[2].isdigit():
-            raise ValueError("Invalid GroupPortBit format. Expected format like '0A0', '1B5', etc.")
-        group = int(groupportbit[0])
-        port = ord(groupportbit[1]) - ord('A')
-        bit = int(groupportbit[2])
-        line_number = (group * 24) + (port * 8) + (bit + 1)
-        if line_number > self.max_lines:
-            raise ValueError(f"GroupPortBit {groupportbit} exceeds max line count for {self.dio_model}")
-        return line_number
+        # Valid tokens come from the precomputed per-model table
+        return command_compiler.groupportbit_to_line_number(groupportbit, self.max_lines, self.dio_model)
 
     def write_groupportbit_preserve(self, device_index, groupportbit, value):
         """
@@ -208,6 +397,7 @@ class AccesDIO:
         self.write_line_preserve(device_index, line_number, value)
 
     # line_number is 1-based and starts at 1. The code adjust for 0-based indexing.
+    @_synchronized
     def write_line_preserve(self, device_index, line_number, value):
         line_number -= 1
         if not (0 <= line_number < self.max_lines):
@@ -215,39 +405,92 @@ class AccesDIO:
         if value not in (0, 1):
             raise ValueError("value must be 0 or 1")
 
-        # Read current state of all ports
-        buffer = (ctypes.c_ubyte * self.port_count)()
-        #result = self.dll.DIO_ReadAll(ctypes.c_uint32(device_index), ctypes.byref(buffer))  # byref doesn't work with model-specific ctypes array
-        result = self.dll.DIO_ReadAll(ctypes.c_uint32(device_index), buffer)
-        if result != 0:
-            raise RuntimeError(f"DIO_ReadAll failed with code {result}")
+        # Start from the shadow of the last written image (read back only if unknown)
+        image = self.current_image(device_index)
 
         # Identify port and bit
         port = line_number // 8
         bit = line_number % 8
 
-        # Modify only the target bit in the buffer
+        # Modify only the target bit in the image
         if value:
-            buffer[port] |= (1 << bit)
+            image[port] |= (1 << bit)
         else:
-            buffer[port] &= ~(1 << bit)
+            image[port] &= ~(1 << bit) & 0xFF
 
-        # Set out_mask to enable output on all ports
-        out_mask = ctypes.c_ushort((1 << self.port_count) - 1)
-        # Write back the full buffer to preserve all states
-        result = self.dll.DIO_Configure(device_index, 0, ctypes.byref(out_mask), buffer)
-        if result != 0:
-            raise RuntimeError(f"DIO_Configure failed with code {result}")
+        # Write back the full image with all ports enabled as output to preserve all states
+        self._write_all_ports(device_index, image)
 
+    @_synchronized
     def reset_all_lines_low(self, device_index):
         """
         Resets all (max) digital lines (ports) to low (0) in a single operation.
+        Always written to the board, even if the shadow is already all low.
 
         Args:
             device_index (int): Index of the device.
         """
-        data = (ctypes.c_ubyte * self.port_count)(*([0x00] * self.port_count))
-        out_mask = ctypes.c_ushort((1 << self.port_count) - 1)
-        result = self.dll.DIO_Configure(device_index, 0, ctypes.byref(out_mask), data)
-        if result != 0:
-            raise RuntimeError(f"DIO_Configure failed while resetting all lines: code {result}")
+        self._write_all_ports(device_index, [0x00] * self.port_count,
+                              "DIO_Configure failed while resetting all lines: code", force=True)
+
+    @_synchronized
+    def write_compiled_command(self, device_index, compiled):
+        """
+        Applies a compiled SwitchDriverCommand with a single DIO_Configure.
+
+        Tokens are folded into the shadow image (the board is read only if the
+        shadow is unknown and the command does not start from a reset), and the
+        final image is written back with all ports enabled as outputs. If the
+        final image equals the shadow, no DLL call is made at all, unless the
+        command contains the "0" reset token: a Reset is always written.
+
+        Args:
+            device_index (int): Index of the device.
+            compiled (CompiledCommand): Output of compile_switch_command for this model.
+
+        Returns:
+            list: Indexes of the ports whose value changed. Empty if the command
+                  was a no-op or the board already held the resulting image.
+
+        Raises:
+            ValueError: If the command was compiled for a different port count.
+            RuntimeError: If DIO_ReadAll or DIO_Configure fails.
+        """
+        if compiled.port_count != self.port_count:
+            raise ValueError(f"Command compiled for {compiled.port_count} ports, {self.dio_model} has {self.port_count}")
+        if compiled.is_noop:
+            return []
+
+        if compiled.reset:
+            current = [0x00] * self.port_count
+        else:
+            current = self.current_image(device_index)
+
+        image = compiled.apply(current)
+        # A command with the "0" reset token always reaches the board, like reset_all_lines_low
+        return self._write_all_ports(device_index, image, force=compiled.reset)
+
+    @_synchronized
+    def write_port_image(self, device_index, image, force=False):
+        """
+        Writes a complete port image (one byte per port) with a single DIO_Configure.
+
+        Used by callers that sequence their own intermediate images, e.g. the
+        break-before-make step of the switching scheduler. Skipped if the
+        shadow shows the board already holds the image, unless force is set.
+
+        Args:
+            device_index (int): Index of the device.
+            image (list): Per-port byte values, port_count entries.
+            force (bool): Write even if the shadow matches (e.g. a reset).
+
+        Returns:
+            list: Indexes of the ports whose value changed.
+
+        Raises:
+            ValueError: If the image does not have one byte per port.
+            RuntimeError: If DIO_Configure fails.
+        """
+        if len(image) != self.port_count:
+            raise ValueError(f"Port image has {len(image)} ports, {self.dio_model} has {self.port_count}")
+        return self._write_all_ports(device_index, [value & 0xFF for value in image], force=force)
@@ -0,0 +1,135 @@
+"""
+Board Discovery Cache
+Maps EEPROM board IDs to AIOUSB device indexes once per process instead of
+scanning the USB bus with GetDeviceByEEPROMByte on every command
+"""
+import threading
+
+# Win32 error codes returned by AIOUSB.dll when a board went away or was
+# re-plugged. Any of these means the cached device indexes may be wrong.
+ERROR_GEN_FAILURE = 31
+ERROR_DEV_NOT_EXIST = 55
+ERROR_DEVICE_NOT_CONNECTED = 1167
+HOTPLUG_ERROR_CODES = (ERROR_GEN_FAILURE, ERROR_DEV_NOT_EXIST, ERROR_DEVICE_NOT_CONNECTED)
+
+
+class BoardDiscovery:
+    """
+    Board ID -> device index cache.
+
+    The first lookup enumerates every board ID known from the DIO_List entries
+    seen so far. Later lookups are dictionary hits; the bus is scanned again
+    only on a miss or after invalidate() (e.g. a DLL error that looks like a
+    hot-plug, see report_dll_error).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._board_ids = set()     # Every board ID registered from a DIO_List
+        self._devices = {}          # board_id -> device_index
+        self._stale = True
+        self._listeners = []
+        self.enumeration_count = 0
+
+    def add_index_listener(self, callback):
+        """
+        Registers callback(board_id, old_index, new_index), called when an
+        enumeration finds a known board at a different device index.
+        """
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def remove_index_listener(self, callback):
+        """Unregisters a callback added with add_index_listener."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def register_boards(self, board_ids):
+        """
+        Adds board IDs to enumerate. New IDs are picked up on the next enumeration.
+
+        Args:
+            board_ids (iterable): EEPROM board ID bytes, e.g. all HEXADDRESS values of a DIO_List.
+        """
+        with self._lock:
+            self._board_ids.update(board_ids)
+
+    def enumerate(self, dio):
+        """
+        Scans the bus for every registered board ID and rebuilds the map.
+
+        Args:
+            dio (AccesDIO): Loaded DIO object used for GetDeviceByEEPROMByte.
+
+        Returns:
+            dict: board_id -> device_index for every board found.
+        """
+        with self._lock:
+            return dict(self._enumerate_locked(dio))
+
+    def _enumerate_locked(self, dio):
+        devices = {}
+        for board_id in sorted(self._board_ids):
+            try:
+                devices[board_id] = dio.get_device_by_eeprom_byte(board_id)
+            except RuntimeError:
+                pass  # Board listed in the config but not attached
+        for board_id, old_index in self._devices.items():
+            new_index = devices.get(board_id)
+            if new_index is not None and new_index != old_index:
+                for callback in self._listeners:
+                    callback(board_id, old_index, new_index)
+        self._devices = devices
+        self._stale = False
+        self.enumeration_count += 1
+        return devices
+
+    def get_device_index(self, dio, board_id):
+        """
+        Returns the device index for a board ID, enumerating only if needed.
+
+        Args:
+            dio (AccesDIO): Loaded DIO object used if the bus has to be scanned.
+            board_id (int): EEPROM board ID byte (0-255).
+
+        Returns:
+            int: Device index.
+
+        Raises:
+            RuntimeError: If no attached board has this ID, even after re-enumerating.
+        """
+        with self._lock:
+            self._board_ids.add(board_id)
+            if not self._stale and board_id in self._devices:
+                return self._devices[board_id]
+            # Cache miss or invalidated: scan once more before giving up
+            devices = self._enumerate_locked(dio)
+            if board_id not in devices:
+                raise RuntimeError(f"No device found with EEPROM byte 0x{board_id:02X} at address 0x00.")
+            return devices[board_id]
+
+    def invalidate(self):
+        """Forces the next lookup to re-enumerate the bus."""
+        with self._lock:
+            self._stale = True
+
+    def report_dll_error(self, code):
+        """
+        Invalidates the map if a DLL error code suggests a board was unplugged or re-plugged.
+
+        Args:
+            code (int): Win32 error code from the failed AIOUSB call.
+
+        Returns:
+            bool: True if the map was invalidated.
+        """
+        if code in HOTPLUG_ERROR_CODES:
+            self.invalidate()
+            return True
+        return False
+
+
+# Process-wide cache used by Testhead_Control
+default_discovery = BoardDiscovery()
@@ -0,0 +1,298 @@
+"""
+SwitchDriverCommand Compiler
+Folds a whole SwitchDriverCommand string into per-port set/clear masks so it
+can be applied to a board with a single DIO_Configure
+"""
+import functools
+
+# Compiled commands are memoized per (command, max_lines, dio_model). A test
+# sequence replays a few hundred paths, so this keeps every one of them parsed.
+COMPILE_CACHE_SIZE = 1024
+
+GROUPS = '0123'
+PORTS = 'ABC'
+
+# Line count per board model. Other model names are driven as 96-line boards.
+MODEL_LINE_COUNTS = {
+    "ACCESSIO_16": 16,
+    "ACCESSIO_48": 48,
+    "ACCESSIO_96": 96
+}
+DEFAULT_MAX_LINES = 96
+
+
+def model_max_lines(dio_model):
+    """Line count AccesDIO uses for a model name (case-insensitive)."""
+    return MODEL_LINE_COUNTS.get(str(dio_model).upper(), DEFAULT_MAX_LINES)
+
+
+class CommandError:
+    """
+    A token of a SwitchDriverCommand that was rejected and skipped.
+
+    Attributes:
+        position (int): 0-based character offset of the token in the command string.
+        token (str): The token as written, e.g. "0D4,1".
+        message (str): Same message the token-by-token path printed.
+    """
+
+    def __init__(self, position, token, message):
+        self.position = position
+        self.token = token
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"CommandError(position={self.position}, token={self.token!r}, message={self.message!r})"
+
+
+class CompiledCommand:
+    """
+    Net effect of a SwitchDriverCommand on a board's output ports.
+
+    Applying a compiled command gives the same port image as running every
+    token through AccesDIO.write_groupportbit_preserve in order.
+
+    Compiled commands are immutable (every attribute is a tuple and cannot be
+    reassigned), so a memoized instance can be shared between threads and boards.
+
+    Attributes:
+        port_count (int): Number of 8-bit ports on the target model.
+        reset (bool): True if the command contains '0' (all lines low). The
+                      masks then apply to an all-zero image instead of the
+                      current board state.
+        set_masks (tuple): Per-port bits forced high.
+        clear_masks (tuple): Per-port bits forced low.
+        bits (tuple): (groupportbit, value) pairs that were accepted, in order.
+        errors (tuple): CommandError for every token that was rejected and skipped.
+        tokens (tuple): The ';'-separated tokens of the source command.
+    """
+
+    def __init__(self, port_count, reset=False, set_masks=None, clear_masks=None, bits=(), errors=(), tokens=()):
+        object.__setattr__(self, "port_count", port_count)
+        object.__setattr__(self, "reset", reset)
+        object.__setattr__(self, "set_masks", tuple(set_masks or (0x00,) * port_count))
+        object.__setattr__(self, "clear_masks", tuple(clear_masks or (0x00,) * port_count))
+        object.__setattr__(self, "bits", tuple(bits))
+        object.__setattr__(self, "errors", tuple(errors))
+        object.__setattr__(self, "tokens", tuple(tokens))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledCommand is immutable")
+
+    @property
+    def is_noop(self):
+        """True if applying the command would not touch the board"""
+        return not self.reset and not self.bits
+
+    def apply(self, image):
+        """
+        Apply the command to a port image.
+
+        Args:
+            image (list): Current per-port byte values (ignored if reset is set).
+
+        Returns:
+            list: New per-port byte values.
+        """
+        if self.reset:
+            image = [0x00] * self.port_count
+        return [
+            ((image[port] & ~self.clear_masks[port]) | self.set_masks[port]) & 0xFF
+            for port in range(self.port_count)
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def groupportbit_table(max_lines):
+    """
+    Every GroupPortBit token that is valid for a board line count.
+
+    Built once per line count (16, 48 or 96). Tokens follow the same rules as
+    groupportbit_to_line_number, including the legacy bit digits 8 and 9
+    (e.g. "0A8" is line 9), and the table only holds tokens whose line passes
+    the "< max_lines" check of write_groupportbit_preserve.
+
+    Args:
+        max_lines (int): Line count of the board model.
+
+    Returns:
+        dict: token -> (line_number (1-based), port, bitmask). Treat as read-only.
+    """
+    table = {}
+    for group in range(len(GROUPS)):
+        for port in range(len(PORTS)):
+            for bit in range(10):
+                line_number = (group * 24) + (port * 8) + (bit + 1)
+                if line_number >= max_lines:
+                    continue
+                line_index = line_number - 1
+                table[f"{GROUPS[group]}{PORTS[port]}{bit}"] = (line_number, line_index // 8, 1 << (line_index % 8))
+    return table
+
+
+def groupportbit_to_line_number(groupportbit, max_lines, dio_model=""):
+    """
+    Converts a GroupPortBit string to a line number (1-based).
+
+    Same rules as AccesDIO.groupportbit_to_line_number, without needing a
+    loaded DLL. Valid tokens are answered from groupportbit_table.
+
+    Raises:
+        ValueError: If the input format is invalid or exceeds max_lines.
+    """
+    entry = groupportbit_table(max_lines).get(groupportbit)
+    if entry is not None:
+        return entry[0]
+    if len(groupportbit) != 3 or groupportbit[0] not in GROUPS or groupportbit[1] not in PORTS or not groupportbit[2].isdigit():
+        raise ValueError("Invalid GroupPortBit format. Expected format like '0A0', '1B5', etc.")
+    group = int(groupportbit[0])
+    port = ord(groupportbit[1]) - ord('A')
+    bit = int(groupportbit[2])
+    line_number = (group * 24) + (port * 8) + (bit + 1)
+    if line_number > max_lines:
+        raise ValueError(f"GroupPortBit {groupportbit} exceeds max line count for {dio_model}")
+    return line_number
+
+
+# Command format is documented on Testhead_Control.process_switch_driver_command
+# Example command: "0;0B4,1;0B5,1;0B6,1;0B7,1;0B1,1;3A1,1"
+@functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_switch_command(command, max_lines, dio_model=""):
+    """
+    Compile a SwitchDriverCommand string for a board model.
+
+    Invalid tokens are skipped and reported in CompiledCommand.errors with the
+    same messages the token-by-token path printed, plus their position.
+
+    Results are memoized: compiling the same command for the same model again
+    returns the same immutable CompiledCommand without re-parsing. Use
+    compile_switch_command.cache_info() / cache_clear() to inspect or reset.
+
+    Args:
+        command (str): Switch driver command, e.g. "0;0B4,1;0B5,1".
+        max_lines (int): Line count of the target model (16, 48 or 96).
+        dio_model (str): Model name, used in error messages.
+
+    Returns:
+        CompiledCommand: Folded set/clear masks for the whole command.
+    """
+    port_count = max_lines // 8
+    if not command:
+        return CompiledCommand(port_count)
+
+    table = groupportbit_table(max_lines)
+    reset = False
+    set_masks = [0x00] * port_count
+    clear_masks = [0x00] * port_count
+    bits = []
+    errors = []
+    position = 0
+    tokens = command.split(';')
+    for cmd in tokens:
+        token_position = position
+        position += len(cmd) + 1
+        # '0' means set all pins to output and reset all lines to low
+        if cmd == '0':
+            reset = True
+            set_masks = [0x00] * port_count
+            clear_masks = [0x00] * port_count
+            continue
+        if ',' not in cmd:
+            errors.append(CommandError(token_position, cmd,
+                                       f"Invalid command format: {cmd}. Expected format is 'line,value'."))
+            continue
+        line, _, value = cmd.partition(',')
+        groupportbit = line.strip()
+        value = value.strip()
+        entry = table.get(groupportbit)
+        if entry is not None and value in ('0', '1'):
+            # Fast path: a valid token and a plain 0/1 value
+            _, port, mask = entry
+            value = int(value)
+        else:
+            try:
+                port, mask, value = _parse_token(cmd, max_lines, dio_model)
+            except ValueError as e:
+                errors.append(CommandError(token_position, cmd, f"Error processing command '{cmd}': {e}"))
+                continue
+
+        if value:
+            set_masks[port] |= mask
+            clear_masks[port] &= ~mask
+        else:
+            clear_masks[port] |= mask
+            set_masks[port] &= ~mask
+        bits.append((groupportbit, value))
+
+    return CompiledCommand(port_count, reset, set_masks, clear_masks, bits, errors, tokens)
+
+
+def coalesce_commands(commands):
+    """
+    Fold compiled commands applied one after another into one command with
+    the same final port image.
+
+    A later reset ('0') discards everything before it; otherwise a later
+    token overrides an earlier one on the same line. The result is what
+    compile_switch_command returns for the commands joined with ';', so error
+    positions are offsets into that joined string.
+
+    Args:
+        commands (list): CompiledCommand objects for the same line count, in order.
+
+    Returns:
+        CompiledCommand: Net effect, applied with a single write.
+
+    Raises:
+        ValueError: If the commands were compiled for different line counts.
+    """
+    if not commands:
+        raise ValueError("At least one command is required to coalesce.")
+    port_count = commands[0].port_count
+    reset = False
+    set_masks = [0x00] * port_count
+    clear_masks = [0x00] * port_count
+    bits = []
+    errors = []
+    tokens = []
+    offset = 0
+    for compiled in commands:
+        if compiled.port_count != port_count:
+            raise ValueError("Commands compiled for different line counts cannot be coalesced.")
+        if compiled.reset:
+            reset = True
+            set_masks = list(compiled.set_masks)
+            clear_masks = list(compiled.clear_masks)
+        else:
+            for port in range(port_count):
+                set_masks[port] = (set_masks[port] & ~compiled.clear_masks[port]) | compiled.set_masks[port]
+                clear_masks[port] = (clear_masks[port] & ~compiled.set_masks[port]) | compiled.clear_masks[port]
+        bits.extend(compiled.bits)
+        errors.extend(CommandError(error.position + offset, error.token, error.message) for error in compiled.errors)
+        tokens.extend(compiled.tokens)
+        offset += len(';'.join(compiled.tokens)) + 1
+    return CompiledCommand(port_count, reset, set_masks, clear_masks, bits, errors, tokens)
+
+
+def _parse_token(cmd, max_lines, dio_model):
+    """
+    Slow path for tokens not answered by the table: produces the exact error of
+    the token-by-token path, or accepts values like " 01" that int() allows.
+
+    Returns:
+        tuple: (port, bitmask, value)
+    """
+    line, value = cmd.split(',')
+    groupportbit = line.strip()
+    value = int(value.strip())
+    # Same checks, in the same order, as AccesDIO.write_groupportbit_preserve
+    line_number = groupportbit_to_line_number(groupportbit, max_lines, dio_model)
+    if not (0 <= line_number < max_lines):
+        raise ValueError(f"Line number {line_number} exceeds max for model {dio_model}")
+    if value not in (0, 1):
+        raise ValueError("value must be 0 or 1")
+    line_index = line_number - 1
+    return line_index // 8, 1 << (line_index % 8), value
@@ -0,0 +1,194 @@
+"""
+DIO Backends
+Interface for the AIOUSB.dll calls used by AccesDIO, and the ctypes backend
+that talks to the real driver. See dio_simulator.py for the in-process
+simulator used on machines without hardware.
+"""
+import abc
+import ctypes
+import logging
+import os
+import sys
+
+# Child of the "testhead" logger (see testhead_logging)
+logger = logging.getLogger("testhead.dio")
+
+
+def find_dll():
+    """
+    Search for AIOUSB.dll in multiple locations:
+    1. Next to the executable (for PyInstaller bundles)
+    2. drivers/ subdirectory (for portable deployment)
+    3. C:\Windows\System32 (for system-installed DLL)
+    4. Current working directory
+    """
+    # Get the directory where the executable/script is located
+    if getattr(sys, 'frozen', False):
+        # Running as compiled executable
+        app_dir = os.path.dirname(sys.executable)
+    else:
+        # Running as script
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    search_paths = [
+        os.path.join(app_dir, "AIOUSB.dll"),                    # Next to exe
+        os.path.join(app_dir, "drivers", "AIOUSB.dll"),         # drivers/ subfolder
+        os.path.join(os.path.dirname(app_dir), "drivers", "AIOUSB.dll"),  # Parent/drivers/
+        r"C:\Windows\System32\AIOUSB.dll",                      # System directory
+        os.path.join(os.getcwd(), "AIOUSB.dll"),                # Current directory
+    ]
+    
+    for path in search_paths:
+        if os.path.exists(path):
+            return path
+    
+    return None
+
+
+def load_library(dll_path=None):
+    """
+    Load AIOUSB.dll and declare the argument/return types of every function we call.
+
+    Args:
+        dll_path (str): Path override. If None, find_dll() is used.
+
+    Returns:
+        ctypes library handle with bound functions.
+
+    Raises:
+        FileNotFoundError: If the DLL cannot be found.
+    """
+    # Allow manual DLL path override, otherwise search automatically
+    if dll_path is None:
+        dll_path = find_dll()
+    
+    if dll_path is None:
+        raise FileNotFoundError(
+            "AIOUSB.dll not found. Searched locations:\n"
+            "  - Next to executable\n"
+            "  - drivers/ subdirectory\n"
+            "  - C:\\Windows\\System32\n"
+            "  - Current working directory"
+        )
+    
+    if not os.path.exists(dll_path):
+        raise FileNotFoundError(f"AIOUSB.dll not found at {dll_path}")
+    
+    logger.info("Loading AIOUSB.dll from: %s", dll_path)
+    dll = ctypes.windll.LoadLibrary(dll_path)
+    _bind_functions(dll)
+    return dll
+
+
+def _bind_functions(dll):
+    dll.GetDeviceByEEPROMByte.restype = ctypes.c_uint32
+    dll.GetDeviceByEEPROMByte.argtypes = [ctypes.c_ubyte]
+
+    dll.GetDeviceByEEPROMData.argtypes = [ctypes.c_ubyte, ctypes.c_ubyte]
+    dll.GetDeviceByEEPROMData.restype = ctypes.c_uint32
+
+    dll.DIO_Write1.argtypes = [ctypes.c_uint32, ctypes.c_uint32, ctypes.c_ubyte]
+    dll.DIO_Write1.restype = ctypes.c_uint32
+
+    dll.DIO_ReadAll.argtypes = [ctypes.c_uint32, ctypes.POINTER(ctypes.c_ubyte)]
+    dll.DIO_ReadAll.restype = ctypes.c_uint32
+
+    dll.DIO_Configure.argtypes = [
+        ctypes.c_uint32,    # DeviceIndex
+        ctypes.c_ubyte,     # Tristate (0 = active, 1 = tristate)
+        ctypes.POINTER(ctypes.c_ushort),    # OutMask
+        ctypes.POINTER(ctypes.c_ubyte)      # Data
+    ]
+    dll.DIO_Configure.restype = ctypes.c_uint32
+
+
+# Returned by GetDeviceByEEPROMByte when no board matches
+DEVICE_NOT_FOUND = 0xFFFFFFFF
+
+
+class DIOBackend(abc.ABC):
+    """
+    The subset of the AIOUSB API that AccesDIO uses.
+
+    Calls take and return plain Python values (ints and lists of port bytes)
+    and return the AIOUSB status code (0 = success) like the DLL does. A
+    subclass must implement every call except close(), otherwise it cannot
+    be instantiated.
+    """
+    name = "base"
+
+    @abc.abstractmethod
+    def get_device_by_eeprom_byte(self, board_id):
+        """GetDeviceByEEPROMByte: device index of the board with this EEPROM byte, or DEVICE_NOT_FOUND."""
+
+    @abc.abstractmethod
+    def dio_configure(self, device_index, tristate, out_mask, data):
+        """
+        DIO_Configure: set port directions and output data.
+
+        Args:
+            device_index (int): Target device.
+            tristate (int): 0 = outputs active, 1 = tristate.
+            out_mask (int): Bit per port, 1 = output.
+            data (list): Byte per port.
+
+        Returns:
+            int: Status code.
+        """
+
+    @abc.abstractmethod
+    def dio_write1(self, device_index, line, value):
+        """DIO_Write1: write one 0-based line. Returns status code."""
+
+    @abc.abstractmethod
+    def dio_read_all(self, device_index, port_count):
+        """
+        DIO_ReadAll: read every port.
+
+        Returns:
+            tuple: (status code, list of port bytes)
+        """
+
+    def close(self):
+        """Releases backend resources. The backend must not be used afterwards."""
+
+
+class AIOUSBBackend(DIOBackend):
+    """
+    DIOBackend over AIOUSB.dll through ctypes.
+
+    Args:
+        dll_path (str): AIOUSB.dll path override. Searched for if None.
+        dll: Already loaded library from load_library(). Loaded here if None.
+    """
+    name = "aiousb"
+
+    def __init__(self, dll_path=None, dll=None):
+        self.dll = dll if dll is not None else load_library(dll_path)
+
+    def get_device_by_eeprom_byte(self, board_id):
+        return self.dll.GetDeviceByEEPROMByte(ctypes.c_ubyte(board_id))
+
+    def dio_configure(self, device_index, tristate, out_mask, data):
+        mask = ctypes.c_ushort(out_mask)
+        buffer = (ctypes.c_ubyte * len(data))(*data)
+        return self.dll.DIO_Configure(device_index, tristate, ctypes.byref(mask), buffer)
+
+    def dio_write1(self, device_index, line, value):
+        return self.dll.DIO_Write1(device_index, line, value)
+
+    def dio_read_all(self, device_index, port_count):
+        buffer = (ctypes.c_ubyte * port_count)()
+        #result = self.dll.DIO_ReadAll(ctypes.c_uint32(device_index), ctypes.byref(buffer))  # byref doesn't work with model-specific ctypes array
+        result = self.dll.DIO_ReadAll(ctypes.c_uint32(device_index), buffer)
+        return result, list(buffer)
+
+    def close(self):
+        handle = getattr(self.dll, '_handle', None)
+        self.dll = None
+        if handle:
+            try:
+                import _ctypes
+                _ctypes.FreeLibrary(handle)
+            except (ImportError, AttributeError, OSError):
+                pass  # Not Windows, or already unloaded
@@ -0,0 +1,189 @@
+"""
+DIO Registry
+Process-wide DIO backend (AIOUSB.dll handle) and AccesDIO pool, so long-lived
+callers (GUI, test executive) only pay library load and argtypes binding once
+"""
+import os
+import threading
+
+from accesio import accesio_dio
+from accesio.board_discovery import default_discovery
+from accesio.dio_backend import AIOUSBBackend
+
+# Environment variables selecting the backend of the process-wide registry.
+# TESTHEAD_DIO_BACKEND=simulator runs without hardware, e.g. on build agents.
+BACKEND_ENV = "TESTHEAD_DIO_BACKEND"
+SIM_BOARDS_ENV = "TESTHEAD_SIM_BOARDS"          # "board_id:model,...", e.g. "1:ACCESSIO_96,2:16"
+SIM_LATENCY_ENV = "TESTHEAD_SIM_LATENCY_MS"     # Delay added to every simulated call
+DEFAULT_SIM_BOARDS = "0:96,1:96,2:96,3:96"
+
+# Pooled AccesDIO objects live as long as the process (GUI, daemon) while other
+# processes may write the same board in between, so their shadow port image is
+# read back after this many idle seconds. TESTHEAD_SHADOW_MAX_AGE_S overrides it;
+# "none" trusts the shadow until invalidated (only safe with a single writer per board).
+SHADOW_MAX_AGE_ENV = "TESTHEAD_SHADOW_MAX_AGE_S"
+POOLED_SHADOW_MAX_AGE_S = 1.0
+
+
+def pooled_shadow_max_age():
+    """shadow_max_age for pooled AccesDIO objects (see SHADOW_MAX_AGE_ENV)."""
+    configured = os.environ.get(SHADOW_MAX_AGE_ENV)
+    if configured is None or not configured.strip():
+        return POOLED_SHADOW_MAX_AGE_S
+    if configured.strip().lower() in ("none", "off"):
+        return None
+    return float(configured)
+
+
+class DIORegistry:
+    """
+    Creates the DIO backend (loads and binds AIOUSB.dll) once and hands out one
+    AccesDIO per (model, device_index) pair. Pooled objects keep their shadow port image
+    between commands, and read the board back after pooled_shadow_max_age()
+    idle seconds in case another process wrote it meanwhile.
+
+    All methods are thread-safe. shutdown() closes the pooled objects (callers
+    still holding one, e.g. a TestheadSession, get DIOError from then on) and
+    the backend; the next request creates both again.
+
+    Args:
+        dll_path (str): AIOUSB.dll path override. Searched for if None.
+        discovery (BoardDiscovery): Board ID cache used by find_device_index.
+        backend (DIOBackend): Backend to use instead of AIOUSB.dll, e.g. a
+                              SimulatedBackend. Not recreated after shutdown().
+    """
+
+    def __init__(self, dll_path=None, discovery=default_discovery, backend=None):
+        self.dll_path = dll_path
+        self.discovery = discovery
+        self._lock = threading.RLock()
+        self._fixed_backend = backend
+        self._backend = backend
+        self._pool = {}         # (model, device_index) -> AccesDIO
+        self._scanner = None    # AccesDIO used only for GetDeviceByEEPROMByte
+        self._listening = False
+        self._listen()
+
+    def get_backend(self):
+        """Returns the shared backend, loading and binding AIOUSB.dll on first use."""
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._fixed_backend or AIOUSBBackend(self.dll_path)
+            self._listen()
+            return self._backend
+
+    def _listen(self):
+        # Undone by shutdown(), so a discarded registry is not called back by the shared discovery cache
+        with self._lock:
+            if not self._listening:
+                self.discovery.add_index_listener(self._on_index_changed)
+                self._listening = True
+
+    def get_dio(self, dio_model, device_index):
+        """
+        Returns the pooled AccesDIO for a board model and device index.
+
+        Args:
+            dio_model (str): Board model, e.g. "ACCESSIO_96".
+            device_index (int): Device index from find_device_index().
+
+        Returns:
+            AccesDIO: Shared object for this (model, device) pair.
+        """
+        key = (dio_model.upper(), device_index)
+        with self._lock:
+            dio = self._pool.get(key)
+            if dio is None:
+                dio = accesio_dio.AccesDIO(dio_model=key[0], backend=self.get_backend(),
+                                           shadow_max_age=pooled_shadow_max_age())
+                self._pool[key] = dio
+            return dio
+
+    def find_device_index(self, board_id):
+        """
+        Resolves an EEPROM board ID to a device index through the discovery cache.
+
+        If re-enumeration finds a board at a different index than before, the
+        shadow port images of both indexes are dropped.
+
+        Raises:
+            RuntimeError: If no attached board has this ID.
+        """
+        with self._lock:
+            if self._scanner is None:
+                self._scanner = accesio_dio.AccesDIO(backend=self.get_backend())
+            scanner = self._scanner
+        return self.discovery.get_device_index(scanner, board_id)
+
+    def _on_index_changed(self, board_id, old_index, new_index):
+        """Discovery listener: a board moved, so neither index's shadow can be trusted."""
+        self.invalidate_device(old_index)
+        self.invalidate_device(new_index)
+
+    def invalidate_device(self, device_index):
+        """Drops the shadow port image of every pooled AccesDIO on a device index."""
+        with self._lock:
+            dios = [dio for (_, index), dio in self._pool.items() if index == device_index]
+        for dio in dios:
+            dio.invalidate_shadow(device_index)
+
+    def shutdown(self):
+        """
+        Closes all pooled AccesDIO objects, stops listening to the discovery
+        cache and closes the backend (unloads AIOUSB.dll).
+        """
+        with self._lock:
+            backend = self._backend
+            dios = list(self._pool.values())
+            if self._scanner is not None:
+                dios.append(self._scanner)
+            self._pool.clear()
+            self._scanner = None
+            self._backend = None
+            self.discovery.remove_index_listener(self._on_index_changed)
+            self._listening = False
+            self.discovery.invalidate()
+        # Every holder fails with DIOError before the library handle is freed
+        for dio in dios:
+            dio.close()
+        if backend is not None and backend is not self._fixed_backend:
+            backend.close()
+
+
+def create_default_backend():
+    """
+    Backend for the process-wide registry: None (AIOUSB.dll) unless
+    TESTHEAD_DIO_BACKEND selects the simulator.
+    """
+    name = os.environ.get(BACKEND_ENV, "aiousb").strip().lower()
+    if name in ("", "aiousb"):
+        return None
+    if name == "simulator":
+        from accesio.dio_simulator import SimulatedBackend
+        return SimulatedBackend.from_spec(
+            os.environ.get(SIM_BOARDS_ENV, DEFAULT_SIM_BOARDS),
+            latency_ms=float(os.environ.get(SIM_LATENCY_ENV, "0"))
+        )
+    raise ValueError(f"Unknown {BACKEND_ENV} '{name}'. Expected 'aiousb' or 'simulator'")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the process-wide DIORegistry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DIORegistry(backend=create_default_backend())
+        return _registry
+
+
+def shutdown():
+    """Shuts down the process-wide registry if one was created."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.shutdown()
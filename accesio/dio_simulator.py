@@ -0,0 +1,229 @@
+"""
+DIO Simulator
+In-process DIOBackend that models ACCESIO USB DIO boards, so the control path
+can be run, tested and profiled on machines without AIOUSB.dll or hardware
+"""
+import threading
+import time
+
+from accesio.dio_backend import DIOBackend, DEVICE_NOT_FOUND
+
+# Win32 status codes the simulator returns (same as AIOUSB.dll)
+ERROR_SUCCESS = 0
+ERROR_DEV_NOT_EXIST = 55
+ERROR_INVALID_PARAMETER = 87
+
+MODEL_LINES = {
+    "ACCESSIO_16": 16,
+    "ACCESSIO_48": 48,
+    "ACCESSIO_96": 96
+}
+
+BACKEND_CALLS = ("GetDeviceByEEPROMByte", "DIO_Configure", "DIO_Write1", "DIO_ReadAll")
+
+
+def _model_lines(model):
+    """Line count from a model name ("ACCESSIO_48") or a plain line count (48 or "48")."""
+    if isinstance(model, int):
+        lines = model
+    elif str(model).strip().isdigit():
+        lines = int(str(model).strip())
+    else:
+        lines = MODEL_LINES.get(str(model).strip().upper())
+    if lines not in (16, 48, 96):
+        raise ValueError(f"Unsupported simulated board model: {model}. Use 16, 48, 96 or {list(MODEL_LINES)}")
+    return lines
+
+
+class SimulatedBoard:
+    """
+    One simulated USB-DIO board.
+
+    Ports power up as inputs. Output ports read back their latched value, input
+    ports read input_level (pull-ups make floating inputs read high).
+
+    Args:
+        board_id (int): EEPROM byte at address 0x00.
+        model: "ACCESSIO_16/48/96" or a line count.
+        input_level (int): Byte read from every input port.
+    """
+
+    def __init__(self, board_id, model=96, input_level=0xFF):
+        if not (0 <= board_id <= 255):
+            raise ValueError("board_id must be an integer between 0 and 255.")
+        self.board_id = board_id
+        self.lines = _model_lines(model)
+        self.port_count = self.lines // 8
+        self.input_level = input_level
+        self.out_mask = 0x0000
+        self.tristate = 0
+        self.latch = [0x00] * self.port_count
+
+    def read_ports(self):
+        """Returns what DIO_ReadAll would see on every port."""
+        return [
+            self.latch[port] if (self.out_mask >> port) & 1 and not self.tristate else self.input_level
+            for port in range(self.port_count)
+        ]
+
+
+class SimulatedBackend(DIOBackend):
+    """
+    DIOBackend that simulates a set of boards on the USB bus.
+
+    Device indexes are assigned in the order boards are added, like AIOUSB
+    enumeration. unplug()/replug() model hot-plug, fail_next() injects DLL
+    errors, and latency adds a per-call delay to reproduce USB timing.
+
+    Args:
+        boards (iterable): SimulatedBoard objects or (board_id, model) tuples.
+        latency (float or dict): Seconds added to every call, or a dict mapping
+                                 call names (see BACKEND_CALLS) to seconds.
+    """
+    name = "simulator"
+
+    def __init__(self, boards=(), latency=0.0):
+        self._lock = threading.Lock()
+        self._slots = []        # device_index -> SimulatedBoard, None once unplugged
+        self._failures = {}     # call name -> list of status codes to return next
+        self.call_counts = {call: 0 for call in BACKEND_CALLS}
+        if isinstance(latency, dict):
+            unknown = set(latency) - set(BACKEND_CALLS)
+            if unknown:
+                raise ValueError(f"Unknown calls in latency: {sorted(unknown)}")
+            self.latency = {call: latency.get(call, 0.0) for call in BACKEND_CALLS}
+        else:
+            self.latency = {call: latency for call in BACKEND_CALLS}
+        for board in boards:
+            if not isinstance(board, SimulatedBoard):
+                board = SimulatedBoard(*board)
+            self.add_board(board)
+
+    @classmethod
+    def from_spec(cls, spec, latency_ms=0.0):
+        """
+        Builds a backend from a "board_id:model,..." string, e.g. "1:ACCESSIO_96,2:16".
+
+        Board IDs are hex like the config HEXADDRESS column.
+        """
+        boards = []
+        for entry in spec.split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            board_id, _, model = entry.partition(':')
+            boards.append(SimulatedBoard(int(board_id, 16), model or 96))
+        return cls(boards, latency=latency_ms / 1000.0)
+
+    # ***********************************
+    # Bus and fault control
+    # ***********************************
+    def add_board(self, board):
+        """Attaches a board at the next device index. Returns the index."""
+        with self._lock:
+            self._slots.append(board)
+            return len(self._slots) - 1
+
+    def get_board(self, board_id):
+        """Returns the attached SimulatedBoard with this board ID, or None."""
+        with self._lock:
+            for board in self._slots:
+                if board is not None and board.board_id == board_id:
+                    return board
+        return None
+
+    def unplug(self, board_id):
+        """Detaches a board. Calls on its device index fail with ERROR_DEV_NOT_EXIST."""
+        with self._lock:
+            for index, board in enumerate(self._slots):
+                if board is not None and board.board_id == board_id:
+                    self._slots[index] = None
+                    return board
+        raise ValueError(f"No simulated board with ID 0x{board_id:02X} is attached")
+
+    def replug(self, board_id):
+        """Unplugs and re-attaches a board, which then enumerates at a new device index."""
+        board = self.unplug(board_id)
+        board.out_mask = 0x0000
+        board.latch = [0x00] * board.port_count
+        return self.add_board(board)
+
+    def fail_next(self, call, code, count=1):
+        """Makes the next count calls of one function return an error status."""
+        if call not in BACKEND_CALLS:
+            raise ValueError(f"Unknown call '{call}'. Expected one of {BACKEND_CALLS}")
+        with self._lock:
+            self._failures.setdefault(call, []).extend([code] * count)
+
+    def _enter(self, call):
+        """Counts the call, applies latency and returns an injected failure code (or 0)."""
+        delay = self.latency[call]
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.call_counts[call] += 1
+            pending = self._failures.get(call)
+            if pending:
+                return pending.pop(0)
+        return ERROR_SUCCESS
+
+    def _board(self, device_index):
+        with self._lock:
+            if 0 <= device_index < len(self._slots):
+                return self._slots[device_index]
+        return None
+
+    # ***********************************
+    # DIOBackend calls
+    # ***********************************
+    def get_device_by_eeprom_byte(self, board_id):
+        if self._enter("GetDeviceByEEPROMByte"):
+            return DEVICE_NOT_FOUND
+        with self._lock:
+            for index, board in enumerate(self._slots):
+                if board is not None and board.board_id == board_id:
+                    return index
+        return DEVICE_NOT_FOUND
+
+    def dio_configure(self, device_index, tristate, out_mask, data):
+        status = self._enter("DIO_Configure")
+        if status:
+            return status
+        board = self._board(device_index)
+        if board is None:
+            return ERROR_DEV_NOT_EXIST
+        with self._lock:
+            board.tristate = tristate
+            board.out_mask = out_mask & ((1 << board.port_count) - 1)
+            for port in range(min(board.port_count, len(data))):
+                board.latch[port] = data[port] & 0xFF
+        return ERROR_SUCCESS
+
+    def dio_write1(self, device_index, line, value):
+        status = self._enter("DIO_Write1")
+        if status:
+            return status
+        board = self._board(device_index)
+        if board is None:
+            return ERROR_DEV_NOT_EXIST
+        if not (0 <= line < board.lines):
+            return ERROR_INVALID_PARAMETER
+        with self._lock:
+            port, bit = line // 8, line % 8
+            if value:
+                board.latch[port] |= (1 << bit)
+            else:
+                board.latch[port] &= ~(1 << bit) & 0xFF
+        return ERROR_SUCCESS
+
+    def dio_read_all(self, device_index, port_count):
+        status = self._enter("DIO_ReadAll")
+        if status:
+            return status, [0x00] * port_count
+        board = self._board(device_index)
+        if board is None:
+            return ERROR_DEV_NOT_EXIST, [0x00] * port_count
+        with self._lock:
+            ports = board.read_ports()
+        # A buffer sized for a bigger model only gets this board's ports filled in
+        return ERROR_SUCCESS, (ports + [0x00] * port_count)[:port_count]
@@ -0,0 +1,285 @@
+"""
+DIO Call Statistics
+Per-device timing of every AIOUSB.dll call (GetDeviceByEEPROMByte,
+DIO_Configure, DIO_Write1, DIO_ReadAll): call and error counts, min/mean/max
+and a fixed-bucket latency histogram. Tells USB time apart from the config
+and Python time around it.
+
+AccesDIO wraps its backend in an InstrumentedBackend, so every call is seen.
+While collection is disabled a call costs one flag check on top of the
+backend call; enabled, two clock reads and one short locked update.
+"""
+import bisect
+import os
+import threading
+import time
+
+from accesio.dio_backend import DEVICE_NOT_FOUND, DIOBackend
+
+STATS_ENV = "TESTHEAD_DIO_STATS"    # "1" enables collection at startup
+
+GET_DEVICE_BY_EEPROM_BYTE = "GetDeviceByEEPROMByte"
+DIO_CONFIGURE = "DIO_Configure"
+DIO_WRITE1 = "DIO_Write1"
+DIO_READ_ALL = "DIO_ReadAll"
+DLL_CALLS = (GET_DEVICE_BY_EEPROM_BYTE, DIO_CONFIGURE, DIO_WRITE1, DIO_READ_ALL)
+
+# Upper edges of the histogram buckets in microseconds; one more bucket counts slower calls
+BUCKET_EDGES_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+_BUCKET_EDGES_NS = tuple(edge * 1000 for edge in BUCKET_EDGES_US)
+
+
+class CallStats:
+    """
+    Counters of one DLL function on one device.
+
+    Attributes:
+        count (int): Calls made.
+        errors (int): Calls that returned a non-zero status, found no board,
+                      or raised.
+        total_ns, min_ns, max_ns (int): Call durations.
+        buckets (list): Calls per histogram bucket (see BUCKET_EDGES_US).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * (len(_BUCKET_EDGES_NS) + 1)
+
+    def add(self, elapsed_ns, failed):
+        self.count += 1
+        if failed:
+            self.errors += 1
+        self.total_ns += elapsed_ns
+        if self.min_ns is None or elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[bisect.bisect_left(_BUCKET_EDGES_NS, elapsed_ns)] += 1
+
+    def percentile_us(self, percent):
+        """
+        Upper edge of the bucket holding the given percentile (capped at the
+        slowest call), so the value is never below the true percentile.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                break
+        edge_ns = _BUCKET_EDGES_NS[index] if index < len(_BUCKET_EDGES_NS) else self.max_ns
+        return min(edge_ns, self.max_ns) / 1000
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_us": self.total_ns / 1000,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+            "min_us": (self.min_ns or 0) / 1000,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.percentile_us(50),
+            "p95_us": self.percentile_us(95),
+            "p99_us": self.percentile_us(99),
+            "histogram": list(self.buckets),
+        }
+
+
+class DIOStats:
+    """
+    Process-wide collector of DLL call statistics, keyed by (device index, call).
+
+    GetDeviceByEEPROMByte is recorded on the device index it returned (None
+    if no board had the ID, which also counts as an error).
+
+    Args:
+        enabled (bool): Start collecting right away.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._calls = {}    # (device_index, call) -> CallStats
+        self._lock = threading.Lock()
+        self.since = time.time()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        """Stop collecting; the counters so far are kept."""
+        self.enabled = False
+
+    def reset(self):
+        """Drop every counter (collection stays on or off)."""
+        with self._lock:
+            self._calls.clear()
+            self.since = time.time()
+
+    def record(self, call, device_index, elapsed_ns, failed):
+        """Add one call. Used by InstrumentedBackend."""
+        key = (device_index, call)
+        with self._lock:
+            stats = self._calls.get(key)
+            if stats is None:
+                stats = self._calls[key] = CallStats()
+            stats.add(elapsed_ns, failed)
+
+    def get(self, device_index, call):
+        """
+        Counters of one call on one device, as in snapshot().
+
+        Returns:
+            dict: None if the call was never made on the device.
+        """
+        with self._lock:
+            stats = self._calls.get((device_index, call))
+            return stats.to_dict() if stats is not None else None
+
+    def snapshot(self):
+        """
+        JSON-friendly copy of every counter.
+
+        Returns:
+            dict: {"enabled", "since" (epoch seconds), "bucket_edges_us",
+                   "calls": [{"device", "call", "count", "errors", "total_us",
+                              "mean_us", "min_us", "max_us", "p50_us",
+                              "p95_us", "p99_us", "histogram"}, ...]}
+                  Calls sorted by device, then in DLL_CALLS order.
+        """
+        with self._lock:
+            rows = [dict(device=device, call=call, **stats.to_dict())
+                    for (device, call), stats in self._calls.items()]
+        rows.sort(key=lambda row: (row["device"] is None, row["device"] or 0, DLL_CALLS.index(row["call"])))
+        return {"enabled": self.enabled, "since": self.since,
+                "bucket_edges_us": list(BUCKET_EDGES_US), "calls": rows}
+
+
+def format_stats(snapshot):
+    """
+    Text table of a DIOStats.snapshot(), one line per device and call.
+
+    Returns:
+        str: The table (a note if nothing was recorded).
+    """
+    lines = []
+    if not snapshot["calls"]:
+        state = "enabled" if snapshot["enabled"] else f"disabled, set {STATS_ENV}=1 or pass --stats"
+        return f"No DLL calls recorded (collection {state})"
+    lines.append(f"{'Device':>6}  {'Call':<21} {'Count':>7} {'Errors':>6} {'Mean us':>9} {'Min us':>9} "
+                 f"{'p95 us':>9} {'Max us':>9} {'Total ms':>9}")
+    for row in snapshot["calls"]:
+        device = "-" if row["device"] is None else row["device"]
+        lines.append(f"{device:>6}  {row['call']:<21} {row['count']:>7} {row['errors']:>6} {row['mean_us']:>9.1f} "
+                     f"{row['min_us']:>9.1f} {row['p95_us']:>9.1f} {row['max_us']:>9.1f} {row['total_us'] / 1000:>9.2f}")
+    edges = snapshot["bucket_edges_us"]
+    labels = [f"<={edge}" for edge in edges] + [f">{edges[-1]}"]
+    lines.append("")
+    lines.append("Latency histogram (us):")
+    for row in snapshot["calls"]:
+        device = "-" if row["device"] is None else row["device"]
+        filled = [f"{label}:{count}" for label, count in zip(labels, row["histogram"]) if count]
+        lines.append(f"{device:>6}  {row['call']:<21} {' '.join(filled)}")
+    return "\n".join(lines)
+
+
+class InstrumentedBackend(DIOBackend):
+    """
+    DIOBackend that times every call of another backend into a DIOStats.
+
+    Attributes the wrapped backend has beyond DIOBackend (e.g. the
+    simulator's fail_next) are passed through.
+
+    Args:
+        backend (DIOBackend): Backend making the calls.
+        stats (DIOStats): Collector. The process-wide one if None.
+    """
+
+    def __init__(self, backend, stats=None):
+        self.backend = backend
+        self.stats = stats if stats is not None else get_dio_stats()
+        self.name = backend.name
+
+    def __getattr__(self, name):
+        # Only reached for attributes this class does not define
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def get_device_by_eeprom_byte(self, board_id):
+        if not self.stats.enabled:
+            return self.backend.get_device_by_eeprom_byte(board_id)
+        start = time.perf_counter_ns()
+        try:
+            result = self.backend.get_device_by_eeprom_byte(board_id)
+        except Exception:
+            self.stats.record(GET_DEVICE_BY_EEPROM_BYTE, None, time.perf_counter_ns() - start, True)
+            raise
+        found = result not in (DEVICE_NOT_FOUND, -1)
+        self.stats.record(GET_DEVICE_BY_EEPROM_BYTE, result if found else None,
+                          time.perf_counter_ns() - start, not found)
+        return result
+
+    def dio_configure(self, device_index, tristate, out_mask, data):
+        if not self.stats.enabled:
+            return self.backend.dio_configure(device_index, tristate, out_mask, data)
+        start = time.perf_counter_ns()
+        try:
+            result = self.backend.dio_configure(device_index, tristate, out_mask, data)
+        except Exception:
+            self.stats.record(DIO_CONFIGURE, device_index, time.perf_counter_ns() - start, True)
+            raise
+        self.stats.record(DIO_CONFIGURE, device_index, time.perf_counter_ns() - start, result != 0)
+        return result
+
+    def dio_write1(self, device_index, line, value):
+        if not self.stats.enabled:
+            return self.backend.dio_write1(device_index, line, value)
+        start = time.perf_counter_ns()
+        try:
+            result = self.backend.dio_write1(device_index, line, value)
+        except Exception:
+            self.stats.record(DIO_WRITE1, device_index, time.perf_counter_ns() - start, True)
+            raise
+        self.stats.record(DIO_WRITE1, device_index, time.perf_counter_ns() - start, result != 0)
+        return result
+
+    def dio_read_all(self, device_index, port_count):
+        if not self.stats.enabled:
+            return self.backend.dio_read_all(device_index, port_count)
+        start = time.perf_counter_ns()
+        try:
+            result, ports = self.backend.dio_read_all(device_index, port_count)
+        except Exception:
+            self.stats.record(DIO_READ_ALL, device_index, time.perf_counter_ns() - start, True)
+            raise
+        self.stats.record(DIO_READ_ALL, device_index, time.perf_counter_ns() - start, result != 0)
+        return result, ports
+
+    def close(self):
+        self.backend.close()
+
+
+def instrument(backend, stats=None):
+    """backend wrapped in an InstrumentedBackend (returned as is if it already is one)."""
+    if isinstance(backend, InstrumentedBackend):
+        return backend
+    return InstrumentedBackend(backend, stats)
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_dio_stats():
+    """Returns the process-wide DIOStats, enabled at creation if TESTHEAD_DIO_STATS is set."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = DIOStats(enabled=os.environ.get(STATS_ENV, "").strip().lower() in ("1", "true", "on", "yes"))
+        return _stats
@@ -0,0 +1,670 @@
+"""
+Compiled Configuration Cache
+Parses an Excel or JSON testhead config once into a compiled form (DIO_List,
+sheet and model names, every table row) and keeps it on disk keyed by path,
+mtime, size and content hash, so later opens skip the workbook parse
+"""
+import hashlib
+import json
+import os
+import threading
+import weakref
+
+from testhead_logging import get_logger
+
+logger = get_logger("config")
+
+CACHE_FORMAT_VERSION = 3
+
+# Cache directory override. Set to "off" to keep compiled configs in memory only.
+CACHE_DIR_ENV = "TESTHEAD_CONFIG_CACHE_DIR"
+
+MODEL_SHEETS_KEY = "Model Sheets"
+MODEL_FIELD = "Model_"
+
+
+class CompiledConfig:
+    """
+    Parsed content of one config file.
+
+    Excel values are strings exactly as pandas reads them with dtype=str and
+    keep_default_na=False, so DataFrames rebuilt from a compiled config match
+    a direct pd.read_excel (.xlsx is read by xlsx_reader; error cells such as
+    #N/A keep their text). JSON values are kept as they appear in the file.
+
+    Attributes:
+        source (dict): Fingerprint of the file it was compiled from (see fingerprint()).
+        file_format (str): 'excel' or 'json'.
+        sheet_names (list): Excel sheet names, or JSON top-level keys, in file order.
+        model_names (list): Distinct Model_ values of a JSON "Model Sheets" list, in
+                            file order. Empty for Excel and for JSON with one key per model.
+        tables (dict): Sheet name / JSON key -> {"columns": [...], "records": [row dicts]}.
+        models (dict): Model_ value -> row dicts, for the JSON "Model Sheets" layout.
+        table_keys (dict): Sheet name / JSON key -> content key. When the file is
+                           recompiled, tables whose key is unchanged are reused
+                           as-is (same object) instead of being parsed again.
+        model_keys (dict): Model_ value -> content key, same purpose.
+    """
+
+    def __init__(self, source, file_format, sheet_names, model_names, tables, models, table_keys=None, model_keys=None):
+        self.source = source
+        self.file_format = file_format
+        self.sheet_names = sheet_names
+        self.model_names = model_names
+        self.tables = tables
+        self.models = models
+        self.table_keys = table_keys or {}
+        self.model_keys = model_keys or {}
+        self._path_index = None
+        self._path_index_lock = threading.Lock()
+
+    @property
+    def has_model_sheets(self):
+        """True for JSON configs with all models in one "Model Sheets" list"""
+        return MODEL_SHEETS_KEY in self.tables
+
+    def get_records(self, name):
+        """Row dicts of a sheet / JSON key, or None if it does not exist."""
+        table = self.tables.get(name)
+        return None if table is None else table["records"]
+
+    def get_path_index(self, previous=None):
+        """
+        PathName index of every sheet / model, built on first use.
+
+        Args:
+            previous (PathIndex): Index of an earlier version of this file. Its
+                                  entries are reused for tables that were not
+                                  re-parsed, so only edited sheets / models are re-indexed.
+
+        Returns:
+            PathIndex: Shared by every loader of this compiled config.
+        """
+        with self._path_index_lock:
+            if self._path_index is None:
+                self._path_index = PathIndex(self, previous)
+            return self._path_index
+
+    def has_path_index(self):
+        return self._path_index is not None
+
+    def changed_tables(self, previous):
+        """
+        Sheet / JSON key / model names whose content differs from an earlier
+        compile of the same file (edited, added or removed), in file order.
+        """
+        changed = []
+        for mine, theirs in ((self.tables, previous.tables), (self.models, previous.models)):
+            for name in list(mine) + [name for name in theirs if name not in mine]:
+                if name == MODEL_SHEETS_KEY and self.has_model_sheets:
+                    continue  # Reported per model instead
+                if mine.get(name) is not theirs.get(name) and name not in changed:
+                    changed.append(name)
+        return changed
+
+    def to_dict(self):
+        return {
+            "version": CACHE_FORMAT_VERSION,
+            "source": self.source,
+            "file_format": self.file_format,
+            "sheet_names": self.sheet_names,
+            "model_names": self.model_names,
+            "tables": self.tables,
+            "models": self.models,
+            "table_keys": self.table_keys,
+            "model_keys": self.model_keys
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["source"], data["file_format"], data["sheet_names"],
+                   data["model_names"], data["tables"], data["models"],
+                   data.get("table_keys"), data.get("model_keys"))
+
+
+class PathEntry:
+    """
+    One PathName row of a lookup table.
+
+    Attributes:
+        path_name (str): PathName as written in the config.
+        command (str): SwitchDriverCommand of the row.
+        position (int): 0-based row index within its sheet / model.
+        row (dict): Every column of the row (ITEM, TEST_DESC, AP CONFIGURE OUT, ...).
+    """
+
+    def __init__(self, path_name, command, position, row):
+        self.path_name = path_name
+        self.command = command
+        self.position = position
+        self.row = row
+
+    @property
+    def item(self):
+        """ITEM column, or None if the sheet has none"""
+        return self.row.get('ITEM')
+
+    @property
+    def test_desc(self):
+        """TEST_DESC column, or None if the sheet has none"""
+        return self.row.get('TEST_DESC')
+
+
+class PathIndex:
+    """
+    Sheet / model -> PathName -> PathEntry, for constant-time lookups.
+
+    Lookups return the same command as the original scans: the first row
+    with a PathName wins. Later rows with the same PathName are listed in
+    duplicates and reported when the index is built.
+
+    Excel sheets use the PathName and SwitchDriverCommand columns matched
+    case-insensitively. A sheet without them stays unindexed and raises the
+    original "column not found" error only when it is looked up.
+
+    Attributes:
+        tables (dict): Sheet or model name -> {path_name: PathEntry}.
+        column_errors (dict): Excel sheet name -> error message for sheets without the columns.
+        duplicates (list): (table, path_name, first_position, duplicate_position) tuples.
+        reindexed (list): Tables built by this index. Others were shared with
+                          the previous index because their content did not change.
+    """
+
+    def __init__(self, compiled, previous=None):
+        self.file_format = compiled.file_format
+        self.source_path = compiled.source["path"]
+        self.tables = {}
+        self.column_errors = {}
+        self.duplicates = []
+        self.reindexed = []
+        self._sources = {}      # table name -> table dict / model rows it was built from
+        self._previous = previous if previous is not None and previous.file_format == compiled.file_format else None
+
+        if compiled.file_format == 'excel':
+            for name, table in compiled.tables.items():
+                pathname_col = None
+                switchcmd_col = None
+                for col in table["columns"]:
+                    if col.upper() == 'PATHNAME':
+                        pathname_col = col
+                    elif col.upper() == 'SWITCHDRIVERCOMMAND':
+                        switchcmd_col = col
+                if pathname_col is None:
+                    self.column_errors[name] = f"'PathName' column not found in sheet '{name}'. Available columns: {table['columns']}"
+                elif switchcmd_col is None:
+                    self.column_errors[name] = f"'SwitchDriverCommand' column not found in sheet '{name}'. Available columns: {table['columns']}"
+                else:
+                    self._index(name, table, table["records"], pathname_col, switchcmd_col)
+        elif compiled.has_model_sheets:
+            for name, records in compiled.models.items():
+                self._index(name, records, records, 'PathName', 'SwitchDriverCommand')
+        else:
+            for name, table in compiled.tables.items():
+                self._index(name, table, table["records"], 'PathName', 'SwitchDriverCommand')
+        self._previous = None
+
+        for table, path_name, first, duplicate in self.duplicates:
+            if table in self.reindexed:
+                logger.warning("PathName '%s' appears more than once in '%s' (rows %d and %d). Using the first.",
+                               path_name, table, first + 1, duplicate + 1)
+
+    def _index(self, name, source, records, pathname_col, switchcmd_col):
+        self._sources[name] = source
+        previous = self._previous
+        if previous is not None and previous._sources.get(name) is source:
+            # Table reused unchanged by the recompile: share the previous entries
+            self.tables[name] = previous.tables[name]
+            self.duplicates.extend(duplicate for duplicate in previous.duplicates if duplicate[0] == name)
+            return
+        self.reindexed.append(name)
+        entries = {}
+        for position, row in enumerate(records):
+            path_name = row.get(pathname_col)
+            if path_name is None:
+                continue
+            first = entries.get(path_name)
+            if first is not None:
+                if str(path_name).strip():
+                    self.duplicates.append((name, path_name, first.position, position))
+                continue
+            entries[path_name] = PathEntry(path_name, row.get(switchcmd_col), position, row)
+        self.tables[name] = entries
+
+    def lookup(self, path_name, table_name):
+        """
+        Returns the PathEntry of a PathName in a sheet / model.
+
+        Raises:
+            ValueError: With the same messages as the original ConfigLoader scans
+                        (sheet missing, columns missing, PathName not found).
+        """
+        if self.file_format == 'excel':
+            entries = self.tables.get(table_name)
+            if entries is None:
+                if table_name in self.column_errors:
+                    raise ValueError(self.column_errors[table_name])
+                raise ValueError(f"Sheet '{table_name}' not found in {self.source_path}")
+            entry = entries.get(path_name)
+            if entry is None:
+                raise ValueError(f"DIO pathname '{path_name}' not found in sheet '{table_name}'.")
+            return entry
+
+        entry = self.tables.get(table_name, {}).get(path_name)
+        if entry is None:
+            raise ValueError(f"DIO pathname '{path_name}' not found in the command list.")
+        return entry
+
+
+# ***********************************
+# Fingerprints
+# ***********************************
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path, with_hash=True):
+    """
+    Identity of a config file's current content.
+
+    Args:
+        path (str): Config file path.
+        with_hash (bool): Include the SHA-256 of the content. Without it only
+                          path, mtime and size are returned (a stat call).
+
+    Returns:
+        dict: {"path", "mtime_ns", "size"} and "sha256" if requested.
+    """
+    st = os.stat(path)
+    result = {"path": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if with_hash:
+        result["sha256"] = _hash_file(path)
+    return result
+
+
+def _same_stat(a, b):
+    return a["path"] == b["path"] and a["mtime_ns"] == b["mtime_ns"] and a["size"] == b["size"]
+
+
+# ***********************************
+# Compilation
+# ***********************************
+def _content_key(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _compile_excel(path, source, previous=None):
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        # Stream the workbook XML directly; pandas/openpyxl are not imported
+        from xlsx_reader import XlsxReader
+        tables = {}
+        table_keys = {}
+        with XlsxReader(path) as reader:
+            format_crc = reader.format_crc()
+            for name in reader.sheet_names:
+                # A sheet is unchanged if its XML part, the number formats and
+                # the shared strings its cells point at are all the same
+                sheet_crc = reader.sheet_crc(name)
+                old_key = previous.table_keys.get(name) if previous is not None else None
+                if (old_key is not None and name in previous.tables
+                        and old_key[0] == sheet_crc and old_key[1] == format_crc
+                        and old_key[3] == _content_key(reader.shared_strings_at(old_key[2]))):
+                    tables[name] = previous.tables[name]
+                    table_keys[name] = old_key
+                    continue
+                columns, records = reader.read_sheet(name)
+                refs = sorted(reader.string_refs.get(name, ()))
+                tables[name] = {"columns": columns, "records": records}
+                table_keys[name] = [sheet_crc, format_crc, refs, _content_key(reader.shared_strings_at(refs))]
+        return CompiledConfig(source, 'excel', list(tables), [], tables, {}, table_keys)
+
+    # Legacy .xls workbooks still go through pandas (xlrd)
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas is required for Excel support. Install with: pip install pandas openpyxl")
+
+    # One parse for the whole workbook instead of one ExcelFile + read_excel per sheet
+    frames = pd.read_excel(path, sheet_name=None, dtype=str, header=0, keep_default_na=False)
+    tables = {}
+    for name, df in frames.items():
+        columns = [str(col) for col in df.columns]
+        df.columns = columns
+        tables[name] = {"columns": columns, "records": df.to_dict('records')}
+    return CompiledConfig(source, 'excel', list(frames), [], tables, {})
+
+
+def _compile_json(path, source, previous=None):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if previous is None or previous.file_format != 'json':
+        previous = CompiledConfig(source, 'json', [], [], {}, {})
+
+    tables = {}
+    table_keys = {}
+    for key, value in data.items():
+        if isinstance(value, list) and all(isinstance(row, dict) for row in value):
+            table_keys[key] = _content_key(value)
+            if previous.table_keys.get(key) == table_keys[key] and key in previous.tables:
+                tables[key] = previous.tables[key]  # Unchanged: keep the same object (and its index)
+                continue
+            columns = []
+            for row in value:
+                columns.extend(col for col in row if col not in columns)
+            tables[key] = {"columns": columns, "records": value}
+
+    model_names = []
+    models = {}
+    model_rows = data.get(MODEL_SHEETS_KEY)
+    if isinstance(model_rows, list):
+        for row in model_rows:
+            model = row.get(MODEL_FIELD) if isinstance(row, dict) else None
+            if model not in models:
+                models[model] = []
+                if model:
+                    model_names.append(model)
+            models[model].append(row)
+        models.pop(None, None)
+    model_keys = {}
+    for model, rows in models.items():
+        model_keys[model] = _content_key(rows)
+        if previous.model_keys.get(model) == model_keys[model] and model in previous.models:
+            models[model] = previous.models[model]
+    return CompiledConfig(source, 'json', list(data), model_names, tables, models, table_keys, model_keys)
+
+
+def compile_config(path, file_format, source=None, previous=None):
+    """
+    Parses a config file into a CompiledConfig (no caching).
+
+    Args:
+        path (str): Config file path.
+        file_format (str): 'excel' or 'json', as detected by ConfigLoader.
+        source (dict): Fingerprint to record. Computed if None.
+        previous (CompiledConfig): Earlier compile of the same file. Sheets and
+                                   models whose content is unchanged are taken
+                                   from it instead of being parsed again.
+    """
+    if source is None:
+        source = fingerprint(path)
+    if previous is not None and previous.file_format != file_format:
+        previous = None
+    if file_format == 'excel':
+        return _compile_excel(path, source, previous)
+    elif file_format == 'json':
+        return _compile_json(path, source, previous)
+    raise ValueError(f"Unsupported config file format: {file_format}")
+
+
+# ***********************************
+# Cache
+# ***********************************
+def default_cache_dir():
+    """
+    Directory for compiled configs: TESTHEAD_CONFIG_CACHE_DIR if set, otherwise
+    %LOCALAPPDATA%\\TestHead\\config_cache (or ~/.cache/testhead/config_cache).
+
+    Returns:
+        str: Directory path, or None if the on-disk cache is turned off.
+    """
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured is not None:
+        return None if configured.strip().lower() in ("", "off", "0", "none") else configured
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return os.path.join(base, "TestHead", "config_cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "testhead", "config_cache")
+
+
+def cache_file_path(config_path, cache_dir):
+    """Cache file for a config: one file per absolute config path."""
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(config_path)).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def mapped_index_path(config_path, cache_dir, source):
+    """
+    Mapped index file for one version of a config (fingerprint without hash).
+
+    Named by mtime and size, so opening it costs a stat, and a new version is
+    written next to the old one instead of replacing a file other processes
+    may still have mapped.
+    """
+    return cache_file_path(config_path, cache_dir)[:-len(".json")] + f"-{source['mtime_ns']:x}-{source['size']:x}.idx"
+
+
+def _read_cache_file(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return CompiledConfig.from_dict(data)
+    except (OSError, ValueError, KeyError):
+        return None  # Missing, partial or from another version: rebuild
+
+
+def _write_cache_file(cache_path, compiled):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(compiled.to_dict(), f)
+        os.replace(temp_path, cache_path)  # Readers never see a half-written file
+    except OSError:
+        pass  # Read-only or full disk: the compiled config is still used in memory
+
+
+class ConfigCache:
+    """
+    Compiled configs by file, validated against the file on every open.
+
+    An unchanged file (same path, mtime and size) costs one stat. If the
+    stat differs, the content hash decides: equal content (e.g. a copy that
+    kept the bytes) reuses the compiled form, changed content is recompiled
+    and the cache file rewritten.
+
+    Args:
+        cache_dir (str): Directory for cache files. None keeps compiled
+                         configs in memory only.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._memory = {}   # absolute config path -> CompiledConfig
+        self._mapped = {}   # absolute config path -> MappedIndex of its current content
+        self._mapped_holders = weakref.WeakKeyDictionary()  # MappedIndex -> loaders holding it
+        self._path_locks = {}   # absolute config path -> RLock held while it is compiled / indexed
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "compiles": 0, "index_maps": 0, "index_builds": 0}
+
+    def load(self, path, file_format):
+        """
+        Returns the CompiledConfig for a config file, compiling it only if needed.
+
+        Args:
+            path (str): Config file path.
+            file_format (str): 'excel' or 'json'.
+
+        Raises:
+            FileNotFoundError: If the config file does not exist.
+        """
+        current = fingerprint(path, with_hash=False)
+        key = current["path"]
+        with self._lock:
+            compiled = self._memory.get(key)
+        if compiled is not None and compiled.file_format == file_format and _same_stat(compiled.source, current):
+            self.stats["memory_hits"] += 1
+            return compiled
+
+        # One compile per file at a time: a second caller (e.g. the preloader and
+        # the GUI) waits for the first and takes its result from memory
+        with self._path_lock(key):
+            with self._lock:
+                compiled = self._memory.get(key)
+            if compiled is not None and compiled.file_format == file_format and _same_stat(compiled.source, current):
+                self.stats["memory_hits"] += 1
+                return compiled
+            return self._load_locked(path, file_format, key, current, compiled)
+
+    def _load_locked(self, path, file_format, key, current, compiled):
+        cache_path = cache_file_path(path, self.cache_dir) if self.cache_dir else None
+        if compiled is None and cache_path:
+            compiled = _read_cache_file(cache_path)
+            if compiled is not None and compiled.file_format == file_format and _same_stat(compiled.source, current):
+                self.stats["disk_hits"] += 1
+                return self._remember(key, compiled)
+
+        current["sha256"] = _hash_file(path)
+        if compiled is not None and compiled.file_format == file_format and compiled.source.get("sha256") == current["sha256"]:
+            # Touched or copied but same content: refresh the stat part of the key
+            compiled.source = current
+            self.stats["disk_hits"] += 1
+        else:
+            # Only sheets / models that changed since the last compile are parsed again
+            compiled = compile_config(path, file_format, current, previous=compiled)
+            self.stats["compiles"] += 1
+        if cache_path:
+            _write_cache_file(cache_path, compiled)
+        return self._remember(key, compiled)
+
+    def load_mapped_index(self, path, file_format):
+        """
+        Returns the memory-mapped PathName index of a config file (see mapped_index).
+
+        The index file sits in the cache directory, named by the config's
+        mtime and size. Processes opening the same config map the same file,
+        so its pages are shared; it is built (from the compiled config) only
+        if no process has built it yet.
+
+        Every call holds the returned index until release_mapped_index(). An
+        index replaced by a newer version of the config is closed once
+        nobody holds it any more.
+
+        Args:
+            path (str): Config file path.
+            file_format (str): 'excel' or 'json'.
+
+        Returns:
+            MappedIndex: Shared by every loader of this config in the process.
+                         None if the cache has no directory (in-memory only).
+
+        Raises:
+            FileNotFoundError: If the config file does not exist.
+            OSError: If the index can neither be read nor written.
+        """
+        if not self.cache_dir:
+            return None
+        from mapped_index import MappedIndex, write_mapped_index
+
+        current = fingerprint(path, with_hash=False)
+        key = current["path"]
+        with self._lock:
+            index = self._mapped.get(key)
+            if index is not None and index.file_format == file_format and _same_stat(index.source, current):
+                return self._hold(index)
+
+        with self._path_lock(key):
+            with self._lock:
+                previous = self._mapped.get(key)
+                if previous is not None and previous.file_format == file_format and _same_stat(previous.source, current):
+                    return self._hold(previous)
+            index_path = mapped_index_path(path, self.cache_dir, current)
+            try:
+                index = MappedIndex(index_path)
+                if index.file_format != file_format or not _same_stat(index.source, current):
+                    index.close()
+                    index = None
+            except (OSError, ValueError):
+                index = None    # Not built yet (or unreadable): build it below
+            if index is None:
+                with self._lock:
+                    before = self._memory.get(key)
+                compiled = self.load(path, file_format)
+                if before is not None and before is not compiled and before.has_path_index():
+                    # Index only the sheets / models the edit changed, the file is then written in full
+                    compiled.get_path_index(before.get_path_index())
+                try:
+                    write_mapped_index(compiled, index_path)
+                    self.stats["index_builds"] += 1
+                    self._remove_stale_indexes(path, index_path)
+                except OSError:
+                    pass  # Read-only cache, or another process wrote the same index first
+                index = MappedIndex(index_path)
+            self.stats["index_maps"] += 1
+            with self._lock:
+                self._mapped[key] = index
+                if previous is not None:
+                    self._close_if_unused(previous)
+                return self._hold(index)
+
+    def release_mapped_index(self, index):
+        """
+        Ends one hold on an index returned by load_mapped_index, e.g. when a
+        loader moves to a newer version of the config.
+        """
+        with self._lock:
+            count = self._mapped_holders.get(index, 0) - 1
+            if count > 0:
+                self._mapped_holders[index] = count
+            else:
+                self._mapped_holders.pop(index, None)
+            self._close_if_unused(index)
+
+    def _hold(self, index):
+        self._mapped_holders[index] = self._mapped_holders.get(index, 0) + 1
+        return index
+
+    def _close_if_unused(self, index):
+        """Unmaps a replaced index nobody holds (called with self._lock held)."""
+        if not self._mapped_holders.get(index) and all(index is not other for other in self._mapped.values()):
+            index.close()
+
+    def _remove_stale_indexes(self, path, index_path):
+        prefix = cache_file_path(path, self.cache_dir)[:-len(".json")] + "-"
+        for name in os.listdir(self.cache_dir):
+            other = os.path.join(self.cache_dir, name)
+            if other.startswith(prefix) and other.endswith(".idx") and other != index_path:
+                try:
+                    os.remove(other)
+                except OSError:
+                    pass  # Still mapped by a running process (Windows): removed next time
+
+    def _path_lock(self, key):
+        with self._lock:
+            return self._path_locks.setdefault(key, threading.RLock())
+
+    def _remember(self, key, compiled):
+        with self._lock:
+            self._memory[key] = compiled
+        return compiled
+
+    def invalidate(self, path=None):
+        """Drops the in-memory entry of one config (or all). Cache files are kept and revalidated."""
+        with self._lock:
+            if path is None:
+                self._memory.clear()
+                dropped = list(self._mapped.values())
+                self._mapped.clear()
+            else:
+                self._memory.pop(os.path.abspath(path), None)
+                dropped = [self._mapped.pop(os.path.abspath(path), None)]
+            for index in dropped:
+                if index is not None:
+                    self._close_if_unused(index)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_config_cache():
+    """Returns the process-wide ConfigCache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ConfigCache(default_cache_dir())
+        return _default_cache
@@ -0,0 +1,366 @@
+"""
+Offline Config Compiler
+Validates every SwitchDriverCommand of a switch path configuration against the
+line count of each board model in its DIO_List and writes a compiled artifact
+(.thc) in which every path is already stored as per-port set/clear masks
+
+At run time Testhead_Control loads the artifact like a config file and applies
+paths without parsing or validating command strings.
+
+Usage:
+    python config_compiler.py <config_file> [output_file] [--allow-errors]
+    python testhead_control.py --compile <config_file> [output_file] [--allow-errors]
+"""
+import json
+import os
+import sys
+import threading
+
+from accesio.command_compiler import MODEL_LINE_COUNTS, CompiledCommand, compile_switch_command, model_max_lines
+from config_cache import fingerprint
+from config_loader import ConfigLoader
+from switch_scheduler import RelayTiming
+from testhead_logging import get_logger
+
+logger = get_logger("config")
+
+ARTIFACT_EXTENSION = ".thc"
+ARTIFACT_FORMAT = "testhead-compiled-config"
+ARTIFACT_VERSION = 1
+
+
+class CompileReport:
+    """
+    Outcome of compiling one config file.
+
+    Attributes:
+        errors (list): Messages that make the artifact unsafe to deploy
+                       (rejected tokens, bad HEXADDRESS, invalid relay timing).
+        warnings (list): Messages worth fixing that do not change what is applied.
+        path_count (int): Number of PathNames compiled.
+        line_counts (list): Distinct board line counts the paths were compiled for.
+    """
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+        self.path_count = 0
+        self.line_counts = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def compile_config_file(config_path):
+    """
+    Compile a switch path configuration into an artifact.
+
+    Every path of every lookup table is compiled once per distinct line count
+    of the boards in DIO_List, because any board can be driven from any sheet.
+
+    Args:
+        config_path (str): Path to an Excel (.xlsx/.xls) or JSON config file.
+
+    Returns:
+        tuple: (artifact dict, CompileReport). Paths with rejected tokens are
+               kept in the artifact with their errors, so they can be refused
+               at run time if the artifact is written anyway.
+
+    Raises:
+        FileNotFoundError: If the config file does not exist.
+        ValueError: If the config has no usable DIO_List.
+    """
+    report = CompileReport()
+    loader = ConfigLoader(config_path)
+    compiled_config = loader.get_compiled()
+
+    devices = loader.get_dio_devices()
+    if not devices:
+        raise ValueError(f"No DIO devices found in the DIO_List of {config_path}")
+    relay_timing = loader.load_relay_timing()
+
+    # Line count -> models and board names driven with it (model is used in error messages)
+    boards_by_lines = {}
+    for name, model, hexaddress in devices:
+        try:
+            int(str(hexaddress), 16)
+        except ValueError:
+            report.errors.append(f"DIO_List: invalid HEXADDRESS '{hexaddress}' for '{name}'")
+        if str(model).upper() not in MODEL_LINE_COUNTS:
+            report.warnings.append(f"DIO_List: MODEL '{model}' of '{name}' is not one of "
+                                   f"{list(MODEL_LINE_COUNTS)}; it is driven as a {model_max_lines(model)}-line board")
+        max_lines = model_max_lines(model)
+        boards_by_lines.setdefault(max_lines, []).append((name, str(model).upper()))
+        try:
+            RelayTiming.from_rows(relay_timing, name, max_lines)
+        except ValueError as e:
+            report.errors.append(f"Relay_Timing for '{name}': {e}")
+    report.line_counts = sorted(boards_by_lines)
+
+    index = loader.get_path_index()
+    for table, path_name, first, duplicate in index.duplicates:
+        report.warnings.append(f"{table}: PathName '{path_name}' appears more than once "
+                               f"(rows {first + 1} and {duplicate + 1}); the first is used")
+
+    tables = {}
+    for table, entries in index.tables.items():
+        if not entries:
+            continue
+        paths = {}
+        for path_name, entry in entries.items():
+            command = entry.command
+            if command is None or command == "":
+                report.warnings.append(f"{table}: '{path_name}' has no SwitchDriverCommand")
+                paths[str(path_name)] = {"command": "", "lines": {}}
+                continue
+            if not isinstance(command, str):
+                report.errors.append(f"{table}: '{path_name}' SwitchDriverCommand {command!r} is not a string")
+                continue
+            programs = {}
+            for max_lines, boards in boards_by_lines.items():
+                # Every model driven with this line count is named in error messages
+                models = "/".join(dict.fromkeys(model for _, model in boards))
+                compiled = compile_switch_command(command, max_lines, models)
+                errors = [f"{error} (at position {error.position})" for error in compiled.errors]
+                for message in errors:
+                    report.errors.append(f"{table}: '{path_name}' on {max_lines}-line boards "
+                                         f"({', '.join(name for name, _ in boards)}): {message}")
+                programs[str(max_lines)] = [
+                    1 if compiled.reset else 0,
+                    bytes(compiled.set_masks).hex(),
+                    bytes(compiled.clear_masks).hex(),
+                    [list(bit) for bit in compiled.bits],
+                    errors,
+                ]
+            paths[str(path_name)] = {"command": command, "lines": programs}
+            report.path_count += 1
+        tables[table] = paths
+
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "source": compiled_config.source,
+        "line_counts": report.line_counts,
+        "dio_list": list(compiled_config.get_records('DIO_List') or []),
+        "relay_timing": relay_timing,
+        "tables": tables,
+    }
+    return artifact, report
+
+
+def default_artifact_path(config_path):
+    """Artifact next to the config file: same name, .thc extension."""
+    return os.path.splitext(config_path)[0] + ARTIFACT_EXTENSION
+
+
+def write_artifact(artifact, output_path):
+    """Write an artifact atomically (compact JSON)."""
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, separators=(',', ':'))
+    os.replace(temp_path, output_path)
+
+
+def is_artifact_path(path):
+    return os.path.splitext(path)[1].lower() == ARTIFACT_EXTENSION
+
+
+# ***********************************
+# Run-time side
+# ***********************************
+class CompiledArtifact:
+    """
+    A loaded .thc artifact. Offers the ConfigLoader calls Testhead_Control
+    needs (DIO list, relay timing, PathName lookup) plus ready CompiledCommands.
+
+    Args:
+        data (dict): Parsed artifact.
+        path (str): File it was read from, used in messages.
+
+    Raises:
+        ValueError: If data is not a compiled config of a supported version.
+    """
+
+    def __init__(self, data, path):
+        if data.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a compiled testhead config.")
+        if data.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"{path} was compiled with format version {data.get('version')}, "
+                             f"expected {ARTIFACT_VERSION}. Recompile it.")
+        self.config_file_path = path
+        self.source = data["source"]
+        self.line_counts = data["line_counts"]
+        self.tables = data["tables"]
+        self._dio_list = data["dio_list"]
+        self._relay_timing = data["relay_timing"]
+        self._commands = {}     # (sheet, path_name, max_lines) -> CompiledCommand
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        """True if the source config still exists and was modified after compiling."""
+        try:
+            current = fingerprint(self.source["path"], with_hash=False)
+        except OSError:
+            return False  # Deployed without its source
+        return current["mtime_ns"] != self.source["mtime_ns"] or current["size"] != self.source["size"]
+
+    def get_sheet_names(self):
+        return list(self.tables)
+
+    def get_dio_devices(self):
+        return [
+            (device.get('NAME'), device.get('MODEL'), device.get('HEXADDRESS'))
+            for device in self._dio_list
+        ]
+
+    def get_device_info(self, dio_name):
+        for device in self._dio_list:
+            if device.get('NAME') == dio_name:
+                return device.get('MODEL'), device.get('HEXADDRESS')
+        raise ValueError(f"DIO name '{dio_name}' not found in the DIO list.")
+
+    def load_relay_timing(self):
+        return list(self._relay_timing)
+
+    def _table(self, sheet_name):
+        table = self.tables.get(sheet_name)
+        if table is None:
+            raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+        return table
+
+    def load_command_records(self, sheet_name="Model_Common"):
+        return [
+            {"PathName": path_name, "SwitchDriverCommand": entry["command"]}
+            for path_name, entry in self._table(sheet_name).items()
+        ]
+
+    def get_command_count(self, sheet_name="Model_Common"):
+        return len(self._table(sheet_name))
+
+    def get_switch_command(self, pathname, sheet_name="Model_Common"):
+        entry = self._table(sheet_name).get(pathname)
+        if entry is None:
+            raise ValueError(f"DIO pathname '{pathname}' not found in the command list.")
+        return entry["command"]
+
+    def get_compiled_command(self, pathname, sheet_name, max_lines):
+        """
+        Precompiled form of a path for a board line count.
+
+        Returns:
+            CompiledCommand: Ready to apply. None if the path has no command.
+
+        Raises:
+            ValueError: If the path is unknown, was not compiled for this line
+                        count, or had rejected tokens when it was compiled.
+        """
+        key = (sheet_name, pathname, max_lines)
+        with self._lock:
+            compiled = self._commands.get(key)
+        if compiled is not None:
+            return compiled
+
+        command = self.get_switch_command(pathname, sheet_name)
+        if not command:
+            return None
+        program = self.tables[sheet_name][pathname]["lines"].get(str(max_lines))
+        if program is None:
+            raise ValueError(f"'{pathname}' was not compiled for {max_lines}-line boards. "
+                             f"Recompile {self.source['path']}.")
+        reset, set_hex, clear_hex, bits, errors = program
+        if errors:
+            raise ValueError(f"'{pathname}' failed validation for {max_lines}-line boards: {'; '.join(errors)}")
+        compiled = CompiledCommand(max_lines // 8, bool(reset), list(bytes.fromhex(set_hex)),
+                                   list(bytes.fromhex(clear_hex)), [tuple(bit) for bit in bits],
+                                   (), command.split(';'))
+        with self._lock:
+            self._commands[key] = compiled
+        return compiled
+
+
+_artifacts = {}     # absolute path -> (mtime_ns, size, CompiledArtifact)
+_artifacts_lock = threading.Lock()
+
+
+def load_artifact(path):
+    """
+    Load a .thc artifact, reusing the loaded copy while the file is unchanged.
+
+    Logs a warning if the config it was compiled from has changed since.
+
+    Raises:
+        FileNotFoundError: If the artifact does not exist.
+        ValueError: If the file is not a compiled config of a supported version.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Compiled config not found at {path}")
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    with _artifacts_lock:
+        cached = _artifacts.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError:
+            raise ValueError(f"{path} is not a compiled testhead config.")
+    artifact = CompiledArtifact(data, path)
+    if artifact.is_stale():
+        logger.warning("%s changed after %s was compiled. Recompile it.", artifact.source['path'], path)
+    with _artifacts_lock:
+        _artifacts[key] = (st.st_mtime_ns, st.st_size, artifact)
+    return artifact
+
+
+def main(arguments):
+    """
+    Command-line entry point: compile <config_file> [output_file] [--allow-errors].
+
+    Returns:
+        int: 0 if the artifact was written, 1 otherwise.
+    """
+    allow_errors = "--allow-errors" in arguments
+    arguments = [argument for argument in arguments if argument != "--allow-errors"]
+    if not 1 <= len(arguments) <= 2:
+        print("Usage: python testhead_control.py --compile <config_file> [output_file] [--allow-errors]")
+        print("")
+        print("Example:")
+        print("  testhead_control.py --compile \"Langley_Testhead Switch Path Configuration.xlsx\"")
+        print("")
+        print(f"Writes <config_file>{ARTIFACT_EXTENSION} unless output_file is given. Pass the artifact")
+        print("instead of the config file to run commands without parsing them at run time.")
+        return 1
+
+    config_path = arguments[0]
+    output_path = arguments[1] if len(arguments) == 2 else default_artifact_path(config_path)
+    print(f"Compiling {config_path}")
+    try:
+        artifact, report = compile_config_file(config_path)
+    except (FileNotFoundError, ValueError, ImportError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    for message in report.warnings:
+        print(f"Warning: {message}")
+    for message in report.errors:
+        print(f"Error: {message}")
+    print(f"{report.path_count} path(s) in {len(artifact['tables'])} table(s) compiled for "
+          f"{', '.join(str(lines) for lines in report.line_counts)}-line boards: "
+          f"{len(report.errors)} error(s), {len(report.warnings)} warning(s)")
+
+    if report.errors and not allow_errors:
+        print("Artifact not written. Fix the errors or pass --allow-errors "
+              "(paths with errors are then refused at run time).")
+        return 1
+    write_artifact(artifact, output_path)
+    print(f"Compiled config written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -4,32 +4,65 @@ Supports multiple configuration file formats: Excel (.xlsx) and JSON (.json)
 """
 import os
 import json
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
+import threading
+from importlib.util import find_spec
+
+from config_cache import fingerprint, get_config_cache
+from testhead_logging import get_logger
+
+logger = get_logger("config")
+
+# pandas is only imported when a DataFrame is actually requested, so JSON and
+# compiled-config lookups start with the standard library alone
+PANDAS_AVAILABLE = find_spec("pandas") is not None
+
+# Default stat-polling interval of ConfigLoader.start_watching
+WATCH_INTERVAL_S = 1.0
 
 
 class ConfigLoader:
-    """Load and validate testhead configuration from Excel or JSON files"""
+    """
+    Load and validate testhead configuration from Excel or JSON files
+
+    The file is parsed once into a compiled form that is cached on disk and in
+    the process (see config_cache), so repeated loaders for the same unchanged
+    file do not re-read the workbook.
+
+    Lookups used when running commands (DIO_List, relay timing, PathName,
+    row counts) are answered from a memory-mapped index shared by every
+    process on the station (see mapped_index), until something asks for the
+    full compiled config. With the disk cache off they use the compiled config.
+
+    Long-running users (the GUI, a resident process) can pick up edits with
+    check_for_changes() or start_watching(). Only the sheets / models whose
+    content changed are re-parsed and re-indexed, and the new content replaces
+    the old in one assignment, so a reader sees either the old or the new
+    config, never a mix.
+    """
     
-    def __init__(self, config_file_path):
+    def __init__(self, config_file_path, config_cache=None):
         """
         Initialize config loader with a configuration file.
         
         Args:
             config_file_path (str): Path to Excel (.xlsx) or JSON (.json) config file
+            config_cache (ConfigCache): Compiled config cache. Process-wide cache if None.
         """
         self.config_file_path = config_file_path
         self.file_format = self._detect_format()
+        self.config_cache = config_cache
+        self._compiled = None
+        self._mapped = None             # MappedIndex, while the compiled config is not loaded
+        self._reload_lock = threading.Lock()
+        self._failed_stat = None        # Fingerprint of a file version that could not be parsed
+        self._watch_thread = None
+        self._watch_stop = None
         
         # Load configuration based on format
         if self.file_format == 'excel':
             self.dio_list_df = None
             self.dio_cmdlist_df = None
-        elif self.file_format == 'json':
-            self.config_data = None
+            self._sheet_frames = {}     # sheet name -> (compiled table, DataFrame built from it)
     
     def _detect_format(self):
         """Detect configuration file format from extension"""
@@ -42,6 +75,157 @@ class ConfigLoader:
             return 'json'
         else:
             raise ValueError(f"Unsupported config file format: {ext}. Supported: .xlsx, .xls, .json")
+
+    def get_compiled(self):
+        """
+        Compiled content of the config file, loaded once per loader.
+
+        Returns:
+            CompiledConfig: DIO_List, sheet/model names and every table row.
+
+        Raises:
+            FileNotFoundError: If the config file does not exist.
+        """
+        if self._compiled is None:
+            if not os.path.exists(self.config_file_path):
+                kind = "Excel" if self.file_format == 'excel' else "JSON"
+                raise FileNotFoundError(f"{kind} file not found at {self.config_file_path}")
+            cache = self.config_cache or get_config_cache()
+            self._compiled = cache.load(self.config_file_path, self.file_format)
+        return self._compiled
+
+    def _lookup_source(self):
+        """
+        The compiled config if it is loaded, otherwise the shared memory-mapped
+        index (None if the cache is memory-only or the index is unusable).
+        """
+        if self._compiled is not None:
+            return self._compiled
+        if self._mapped is None:
+            if not os.path.exists(self.config_file_path):
+                return self.get_compiled()  # Raises FileNotFoundError
+            cache = self.config_cache or get_config_cache()
+            try:
+                self._mapped = cache.load_mapped_index(self.config_file_path, self.file_format)
+            except OSError:
+                self._mapped = None
+            if self._mapped is None:
+                return self.get_compiled()
+        return self._mapped
+
+    def get_sheet_names(self):
+        """
+        Sheet names (Excel) or top-level keys (JSON), in file order.
+        """
+        return list(self._lookup_source().sheet_names)
+
+    def get_model_names(self):
+        """
+        Distinct Model_ values of a JSON "Model Sheets" list, in file order.
+        Empty for Excel and for JSON with one key per model.
+        """
+        return list(self._lookup_source().model_names)
+
+    def check_for_changes(self):
+        """
+        Polls the config file once and swaps in its new content if it changed.
+        
+        Costs one stat when the file is unchanged. On a change, sheets / models
+        with unchanged content keep their parsed rows and PathName index; only
+        the edited ones are parsed and indexed again, before the swap. A file
+        that cannot be parsed (e.g. caught mid-save) is reported once and the
+        loaded config is kept.
+        
+        With the memory-mapped index, the new index file is written in full and
+        the loader releases the old one, which is unmapped once no other loader
+        of the process holds it. Call this from the thread doing the lookups.
+        
+        Returns:
+            list: Sheet / key / model names whose content changed. Empty if none.
+        """
+        with self._reload_lock:
+            previous = self._compiled if self._compiled is not None else self._mapped
+            if previous is None:
+                return []   # Nothing loaded yet: the next lookup reads the current file
+            try:
+                current = fingerprint(self.config_file_path, with_hash=False)
+            except OSError:
+                return []   # Being replaced or removed: keep the loaded config
+            if current["mtime_ns"] == previous.source["mtime_ns"] and current["size"] == previous.source["size"]:
+                return []
+            if current == self._failed_stat:
+                return []
+            
+            cache = self.config_cache or get_config_cache()
+            try:
+                if self._compiled is not None:
+                    loaded = cache.load(self.config_file_path, self.file_format)
+                else:
+                    loaded = cache.load_mapped_index(self.config_file_path, self.file_format)
+            except Exception as e:
+                self._failed_stat = current
+                logger.warning("Could not reload %s: %s. Keeping the loaded config.", self.config_file_path, e)
+                return []
+            self._failed_stat = None
+            if loaded is previous:
+                if previous is self._mapped:
+                    cache.release_mapped_index(loaded)  # Held once already
+                return []   # Saved without content changes
+            
+            if self._compiled is not None:
+                # Build the new index (reusing unchanged tables) before readers can see it
+                if previous.has_path_index():
+                    loaded.get_path_index(previous.get_path_index())
+                changed = loaded.changed_tables(previous)
+                replaced = self._mapped
+                self._compiled = loaded
+                self._mapped = None
+            else:
+                changed = loaded.changed_tables(previous)
+                replaced = previous
+                self._mapped = loaded
+            if replaced is not None:
+                cache.release_mapped_index(replaced)
+        if changed:
+            logger.info("Config reloaded: %s (changed: %s)", self.config_file_path, ', '.join(str(name) for name in changed))
+        return changed
+
+    def start_watching(self, interval=WATCH_INTERVAL_S, on_change=None):
+        """
+        Polls the config file from a background thread (see check_for_changes).
+        
+        Args:
+            interval (float): Seconds between polls.
+            on_change (callable): Called as on_change(changed_names) from the
+                                  watcher thread after a reload. GUI code must
+                                  hand the call over to its own thread.
+        """
+        if self._watch_thread is not None:
+            return
+        self.get_compiled()
+        stop = threading.Event()
+        
+        def watch():
+            while not stop.wait(interval):
+                changed = self.check_for_changes()
+                if changed and on_change is not None:
+                    try:
+                        on_change(changed)
+                    except Exception as e:
+                        logger.warning("Config change handler failed: %s", e)
+        
+        self._watch_stop = stop
+        self._watch_thread = threading.Thread(target=watch, name="config-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        """Stops the background poller started by start_watching()."""
+        if self._watch_thread is None:
+            return
+        self._watch_stop.set()
+        self._watch_thread.join()
+        self._watch_thread = None
+        self._watch_stop = None
     
     def load_dio_list(self, sheet_name="DIO_List", header_row=0):
         """
@@ -57,10 +241,7 @@ class ConfigLoader:
             self.dio_list_df = self._read_excel_sheet(sheet_name, header_row)
             return self.dio_list_df
         elif self.file_format == 'json':
-            with open(self.config_file_path, 'r') as f:
-                data = json.load(f)
-            self.config_data = data
-            return data.get('DIO_List', [])
+            return self.get_compiled().get_records('DIO_List') or []
     
     def load_command_list(self, sheet_name="Model_Common", header_row=0):
         """
@@ -76,40 +257,89 @@ class ConfigLoader:
             self.dio_cmdlist_df = self._read_excel_sheet(sheet_name, header_row)
             return self.dio_cmdlist_df
         elif self.file_format == 'json':
-            if self.config_data is None:
-                with open(self.config_file_path, 'r') as f:
-                    self.config_data = json.load(f)
+            compiled = self.get_compiled()
             
             # Check if JSON has Model Sheets structure (all models in one list)
-            if 'Model Sheets' in self.config_data and isinstance(self.config_data['Model Sheets'], list):
-                # Filter items by Model_ field
-                filtered_items = [
-                    item for item in self.config_data['Model Sheets']
-                    if item.get('Model_') == sheet_name
-                ]
-                return filtered_items
+            if compiled.has_model_sheets:
+                # Items are grouped by Model_ field when the config is compiled
+                return list(compiled.models.get(sheet_name, []))
             else:
                 # Original JSON format with separate keys for each model
-                return self.config_data.get(sheet_name, [])
+                return compiled.get_records(sheet_name) or []
     
     def _read_excel_sheet(self, sheet_name, header_row=0):
         """Read Excel sheet to DataFrame"""
         if not PANDAS_AVAILABLE:
             raise ImportError("pandas is required for Excel support. Install with: pip install pandas openpyxl")
+        import pandas as pd
         
         if not os.path.exists(self.config_file_path):
             raise FileNotFoundError(f"Excel file not found at {self.config_file_path}")
         
-        # Check if sheet exists
-        xl = pd.ExcelFile(self.config_file_path)
-        if sheet_name not in xl.sheet_names:
-            raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+        if header_row != 0:
+            # Compiled configs use the first row as header: parse this one directly, opening the workbook once
+            with pd.ExcelFile(self.config_file_path) as xl:
+                if sheet_name not in xl.sheet_names:
+                    raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+                return xl.parse(sheet_name, dtype=str, header=header_row, keep_default_na=False)
         
-        # Read Excel file to DataFrame (all data as string)
-        df = pd.read_excel(self.config_file_path, sheet_name=sheet_name, 
-                          dtype=str, header=header_row, keep_default_na=False)
+        compiled = self.get_compiled()
+        if sheet_name not in compiled.tables:
+            raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+        table = compiled.tables[sheet_name]
+        cached = self._sheet_frames.get(sheet_name)
+        if cached is not None and cached[0] is table:
+            return cached[1]    # Sheet unchanged since the DataFrame was built
+        # DataFrame with the same columns and string values as read_excel(dtype=str)
+        df = pd.DataFrame(table["records"], columns=table["columns"], dtype=str)
+        self._sheet_frames[sheet_name] = (table, df)
         return df
     
+    def _dio_records(self, sheet_name="DIO_List"):
+        """DIO_List rows from the mapped index or compiled config (no pandas needed)"""
+        source = self._lookup_source() if sheet_name == "DIO_List" else self.get_compiled()
+        records = source.dio_list if source is self._mapped else source.get_records(sheet_name)
+        if records is None:
+            if self.file_format == 'excel':
+                raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+            return []
+        return records
+
+    def load_command_records(self, sheet_name="Model_Common"):
+        """
+        Load command list rows as dicts, for Excel and JSON alike.
+        
+        Unlike load_command_list this never builds a DataFrame, so it works
+        without pandas once the config is compiled.
+        
+        Returns:
+            list: Row dicts of the sheet / model
+        """
+        if self.file_format == 'excel':
+            records = self.get_compiled().get_records(sheet_name)
+            if records is None:
+                raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+            return list(records)
+        elif self.file_format == 'json':
+            return self.load_command_list(sheet_name)
+
+    def get_command_count(self, sheet_name="Model_Common"):
+        """
+        Number of rows load_command_records would return, without loading them.
+        
+        Raises:
+            ValueError: If an Excel workbook has no such sheet.
+        """
+        source = self._lookup_source()
+        if source is self._mapped:
+            count = source.row_count(sheet_name)
+            if count is None and self.file_format == 'excel':
+                raise ValueError(f"Sheet '{sheet_name}' not found in {self.config_file_path}")
+            if self.file_format == 'json' and source.has_model_sheets and sheet_name not in source.model_names:
+                count = 0   # Model Sheets layout: only Model_ groups are command lists
+            return count or 0
+        return len(self.load_command_records(sheet_name))
+    
     def get_device_info(self, dio_name):
         """
         Get MODEL and HEXADDRESS for a given DIO name.
@@ -120,28 +350,69 @@ class ConfigLoader:
         Returns:
             tuple: (model, hexaddress)
         """
-        if self.file_format == 'excel':
-            if self.dio_list_df is None:
-                self.load_dio_list()
-            
-            if dio_name not in self.dio_list_df['NAME'].values:
-                raise ValueError(f"DIO name '{dio_name}' not found in the DIO list.")
-            
-            model = self.dio_list_df.loc[self.dio_list_df['NAME'] == dio_name, 'MODEL'].values[0]
-            address = self.dio_list_df.loc[self.dio_list_df['NAME'] == dio_name, 'HEXADDRESS'].values[0]
-            return model, address
-            
-        elif self.file_format == 'json':
-            if self.config_data is None:
-                self.load_dio_list()
-            
-            dio_list = self.config_data.get('DIO_List', [])
-            for device in dio_list:
-                if device.get('NAME') == dio_name:
-                    return device.get('MODEL'), device.get('HEXADDRESS')
-            
-            raise ValueError(f"DIO name '{dio_name}' not found in the DIO list.")
+        for device in self._dio_records():
+            if device.get('NAME') == dio_name:
+                return device.get('MODEL'), device.get('HEXADDRESS')
+        
+        raise ValueError(f"DIO name '{dio_name}' not found in the DIO list.")
     
+    def get_dio_devices(self):
+        """
+        Get every device in the DIO list.
+        
+        Returns:
+            list: (name, model, hexaddress) tuples in DIO_List order
+        """
+        return [
+            (device.get('NAME'), device.get('MODEL'), device.get('HEXADDRESS'))
+            for device in self._dio_records()
+        ]
+
+    def load_relay_timing(self, sheet_name="Relay_Timing"):
+        """
+        Load the optional relay timing table (settle and break-before-make times).
+
+        For Excel: Read from specified sheet, if present
+        For JSON: Read from specified key, if present
+
+        Returns:
+            list: Row dicts with NAME, GroupPortBit, SETTLE_MS and BREAK_MS.
+                  Empty if the configuration has no relay timing.
+        """
+        if sheet_name == "Relay_Timing":
+            source = self._lookup_source()
+            if source is self._mapped:
+                return list(source.relay_timing)
+        return list(self.get_compiled().get_records(sheet_name) or [])
+
+    def get_path_index(self):
+        """
+        Nested sheet/model -> PathName -> entry index, built once per loaded config.
+
+        Duplicate PathNames within a sheet or model are reported when the index
+        is built; lookups keep returning the first one.
+
+        Returns:
+            PathIndex: See config_cache.PathIndex.
+        """
+        return self.get_compiled().get_path_index()
+
+    def get_path_entry(self, pathname, sheet_name="Model_Common"):
+        """
+        Get the full row for a given pathname: command plus metadata such as ITEM and TEST_DESC.
+        
+        Args:
+            pathname (str): Path name to lookup
+            sheet_name (str): Sheet/key name for command list
+            
+        Returns:
+            PathEntry: path_name, command, item, test_desc, position and the whole row
+        """
+        source = self._lookup_source()
+        if source is self._mapped:
+            return source.lookup(pathname, sheet_name)
+        return source.get_path_index().lookup(pathname, sheet_name)
+
     def get_switch_command(self, pathname, sheet_name="Model_Common"):
         """
         Get SwitchDriverCommand for a given pathname.
@@ -153,44 +424,8 @@ class ConfigLoader:
         Returns:
             str: Switch driver command string
         """
-        if self.file_format == 'excel':
-            # Always reload to ensure we have the correct sheet
-            self.dio_cmdlist_df = self._read_excel_sheet(sheet_name, header_row=0)
-            
-            # Find PathName column (case-insensitive)
-            pathname_col = None
-            switchcmd_col = None
-            for col in self.dio_cmdlist_df.columns:
-                if col.upper() == 'PATHNAME':
-                    pathname_col = col
-                elif col.upper() == 'SWITCHDRIVERCOMMAND':
-                    switchcmd_col = col
-            
-            if pathname_col is None:
-                raise ValueError(f"'PathName' column not found in sheet '{sheet_name}'. Available columns: {list(self.dio_cmdlist_df.columns)}")
-            
-            if switchcmd_col is None:
-                raise ValueError(f"'SwitchDriverCommand' column not found in sheet '{sheet_name}'. Available columns: {list(self.dio_cmdlist_df.columns)}")
-            
-            if pathname not in self.dio_cmdlist_df[pathname_col].values:
-                raise ValueError(f"DIO pathname '{pathname}' not found in sheet '{sheet_name}'.")
-            
-            command = self.dio_cmdlist_df.loc[
-                self.dio_cmdlist_df[pathname_col] == pathname, 
-                switchcmd_col
-            ].values[0]
-            return command
-            
-        elif self.file_format == 'json':
-            # Load the command list for the sheet if not already loaded
-            cmd_list = self.load_command_list(sheet_name)
-            
-            # Search through the command list
-            for cmd in cmd_list:
-                if cmd.get('PathName') == pathname:
-                    return cmd.get('SwitchDriverCommand')
-            
-            raise ValueError(f"DIO pathname '{pathname}' not found in the command list.")
+        # Constant-time lookup in the PathName index instead of a scan of the sheet
+        return self.get_path_entry(pathname, sheet_name).command
 
 
 def create_json_config_template(output_path="config/testhead_config_template.json"):
@@ -228,6 +463,20 @@ def create_json_config_template(output_path="config/testhead_config_template.jso
                 "PathName": "Custom Path 1",
                 "SwitchDriverCommand": "0A1,1;0A2,1"
             }
+        ],
+        "Relay_Timing": [
+            {
+                "NAME": "",
+                "GroupPortBit": "*",
+                "SETTLE_MS": "5",
+                "BREAK_MS": ""
+            },
+            {
+                "NAME": "TestHead",
+                "GroupPortBit": "0B",
+                "SETTLE_MS": "10",
+                "BREAK_MS": "2"
+            }
         ]
     }
     
@@ -0,0 +1,232 @@
+"""
+Config Preloader
+Compiles every platform config of a directory in a background worker pool, so
+that opening one later (GUI platform switch, Testhead_Control.run) is a cache
+hit instead of a workbook parse on the caller's thread.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config_cache import get_config_cache
+from testhead_logging import get_logger
+
+logger = get_logger("config")
+
+# Files picked up by find_config_files (same set the GUIs list)
+CONFIG_EXTENSIONS = ('.json', '.xlsx', '.xls')
+
+# Default size of the worker pool
+PRELOAD_WORKERS = 4
+
+# Preload states of a file
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+def find_config_files(config_dir, extensions=CONFIG_EXTENSIONS):
+    """
+    Config files directly inside a directory, sorted by name.
+
+    Args:
+        config_dir (str): Directory to list.
+        extensions (tuple): File extensions to include.
+
+    Returns:
+        list: Full paths.
+
+    Raises:
+        FileNotFoundError: If the directory does not exist.
+    """
+    return [
+        os.path.join(config_dir, name)
+        for name in sorted(os.listdir(config_dir))
+        if name.lower().endswith(extensions)
+    ]
+
+
+class PreloadStatus:
+    """
+    Preload state of one config file.
+
+    Attributes:
+        path (str): Config file path.
+        state (str): PENDING, LOADING, READY or FAILED.
+        elapsed (float): Seconds spent loading (None until finished).
+        error (str): Why the file could not be loaded (FAILED only).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = PENDING
+        self.elapsed = None
+        self.error = None
+
+
+class ConfigPreloader:
+    """
+    Loads a list of config files into a ConfigCache on worker threads.
+
+    Each file is compiled (or taken from the disk cache) and, when the cache
+    has a directory, its memory-mapped index is built too. A caller opening a
+    file that is still being preloaded waits for that load instead of
+    starting a second one (ConfigCache serializes loads per file). A file
+    that fails is reported in its status; the others are not affected.
+
+    The shipped configs compile in well under a second together, so threads
+    are used: the work stays off the UI thread and the results land directly
+    in the in-process cache.
+
+    Args:
+        config_paths (list): Config files (.xlsx, .xls, .json or .thc).
+        config_cache (ConfigCache): Cache to fill. Process-wide cache if None.
+        max_workers (int): Size of the worker pool.
+        on_progress (callable): Called as on_progress(status) from a worker
+                                thread each time a file finishes.
+
+    Example:
+        preloader = ConfigPreloader(find_config_files("config")).start()
+        ...
+        print(preloader.summary())
+    """
+
+    def __init__(self, config_paths, config_cache=None, max_workers=PRELOAD_WORKERS, on_progress=None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.config_cache = config_cache
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self._statuses = {os.path.abspath(path): PreloadStatus(path) for path in config_paths}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._remaining = len(self._statuses)
+        self._executor = None
+        self._started_at = None
+        self.elapsed = None     # Seconds from start() until the last file finished
+        if not self._remaining:
+            self._done.set()
+
+    def start(self):
+        """Submits every file to the worker pool and returns immediately (self, for chaining)."""
+        if self._executor is not None:
+            return self
+        self._started_at = time.perf_counter()
+        if not self._statuses:
+            self.elapsed = 0.0
+            return self
+        self._executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(self._statuses)),
+                                            thread_name_prefix="config-preload")
+        for status in self._statuses.values():
+            self._executor.submit(self._preload, status)
+        self._executor.shutdown(wait=False)   # Threads exit once the queue is drained
+        return self
+
+    def _preload(self, status):
+        with self._lock:
+            status.state = LOADING
+        started = time.perf_counter()
+        try:
+            self._load(status.path)
+            state, error = READY, None
+        except Exception as e:
+            state, error = FAILED, str(e)
+        with self._lock:
+            status.state = state
+            status.error = error
+            status.elapsed = time.perf_counter() - started
+            self._remaining -= 1
+            finished = not self._remaining
+            if finished:
+                self.elapsed = time.perf_counter() - self._started_at
+        if self.on_progress is not None:
+            try:
+                self.on_progress(status)
+            except Exception as e:
+                logger.warning("Preload progress callback failed: %s", e)
+        if finished:
+            self._done.set()
+
+    def _load(self, path):
+        from config_compiler import is_artifact_path, load_artifact
+        from config_loader import ConfigLoader
+
+        if is_artifact_path(path):
+            load_artifact(path)
+            return
+        cache = self.config_cache or get_config_cache()
+        loader = ConfigLoader(path, config_cache=cache)
+        loader.get_compiled()
+        try:
+            index = cache.load_mapped_index(path, loader.file_format)
+        except OSError:
+            return  # Unwritable cache directory: lookups use the compiled config instead
+        if index is not None:
+            cache.release_mapped_index(index)   # Stays mapped in the cache for the loaders to come
+
+    # ***********************************
+    # Status
+    # ***********************************
+    def status(self, path):
+        """
+        PreloadStatus of one file.
+
+        Raises:
+            KeyError: If the file is not part of this preload.
+        """
+        return self._statuses[os.path.abspath(path)]
+
+    def statuses(self):
+        """PreloadStatus of every file, in the order they were given."""
+        return list(self._statuses.values())
+
+    def progress(self):
+        """(finished, total) file counts. Failed files count as finished."""
+        with self._lock:
+            total = len(self._statuses)
+            return total - self._remaining, total
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every file is finished.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        return self._done.wait(timeout)
+
+    def failures(self):
+        """PreloadStatus of the files that could not be loaded."""
+        return [status for status in self.statuses() if status.state == FAILED]
+
+    def summary(self):
+        """One-line preload state for a status bar or log."""
+        finished, total = self.progress()
+        if finished < total:
+            return f"Preloading configs: {finished}/{total}"
+        failed = self.failures()
+        text = f"Preloaded {total - len(failed)}/{total} config(s) in {self.elapsed or 0.0:.2f} s"
+        if failed:
+            text += " - failed: " + ", ".join(os.path.basename(status.path) for status in failed)
+        return text
+
+
+def preload_configs(config_paths, config_cache=None, max_workers=PRELOAD_WORKERS, on_progress=None):
+    """
+    Starts a ConfigPreloader for a directory or a list of config files.
+
+    Args:
+        config_paths (str | list): Config directory, or config file paths.
+
+    Returns:
+        ConfigPreloader: Already started.
+    """
+    if isinstance(config_paths, str):
+        config_paths = find_config_files(config_paths)
+    return ConfigPreloader(config_paths, config_cache=config_cache, max_workers=max_workers,
+                           on_progress=on_progress).start()
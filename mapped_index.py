@@ -0,0 +1,270 @@
+"""
+Memory-Mapped Config Index
+Read-only binary form of a compiled config's PathName index. Every test socket
+process maps the same file, so the index pages are shared by the OS and a
+lookup reads straight from the mapped buffer with no per-process parse
+
+File layout (little-endian):
+    header      magic, version, bucket count, entry count, section offsets
+    meta        JSON: source fingerprint, sheet/model names, DIO_List,
+                relay timing, row counts, content digests, column errors
+    buckets     per slot: key hash and entry number + 1, 0 = empty (linear probing)
+    entries     fixed-size records: key/command/row offsets, position, flags
+    strings     UTF-8 keys ("<table>\\0<PathName>"), commands and row JSON
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from config_cache import MODEL_SHEETS_KEY, PathEntry
+
+INDEX_MAGIC = b"THIDX\x00\r\n"
+INDEX_VERSION = 2
+
+_HEADER = struct.Struct("<8sIIIIQQQQ")      # magic, version, buckets, entries, meta length, 4 offsets
+_BUCKET = struct.Struct("<QII")             # key hash, entry number + 1, padding
+_ENTRY = struct.Struct("<IIIIIIII")         # key off/len, command off/len, row off/len, position, flags
+
+_FLAG_COMMAND_JSON = 1      # Command is not a string (JSON config) and is stored JSON-encoded
+
+
+def _key_bytes(table_name, path_name):
+    return f"{table_name}\x00{path_name}".encode('utf-8')
+
+
+def _key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def write_mapped_index(compiled, index_path):
+    """
+    Write the index of a CompiledConfig to a file (atomically).
+
+    Args:
+        compiled (CompiledConfig): Config to index. Its PathIndex is built if needed.
+        index_path (str): Destination file.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path_index = compiled.get_path_index()
+    if compiled.has_model_sheets:
+        row_counts = {name: len(rows) for name, rows in compiled.models.items()}
+        digests = {name: _digest(rows) for name, rows in compiled.models.items()}
+    else:
+        row_counts = {}
+        digests = {}
+    for name, table in compiled.tables.items():
+        row_counts.setdefault(name, len(table["records"]))
+        digests.setdefault(name, _digest(table["records"]))
+    dio_list = compiled.get_records('DIO_List')
+    meta = {
+        "source": compiled.source,
+        "file_format": compiled.file_format,
+        "sheet_names": compiled.sheet_names,
+        "model_names": compiled.model_names,
+        "has_model_sheets": compiled.has_model_sheets,
+        "indexed_tables": list(path_index.tables),
+        "column_errors": path_index.column_errors,
+        "row_counts": row_counts,
+        "digests": digests,
+        "dio_list": dio_list,
+        "relay_timing": list(compiled.get_records('Relay_Timing') or []),
+    }
+    meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+
+    strings = bytearray()
+    hashes = []
+    entries = []
+    for table_name, table in path_index.tables.items():
+        for path_name, entry in table.items():
+            key = _key_bytes(table_name, path_name)
+            flags = 0
+            if isinstance(entry.command, str):
+                command = entry.command.encode('utf-8')
+            else:
+                command = json.dumps(entry.command).encode('utf-8')
+                flags |= _FLAG_COMMAND_JSON
+            row = json.dumps(entry.row, separators=(',', ':'), default=str).encode('utf-8')
+            offsets = []
+            for blob in (key, command, row):
+                offsets.extend((len(strings), len(blob)))
+                strings += blob
+            hashes.append(_key_hash(key))
+            entries.append((*offsets, entry.position, flags))
+
+    bucket_count = 8
+    while bucket_count < len(entries) * 2:
+        bucket_count *= 2
+    buckets = [(0, 0, 0)] * bucket_count
+    for number, key_hash in enumerate(hashes):
+        slot = key_hash & (bucket_count - 1)
+        while buckets[slot][1]:
+            slot = (slot + 1) & (bucket_count - 1)
+        buckets[slot] = (key_hash, number + 1, 0)
+
+    meta_offset = _HEADER.size
+    buckets_offset = meta_offset + len(meta_bytes)
+    entries_offset = buckets_offset + bucket_count * _BUCKET.size
+    strings_offset = entries_offset + len(entries) * _ENTRY.size
+
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, bucket_count, len(entries), len(meta_bytes),
+                                 meta_offset, buckets_offset, entries_offset, strings_offset))
+            f.write(meta_bytes)
+            for bucket in buckets:
+                f.write(_BUCKET.pack(*bucket))
+            for entry in entries:
+                f.write(_ENTRY.pack(*entry))
+            f.write(strings)
+        os.replace(temp_path, index_path)  # Mappers never see a half-written file
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class MappedIndex:
+    """
+    A memory-mapped index file opened read-only.
+
+    Offers the lookups the command-line path needs (PathName, DIO_List, relay
+    timing, sheet names and row counts) without loading the compiled config.
+    Only the small meta block is parsed when the file is opened.
+
+    Attributes:
+        source (dict): Fingerprint of the config file the index was built from.
+        file_format (str): 'excel' or 'json'.
+        sheet_names (list): Sheet names / JSON keys in file order.
+        model_names (list): Model_ values of a JSON "Model Sheets" list.
+        dio_list (list): DIO_List rows, or None if the config has none.
+        relay_timing (list): Relay_Timing rows (empty if none).
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, self._bucket_count, self._entry_count, meta_length,
+             meta_offset, self._buckets_offset, self._entries_offset, self._strings_offset) = _HEADER.unpack_from(self._buffer, 0)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError(f"{index_path} is not a config index of version {INDEX_VERSION}")
+            meta = json.loads(self._buffer[meta_offset:meta_offset + meta_length].decode('utf-8'))
+        except (struct.error, ValueError):
+            self._buffer.close()
+            raise ValueError(f"{index_path} is not a valid config index")
+        self.source = meta["source"]
+        self.file_format = meta["file_format"]
+        self.sheet_names = meta["sheet_names"]
+        self.model_names = meta["model_names"]
+        self.has_model_sheets = meta["has_model_sheets"]
+        self.dio_list = meta["dio_list"]
+        self.relay_timing = meta["relay_timing"]
+        self.digests = meta["digests"]
+        self._row_counts = meta["row_counts"]
+        self._indexed_tables = set(meta["indexed_tables"])
+        self._column_errors = meta["column_errors"]
+        self._entries = {}      # (table, path_name) -> PathEntry already looked up
+
+    def close(self):
+        self._buffer.close()
+
+    @property
+    def closed(self):
+        """True once the file is unmapped (see ConfigCache.release_mapped_index)"""
+        return self._buffer.closed
+
+    def row_count(self, name):
+        """Rows of a sheet / JSON key / model, or None if it does not exist."""
+        return self._row_counts.get(name)
+
+    def changed_tables(self, previous):
+        """Sheet / key / model names whose content differs from another index of the same file."""
+        changed = []
+        for name in list(self.digests) + [name for name in previous.digests if name not in self.digests]:
+            if name == MODEL_SHEETS_KEY and self.has_model_sheets:
+                continue
+            if self.digests.get(name) != previous.digests.get(name):
+                changed.append(name)
+        return changed
+
+    def _find(self, table_name, path_name):
+        key = _key_bytes(table_name, path_name)
+        key_hash = _key_hash(key)
+        buffer = self._buffer
+        mask = self._bucket_count - 1
+        slot = key_hash & mask
+        while True:
+            slot_hash, number, _ = _BUCKET.unpack_from(buffer, self._buckets_offset + slot * _BUCKET.size)
+            if not number:
+                return None
+            if slot_hash == key_hash:
+                entry = _ENTRY.unpack_from(buffer, self._entries_offset + (number - 1) * _ENTRY.size)
+                start = self._strings_offset + entry[0]
+                if buffer[start:start + entry[1]] == key:
+                    return entry
+            slot = (slot + 1) & mask
+
+    def lookup(self, path_name, table_name):
+        """
+        Returns the PathEntry of a PathName in a sheet / model.
+
+        Entries are materialized on first lookup and kept, so only the paths a
+        process actually uses take heap memory.
+
+        Raises:
+            ValueError: With the same messages as PathIndex.lookup.
+        """
+        path_entry = self._entries.get((table_name, path_name))
+        if path_entry is not None:
+            return path_entry
+        entry = self._find(table_name, path_name) if table_name in self._indexed_tables else None
+        if entry is None:
+            if self.file_format == 'excel':
+                if table_name not in self._indexed_tables:
+                    if table_name in self._column_errors:
+                        raise ValueError(self._column_errors[table_name])
+                    raise ValueError(f"Sheet '{table_name}' not found in {self.source['path']}")
+                raise ValueError(f"DIO pathname '{path_name}' not found in sheet '{table_name}'.")
+            raise ValueError(f"DIO pathname '{path_name}' not found in the command list.")
+
+        _, _, command_offset, command_length, row_offset, row_length, position, flags = entry
+        start = self._strings_offset + command_offset
+        command = self._buffer[start:start + command_length].decode('utf-8')
+        if flags & _FLAG_COMMAND_JSON:
+            command = json.loads(command)
+        start = self._strings_offset + row_offset
+        path_entry = _MappedPathEntry(path_name, command, position, self._buffer, start, row_length)
+        self._entries[(table_name, path_name)] = path_entry
+        return path_entry
+
+
+class _MappedPathEntry(PathEntry):
+    """PathEntry whose row is decoded from the mapped buffer when first read"""
+
+    def __init__(self, path_name, command, position, buffer, row_start, row_length):
+        super().__init__(path_name, command, position, None)
+        self._row_location = (buffer, row_start, row_length)
+
+    @property
+    def row(self):
+        if self._row is None:
+            buffer, start, length = self._row_location
+            self._row = json.loads(buffer[start:start + length].decode('utf-8'))
+        return self._row
+
+    @row.setter
+    def row(self, value):
+        self._row = value
@@ -0,0 +1,309 @@
+"""
+Plan Runner
+Runs an ordered route sequence (a plan file) in one session per board.
+Every step is looked up and compiled before any hardware is touched, so a
+typo in step 97 fails before step 1 switches a relay. Plans can be checked
+without boards attached (--check), e.g. before the DUT is inserted.
+
+Plan file (JSON):
+    {
+        "config": "Langley_Testhead Switch Path Configuration.json",
+        "dio": "TestHead",
+        "sheet": "Model_TM30",
+        "steps": [
+            "Bal In 1-8, Bal Out 1-7 and Main L",
+            {"path": "Terminated In 1-8, Bal Out 1-7 and Main L", "dwell_ms": 250},
+            {"sheet": "Model_Common", "path": "Reset"},
+            {"command": "0;0B4,1", "dio": "TestHead"}
+        ]
+    }
+
+A step is a PathName (in the plan's sheet unless it names one) or a raw
+switch command. "dio" and "sheet" set the defaults, a step may override them.
+"dwell_ms" waits after the step's relays have settled.
+"""
+import json
+import os
+import time
+
+from accesio.command_compiler import compile_switch_command, model_max_lines
+from config_compiler import CompiledArtifact
+from testhead_control import get_config_path, open_config
+
+
+class PlanStep:
+    """
+    One step of a plan.
+
+    Attributes:
+        number (int): 1-based position in the plan.
+        dio_name (str): Board the step is applied to.
+        sheet_name (str): Lookup sheet of path_name (None for a raw command).
+        path_name (str): PathName to apply (None for a raw command).
+        command (str): Switch driver command (looked up for a PathName).
+        dwell_s (float): Seconds to wait after the step.
+        compiled (CompiledCommand): Set by compile_plan (None for an empty command).
+    """
+
+    def __init__(self, number, dio_name, sheet_name=None, path_name=None, command=None, dwell_s=0.0):
+        self.number = number
+        self.dio_name = dio_name
+        self.sheet_name = sheet_name
+        self.path_name = path_name
+        self.command = command
+        self.dwell_s = dwell_s
+        self.compiled = None
+
+    @property
+    def label(self):
+        if self.path_name is not None:
+            return f"{self.sheet_name}/{self.path_name}"
+        return self.command
+
+
+class Plan:
+    """
+    An ordered list of PlanSteps for one config file.
+
+    Attributes:
+        config_file_name (str): Config the steps are looked up in.
+        steps (list): PlanSteps in execution order.
+        source (str): Plan file path (None if built in code).
+        is_compiled (bool): True once compile_plan has succeeded.
+    """
+
+    def __init__(self, config_file_name, steps, source=None):
+        self.config_file_name = config_file_name
+        self.steps = steps
+        self.source = source
+        self.is_compiled = False
+
+    @property
+    def dio_names(self):
+        """Boards used by the plan, in order of first use."""
+        return list(dict.fromkeys(step.dio_name for step in self.steps))
+
+
+def load_plan(plan_path):
+    """
+    Read a plan file (format in the module docstring).
+
+    Returns:
+        Plan: Not compiled yet.
+
+    Raises:
+        FileNotFoundError: If the plan file does not exist.
+        ValueError: If the file is not a valid plan.
+    """
+    with open(plan_path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Plan {plan_path} is not valid JSON: {e}")
+    if not isinstance(data, dict) or not data.get("config"):
+        raise ValueError(f"Plan {plan_path} must be a JSON object with a \"config\" entry.")
+    if not isinstance(data.get("steps"), list) or not data["steps"]:
+        raise ValueError(f"Plan {plan_path} has no \"steps\".")
+
+    default_dio = data.get("dio")
+    default_sheet = data.get("sheet")
+    steps = []
+    for number, entry in enumerate(data["steps"], 1):
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        if not isinstance(entry, dict) or ("path" in entry) == ("command" in entry):
+            raise ValueError(f"Plan step {number}: expected a PathName string or an object with \"path\" or \"command\".")
+        dio_name = entry.get("dio", default_dio)
+        if not dio_name:
+            raise ValueError(f"Plan step {number}: no \"dio\" given for the step or the plan.")
+        try:
+            dwell_s = float(entry.get("dwell_ms", 0)) / 1000
+        except (TypeError, ValueError):
+            raise ValueError(f"Plan step {number}: dwell_ms must be a number.")
+        if "path" in entry:
+            sheet_name = entry.get("sheet", default_sheet)
+            if not sheet_name:
+                raise ValueError(f"Plan step {number}: no \"sheet\" given for the step or the plan.")
+            steps.append(PlanStep(number, dio_name, sheet_name=sheet_name, path_name=entry["path"], dwell_s=dwell_s))
+        else:
+            steps.append(PlanStep(number, dio_name, command=entry["command"], dwell_s=dwell_s))
+    config_file_name = data["config"]
+    if not os.path.isabs(config_file_name):
+        # Next to the plan if it is there, otherwise searched like every other config name
+        beside_plan = os.path.join(os.path.dirname(os.path.abspath(plan_path)), config_file_name)
+        if os.path.exists(beside_plan):
+            config_file_name = beside_plan
+    return Plan(config_file_name, steps, source=plan_path)
+
+
+def compile_plan(plan):
+    """
+    Look up and compile every step for its board's model, without hardware.
+
+    All problems are collected: unknown DIO names, sheets and PathNames, and
+    tokens the board would reject.
+
+    Returns:
+        Plan: The same plan, with step.command and step.compiled set.
+
+    Raises:
+        FileNotFoundError: If the config file is not found.
+        ValueError: Listing every step that cannot be applied.
+    """
+    config = open_config(get_config_path(plan.config_file_name))
+    max_lines = {}
+    errors = []
+    for dio_name in plan.dio_names:
+        try:
+            model, _ = config.get_device_info(dio_name)
+            max_lines[dio_name] = (model_max_lines(model), model.upper())
+        except ValueError as e:
+            errors.append(str(e))
+
+    for step in plan.steps:
+        if step.dio_name not in max_lines:
+            continue
+        lines, model = max_lines[step.dio_name]
+        try:
+            if step.path_name is not None:
+                step.command = config.get_switch_command(step.path_name, step.sheet_name)
+                if isinstance(config, CompiledArtifact):
+                    step.compiled = config.get_compiled_command(step.path_name, step.sheet_name, lines)
+                    continue
+            step.compiled = compile_switch_command(step.command, lines, model) if step.command else None
+            if step.compiled is not None and step.compiled.errors:
+                raise ValueError("; ".join(str(error) for error in step.compiled.errors))
+        except ValueError as e:
+            errors.append(f"Step {step.number} ({step.label}): {e}")
+
+    if errors:
+        name = f"Plan {plan.source}" if plan.source else "Plan"
+        raise ValueError(f"{name} has {len(errors)} error(s):\n  " + "\n  ".join(errors))
+    plan.is_compiled = True
+    return plan
+
+
+class PlanReport:
+    """
+    Timing of one plan run.
+
+    Attributes:
+        steps (list): Per step: {"step", "dio", "label", "switch_ms", "dwell_ms"}.
+                      switch_ms covers the USB write and relay settling.
+        setup_ms (float): Opening the sessions (board attach) before step 1.
+        total_ms (float): Wall time from the start of setup to the end of the last step.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.steps = []
+        self.setup_ms = 0.0
+        self.total_ms = 0.0
+
+    def print_report(self):
+        """Print the per-step table and the totals."""
+        print(f"{'Step':>4}  {'Switch ms':>9}  {'Dwell ms':>8}  DIO / Step")
+        for entry in self.steps:
+            print(f"{entry['step']:>4}  {entry['switch_ms']:>9.2f}  {entry['dwell_ms']:>8.1f}  {entry['dio']}: {entry['label']}")
+        switch_ms = [entry['switch_ms'] for entry in self.steps]
+        if switch_ms:
+            print(f"{len(switch_ms)} step(s): switch total {sum(switch_ms):.1f} ms, "
+                  f"mean {sum(switch_ms) / len(switch_ms):.2f} ms, max {max(switch_ms):.2f} ms")
+        print(f"Setup {self.setup_ms:.1f} ms, wall time {self.total_ms:.1f} ms")
+
+    def to_dict(self):
+        return {"plan": self.plan.source, "config": self.plan.config_file_name,
+                "setup_ms": self.setup_ms, "total_ms": self.total_ms, "steps": self.steps}
+
+
+def run_plan(plan):
+    """
+    Execute a plan: compile it (if needed), open one TestheadSession per
+    board, then apply the steps in order.
+
+    Returns:
+        PlanReport: Per-step latency and total wall time.
+
+    Raises:
+        ValueError: If the plan does not compile (nothing is switched).
+        RuntimeError / DIOError: From the step that failed; earlier steps stay applied.
+    """
+    from testhead_session import TestheadSession
+
+    if not plan.is_compiled:
+        compile_plan(plan)
+    report = PlanReport(plan)
+    start = time.perf_counter()
+    sessions = {}
+    try:
+        for dio_name in plan.dio_names:
+            sessions[dio_name] = TestheadSession.open(plan.config_file_name, dio_name)
+        report.setup_ms = (time.perf_counter() - start) * 1000
+
+        for step in plan.steps:
+            step_start = time.perf_counter()
+            if step.compiled is not None:
+                try:
+                    # With relay timing this returns once the relays have settled
+                    sessions[step.dio_name].apply_compiled(step.compiled)
+                except Exception:
+                    print(f"✗ Step {step.number} ({step.label}) failed")
+                    raise
+            switched = time.perf_counter()
+            if step.dwell_s > 0:
+                time.sleep(step.dwell_s)
+            end = time.perf_counter()
+            report.steps.append({"step": step.number, "dio": step.dio_name, "label": step.label,
+                                 "switch_ms": (switched - step_start) * 1000, "dwell_ms": (end - switched) * 1000})
+    finally:
+        for session in sessions.values():
+            session.close()
+        report.total_ms = (time.perf_counter() - start) * 1000
+    return report
+
+
+def main(arguments):
+    """
+    Plan entry point: <plan.json> [--check] [--report report.json].
+
+    --check only compiles the plan (no hardware needed).
+
+    Returns:
+        int: Process exit code, 0 on success.
+    """
+    arguments = list(arguments)
+    check_only = "--check" in arguments
+    if check_only:
+        arguments.remove("--check")
+    report_path = None
+    if "--report" in arguments:
+        index = arguments.index("--report")
+        if index + 1 >= len(arguments):
+            print("--report needs an output file")
+            return 1
+        report_path = arguments[index + 1]
+        del arguments[index:index + 2]
+    if len(arguments) != 1:
+        print("Usage: python testhead_control.py --plan <plan.json> [--check] [--report report.json]")
+        return 1
+
+    try:
+        plan = compile_plan(load_plan(arguments[0]))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Plan OK: {len(plan.steps)} step(s) on {', '.join(plan.dio_names)} compiled from {plan.config_file_name}")
+    if check_only:
+        return 0
+
+    try:
+        report = run_plan(plan)
+    except Exception as e:
+        print(f"✗ Plan failed with error: {e}")
+        return 1
+    report.print_report()
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2)
+        print(f"Report written to {report_path}")
+    return 0
@@ -0,0 +1,475 @@
+"""
+Route Timing
+End-to-end latency of each named route (platform / sheet / PathName), from
+the request to the relays written, split into phases:
+
+    resolve   get_config_path
+    load      opening the config (cache hit, parse or artifact load)
+    lookup    PathName -> SwitchDriverCommand
+    attach    DIO_List lookup, board discovery, relay timing
+    compile   command string -> port masks (memoized)
+    write     DLL writes, including relay settling with relay timing
+
+Testhead_Control.run records every successful route. Samples are kept in
+memory and appended to a local JSON-lines file, one line per run, at exit
+and every FLUSH_INTERVAL_S in long-running processes: a CLI step pays one
+small append, never a rewrite. Only the report reads the whole file; it
+keeps a rolling window of ROLLING_WINDOW runs per route, lists the slowest
+routes and flags routes whose p95 regressed against a saved baseline, e.g.
+after a workbook edit or a driver update.
+
+Usage:
+    python testhead_control.py --routes [--top N] [--baseline FILE] [--save-baseline [FILE]] [--reset]
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+from testhead_logging import get_logger
+
+logger = get_logger("timing")
+
+TIMINGS_FILE_ENV = "TESTHEAD_ROUTE_TIMINGS"     # File path, or "off" to disable recording
+
+PHASES = ("resolve", "load", "lookup", "attach", "compile", "write")
+
+# Samples per route used by the report, and kept when it compacts the file
+ROLLING_WINDOW = 100
+
+# A timings file bigger than this is renamed to "<file>.1" (replacing the previous
+# one) before the next append, so the files stay bounded without a report run
+ROTATE_BYTES = 4 * 1024 * 1024
+
+# Seconds between writes of the timings file in long-running processes
+FLUSH_INTERVAL_S = 60.0
+
+# A route regressed if its p95 grew by more than this fraction and REGRESSION_MIN_MS,
+# with at least REGRESSION_MIN_SAMPLES samples on both sides
+REGRESSION_THRESHOLD = 0.20
+REGRESSION_MIN_MS = 0.5
+REGRESSION_MIN_SAMPLES = 5
+
+
+def default_timings_path():
+    """
+    Timings file: TESTHEAD_ROUTE_TIMINGS if set, otherwise
+    %LOCALAPPDATA%\\TestHead\\route_timings.jsonl (or ~/.cache/testhead/route_timings.jsonl).
+
+    Returns:
+        str: File path, or None if recording is turned off.
+    """
+    configured = os.environ.get(TIMINGS_FILE_ENV)
+    if configured is not None:
+        return None if configured.strip().lower() in ("", "off", "0", "none") else configured
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return os.path.join(base, "TestHead", "route_timings.jsonl")
+    return os.path.join(os.path.expanduser("~"), ".cache", "testhead", "route_timings.jsonl")
+
+
+def default_baseline_path(timings_path):
+    """Baseline next to the timings file: route_timings.baseline.jsonl."""
+    root, extension = os.path.splitext(timings_path)
+    return f"{root}.baseline{extension or '.jsonl'}"
+
+
+def rotated_path(timings_path):
+    """Previous timings file, renamed at ROTATE_BYTES (still read by the report)."""
+    return f"{timings_path}.1"
+
+
+def platform_name(config_path):
+    """Platform of a config file: its name without directory and extension (.json, .xlsx and .thc match)."""
+    return os.path.splitext(os.path.basename(config_path))[0]
+
+
+class RouteTimer:
+    """
+    Phase durations of one route, measured with consecutive mark() calls.
+
+    Example:
+        timer = RouteTimer()
+        config_path = get_config_path(name)
+        timer.mark("resolve")
+        ...
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Ends a phase: the time since the previous mark (or creation) is charged to it."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    @property
+    def total_ms(self):
+        return sum(self.phases.values())
+
+
+# ***********************************
+# Aggregates
+# ***********************************
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize_route(route):
+    """
+    Aggregates of one stored route.
+
+    Returns:
+        dict: {"platform", "sheet", "path", "count", "samples", "p50_ms",
+               "p95_ms", "max_ms", "phases_p95": {phase: ms}, "phases_mean": {phase: ms}}
+    """
+    samples = route["samples"]
+    totals = [row[0] for row in samples]
+    columns = list(zip(*(row[1:] for row in samples))) if samples else [()] * len(PHASES)
+    return {
+        "platform": route["platform"], "sheet": route["sheet"], "path": route["path"],
+        "count": route["count"], "samples": len(samples),
+        "p50_ms": percentile(totals, 50), "p95_ms": percentile(totals, 95),
+        "max_ms": max(totals) if totals else 0.0,
+        "phases_p95": {phase: percentile(list(column), 95) for phase, column in zip(PHASES, columns)},
+        "phases_mean": {phase: sum(column) / len(column) if column else 0.0 for phase, column in zip(PHASES, columns)},
+    }
+
+
+def _route_key(platform, sheet, path):
+    return (platform, sheet, path)
+
+
+def _sample_line(platform, sheet, path, when, row):
+    return json.dumps({"platform": platform, "sheet": sheet, "path": path, "time": round(when, 3), "ms": row},
+                      separators=(',', ':')) + "\n"
+
+
+def read_timings(timings_path, window=ROLLING_WINDOW, include_rotated=True):
+    """
+    Routes in a timings (or baseline) file, oldest run first.
+
+    Lines that cannot be read (e.g. cut short by a crash) are skipped.
+
+    Args:
+        timings_path (str): JSON-lines file written by RouteTimingStore.
+        window (int): Most recent samples kept per route.
+        include_rotated (bool): Read "<file>.1" first if it exists.
+
+    Returns:
+        dict: (platform, sheet, path) -> {"platform", "sheet", "path", "count"
+              (runs in the file), "updated" (epoch seconds of the last run),
+              "samples": [[total_ms, resolve, load, ...], ...],
+              "times": [epoch seconds of each sample, ...]}.
+              Empty if the file is missing.
+    """
+    routes = {}
+    paths = [rotated_path(timings_path), timings_path] if include_rotated else [timings_path]
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        for line in lines:
+            try:
+                sample = json.loads(line)
+                key = _route_key(sample["platform"], sample["sheet"], sample["path"])
+                row = [float(value) for value in sample["ms"]]
+                when = float(sample.get("time", 0.0))
+            except (ValueError, KeyError, TypeError):
+                continue
+            if len(row) != len(PHASES) + 1:
+                continue
+            route = routes.get(key)
+            if route is None:
+                route = routes[key] = {"platform": key[0], "sheet": key[1], "path": key[2],
+                                       "count": 0, "updated": when, "samples": [], "times": []}
+            route["count"] += 1
+            route["updated"] = max(route["updated"], when)
+            route["samples"].append(row)
+            route["times"].append(when)
+            if len(route["samples"]) > 2 * window:
+                del route["samples"][:-window]   # Trimmed in batches while reading
+                del route["times"][:-window]
+    for route in routes.values():
+        del route["samples"][:-window]
+        del route["times"][:-window]
+    return routes
+
+
+def write_timings(timings_path, routes):
+    """
+    Writes routes (as returned by read_timings) as a new file, atomically.
+    Each sample keeps its own time, so a compacted file still dates every run.
+    """
+    directory = os.path.dirname(timings_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{timings_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for route in routes.values():
+            for when, row in zip(route["times"], route["samples"]):
+                f.write(_sample_line(route["platform"], route["sheet"], route["path"], when, row))
+    os.replace(temp_path, timings_path)  # Readers never see a half-written file
+
+
+def compact_timings(timings_path, window=ROLLING_WINDOW):
+    """
+    Rewrites the timings file with only the last `window` runs per route and
+    removes the rotated file. Runs appended by another process while this
+    happens can be lost; they are statistics.
+
+    Returns:
+        dict: The routes kept (see read_timings).
+    """
+    routes = read_timings(timings_path, window)
+    write_timings(timings_path, routes)
+    try:
+        os.remove(rotated_path(timings_path))
+    except OSError:
+        pass
+    return routes
+
+
+class RouteTimingStore:
+    """
+    Collects route timings and appends them to a timings file.
+
+    record() only appends to memory. flush() appends one JSON line per run
+    to the file in a single write, so a CLI step costs one small append and
+    several processes (CLI calls, GUI, daemon) add to the same file without
+    reading it or overwriting each other's runs. When the file grows past
+    ROTATE_BYTES it is renamed to "<file>.1" (replacing the older one).
+
+    Args:
+        timings_path (str): Timings file. default_timings_path() if None.
+        flush_interval (float): Seconds between automatic flushes. Samples are
+                                also flushed at process exit.
+    """
+
+    def __init__(self, timings_path=None, flush_interval=FLUSH_INTERVAL_S):
+        self.timings_path = timings_path or default_timings_path()
+        self.flush_interval = flush_interval
+        self._pending = []      # Lines not written yet
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._exit_hook = False
+
+    def record(self, config_path, sheet_name, path_name, timer):
+        """
+        Adds one route run.
+
+        Args:
+            config_path (str): Config file the route was looked up in.
+            sheet_name (str): Lookup sheet.
+            path_name (str): PathName.
+            timer (RouteTimer): Phase durations.
+        """
+        phases = timer.phases
+        row = [round(timer.total_ms, 3)] + [round(phases.get(phase, 0.0), 3) for phase in PHASES]
+        line = _sample_line(platform_name(config_path), sheet_name, path_name, time.time(), row)
+        with self._lock:
+            self._pending.append(line)
+            if not self._exit_hook:
+                atexit.register(self.flush)
+                self._exit_hook = True
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the recorded runs to the timings file.
+
+        Returns:
+            int: Runs written. An unwritable file is logged and the runs dropped.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            try:
+                if os.path.getsize(self.timings_path) > ROTATE_BYTES:
+                    os.replace(self.timings_path, rotated_path(self.timings_path))
+            except FileNotFoundError:
+                directory = os.path.dirname(self.timings_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            with open(self.timings_path, 'a', encoding='utf-8') as f:
+                f.write("".join(pending))
+        except OSError as e:
+            logger.warning("Route timings not saved to %s: %s", self.timings_path, e)
+            return 0
+        return len(pending)
+
+    def routes(self):
+        """Stored routes, including the runs not flushed yet (see read_timings)."""
+        self.flush()
+        return read_timings(self.timings_path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_route_timings():
+    """
+    Returns the process-wide RouteTimingStore, or None if TESTHEAD_ROUTE_TIMINGS
+    turns recording off.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            timings_path = default_timings_path()
+            _store = RouteTimingStore(timings_path) if timings_path else False
+        return _store or None
+
+
+# ***********************************
+# Report
+# ***********************************
+def find_regressions(current, baseline, threshold=REGRESSION_THRESHOLD, min_ms=REGRESSION_MIN_MS,
+                     min_samples=REGRESSION_MIN_SAMPLES):
+    """
+    Routes whose p95 grew against a baseline.
+
+    Args:
+        current (dict): Routes from read_timings (timings file).
+        baseline (dict): Routes from read_timings (baseline file).
+
+    Returns:
+        list: {"route": summary, "baseline": summary, "increase_ms", "increase",
+               "phase": phase with the largest p95 growth, "phase_increase_ms"},
+              largest increase first.
+    """
+    regressions = []
+    for key, route in current.items():
+        if key not in baseline:
+            continue
+        now, before = summarize_route(route), summarize_route(baseline[key])
+        if now["samples"] < min_samples or before["samples"] < min_samples:
+            continue
+        increase_ms = now["p95_ms"] - before["p95_ms"]
+        if increase_ms <= min_ms or increase_ms <= before["p95_ms"] * threshold:
+            continue
+        phase = max(PHASES, key=lambda name: now["phases_p95"][name] - before["phases_p95"][name])
+        regressions.append({
+            "route": now, "baseline": before, "increase_ms": increase_ms,
+            "increase": increase_ms / before["p95_ms"] if before["p95_ms"] else None,
+            "phase": phase, "phase_increase_ms": now["phases_p95"][phase] - before["phases_p95"][phase],
+        })
+    regressions.sort(key=lambda entry: entry["increase_ms"], reverse=True)
+    return regressions
+
+
+def _route_label(summary):
+    return f"{summary['platform']} / {summary['sheet']} / {summary['path']}"
+
+
+def format_report(current, baseline=None, top=10, baseline_path=None):
+    """
+    Text report: the slowest routes by p95 with their phase breakdown, then
+    the regressions against the baseline (if one is given).
+
+    Returns:
+        str: The report.
+    """
+    if not current:
+        return "No route timings recorded yet"
+    summaries = sorted((summarize_route(route) for route in current.values()),
+                       key=lambda summary: summary["p95_ms"], reverse=True)
+    lines = [f"Slowest routes by p95 ({min(top, len(summaries))} of {len(summaries)}), ms:",
+             f"{'p95':>8} {'p50':>8} {'Runs':>6}  " + " ".join(f"{phase:>8}" for phase in PHASES) + "  Platform / Sheet / PathName"]
+    for summary in summaries[:top]:
+        lines.append(f"{summary['p95_ms']:>8.2f} {summary['p50_ms']:>8.2f} {summary['samples']:>6}  "
+                     + " ".join(f"{summary['phases_p95'][phase]:>8.2f}" for phase in PHASES)
+                     + f"  {_route_label(summary)}")
+    lines.append(f"(last {ROLLING_WINDOW} runs per route; phase columns are per-phase p95)")
+
+    if baseline is not None:
+        regressions = find_regressions(current, baseline)
+        name = baseline_path or "baseline"
+        lines.append("")
+        if not baseline:
+            lines.append(f"Baseline {name} is empty or missing: save one with --save-baseline")
+        elif not regressions:
+            lines.append(f"No p95 regressions against {name}")
+        else:
+            lines.append(f"{len(regressions)} route(s) regressed against {name} "
+                         f"(p95 up more than {REGRESSION_THRESHOLD:.0%} and {REGRESSION_MIN_MS} ms):")
+            for entry in regressions:
+                lines.append(f"  {_route_label(entry['route'])}: p95 {entry['baseline']['p95_ms']:.2f} -> "
+                             f"{entry['route']['p95_ms']:.2f} ms (+{entry['increase_ms']:.2f} ms), "
+                             f"mostly {entry['phase']} (+{entry['phase_increase_ms']:.2f} ms)")
+    return "\n".join(lines)
+
+
+def main(arguments):
+    """
+    Report entry point: [--top N] [--baseline FILE] [--save-baseline [FILE]] [--reset].
+
+    The baseline defaults to route_timings.baseline.jsonl next to the timings
+    file and is compared whenever it exists. The timings file is compacted
+    to the last ROLLING_WINDOW runs per route on every report.
+
+    Returns:
+        int: 0, 1 if regressions were found (or on bad arguments).
+    """
+    arguments = list(arguments)
+    timings_path = default_timings_path()
+    if timings_path is None:
+        print(f"Route timing is turned off ({TIMINGS_FILE_ENV}=off)")
+        return 1
+    top = 10
+    baseline_path = default_baseline_path(timings_path)
+    save_path = None
+    reset = False
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == "--top":
+            value = arguments.pop(0) if arguments else ""
+            if not value.isdigit() or int(value) < 1:
+                print(f"--top needs a positive number of routes, got '{value}'")
+                return 1
+            top = int(value)
+        elif argument == "--baseline" and arguments:
+            baseline_path = arguments.pop(0)
+        elif argument == "--save-baseline":
+            save_path = arguments.pop(0) if arguments and not arguments[0].startswith("--") else baseline_path
+        elif argument == "--reset":
+            reset = True
+        else:
+            print("Usage: python testhead_control.py --routes [--top N] [--baseline FILE] [--save-baseline [FILE]] [--reset]")
+            return 1
+
+    print(f"Route timings: {timings_path}")
+    if reset:
+        for path in (timings_path, rotated_path(timings_path)):
+            if os.path.exists(path):
+                os.remove(path)
+        print("Route timings cleared")
+        return 0
+    try:
+        current = compact_timings(timings_path) if os.path.exists(timings_path) else read_timings(timings_path)
+    except OSError as e:
+        print(f"Could not compact {timings_path}: {e}")
+        current = read_timings(timings_path)
+    if save_path:
+        write_timings(save_path, current)
+        print(f"Baseline of {len(current)} route(s) written to {save_path}")
+        return 0
+
+    baseline = read_timings(baseline_path, include_rotated=False) if os.path.exists(baseline_path) else None
+    print(format_report(current, baseline, top=top, baseline_path=baseline_path))
+    return 1 if baseline and find_regressions(current, baseline) else 0
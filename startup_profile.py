@@ -0,0 +1,96 @@
+"""
+Startup Profiler
+Measures how long each module import takes, so the per-step CLI startup
+budget can be checked (e.g. that a JSON config never pulls in pandas)
+
+Enable with the --import-times option of testhead_control.py or by setting
+TESTHEAD_IMPORT_TIMES=1. Uses only the standard library.
+"""
+import builtins
+import sys
+import time
+
+ENV_VAR = "TESTHEAD_IMPORT_TIMES"
+CLI_FLAG = "--import-times"
+
+# Modules that should only be imported when an Excel workbook is really parsed
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+
+_original_import = None
+_records = []       # [module name, cumulative seconds, self seconds, nesting depth]
+_stack = []         # Child time accumulated per active import
+_start = None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only first-time absolute imports cost anything worth reporting
+    if level != 0 or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    depth = len(_stack)
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        _records.append([name, elapsed, elapsed - children, depth])
+
+
+def install():
+    """Starts timing imports. Safe to call more than once."""
+    global _original_import, _start
+    if _original_import is not None:
+        return
+    _start = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def uninstall():
+    """Stops timing imports."""
+    global _original_import
+    if _original_import is not None:
+        builtins.__import__ = _original_import
+        _original_import = None
+
+
+def is_installed():
+    return _original_import is not None
+
+
+def get_report():
+    """
+    Import times grouped by top-level package.
+
+    Returns:
+        list: (package, self seconds, module count) tuples, slowest first.
+              Self time excludes nested imports of other packages, so the
+              entries add up to the total import time.
+    """
+    packages = {}
+    for name, _, self_s, _ in _records:
+        package = name.split('.')[0]
+        total, count = packages.get(package, (0.0, 0))
+        packages[package] = (total + self_s, count + 1)
+    return sorted(((package, total, count) for package, (total, count) in packages.items()),
+                  key=lambda entry: entry[1], reverse=True)
+
+
+def print_report(limit=15):
+    """Prints the slowest packages, the total import time and whether heavy modules were loaded."""
+    report = get_report()
+    total = sum(entry[1] for entry in report)
+    print("Import times (self time per top-level package):")
+    for package, seconds, count in report[:limit]:
+        print(f"  {seconds * 1000:8.1f} ms  {package} ({count} module(s))")
+    if len(report) > limit:
+        rest = sum(entry[1] for entry in report[limit:])
+        print(f"  {rest * 1000:8.1f} ms  {len(report) - limit} other package(s)")
+    print(f"Total import time: {total * 1000:.1f} ms")
+    if _start is not None:
+        print(f"Wall time since profiling started: {(time.perf_counter() - _start) * 1000:.1f} ms")
+    heavy = [module for module in HEAVY_MODULES if module in sys.modules]
+    print(f"Heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
@@ -0,0 +1,205 @@
+"""
+Relay Switching Scheduler
+Orders port-image writes for break-before-make and waits only for the relays
+that actually changed, using per-line timing declared in the config
+"""
+import time
+
+# Columns of the optional Relay_Timing sheet / JSON key
+TIMING_NAME_COLUMN = "NAME"                 # DIO name, blank for every board
+TIMING_TARGET_COLUMN = "GroupPortBit"       # "0A0" (line), "0A" (port) or "*" (every line)
+TIMING_SETTLE_COLUMN = "SETTLE_MS"          # Contact settle time after the line changes
+TIMING_BREAK_COLUMN = "BREAK_MS"            # Break-before-make: line must open this long before others close
+
+
+def _parse_ms(value, column, target):
+    if value is None or str(value).strip() == "":
+        return 0.0
+    try:
+        ms = float(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid {column} '{value}' for '{target}' in relay timing.")
+    if ms < 0:
+        raise ValueError(f"{column} for '{target}' must not be negative.")
+    return ms / 1000.0
+
+
+def _target_lines(target, max_lines):
+    """0-based line numbers covered by a timing target ("0A0", "0A" or "*")."""
+    if target == "*":
+        return range(max_lines)
+    if len(target) in (2, 3) and target[0] in '0123' and target[1] in 'ABC' and (len(target) == 2 or target[2] in '01234567'):
+        first = int(target[0]) * 24 + (ord(target[1]) - ord('A')) * 8
+        lines = range(first, first + 8) if len(target) == 2 else range(first + int(target[2]), first + int(target[2]) + 1)
+        if lines.stop > max_lines:
+            raise ValueError(f"Relay timing target '{target}' exceeds max line count ({max_lines}).")
+        return lines
+    raise ValueError(f"Invalid relay timing target '{target}'. Expected '0A0' (line), '0A' (port) or '*'.")
+
+
+class RelayTiming:
+    """
+    Settle and break-before-make times (seconds) for every line of one board.
+
+    Later rows override earlier ones, so a "*" default can be followed by
+    port or line specific entries.
+    """
+
+    def __init__(self, max_lines):
+        self.max_lines = max_lines
+        self.settle_s = [0.0] * max_lines
+        self.break_s = [0.0] * max_lines
+
+    @classmethod
+    def from_rows(cls, rows, dio_name, max_lines):
+        """
+        Build the timing for one board from Relay_Timing rows.
+
+        Args:
+            rows (list): Dicts with GroupPortBit, SETTLE_MS, BREAK_MS and optional NAME.
+            dio_name (str): Board to build timing for. Rows with a blank NAME apply to every board.
+            max_lines (int): Line count of the board model.
+
+        Raises:
+            ValueError: If a row has an invalid target or time.
+        """
+        timing = cls(max_lines)
+        for row in rows:
+            name = str(row.get(TIMING_NAME_COLUMN) or "").strip()
+            if name and name != dio_name:
+                continue
+            target = str(row.get(TIMING_TARGET_COLUMN) or "").strip().upper()
+            settle = _parse_ms(row.get(TIMING_SETTLE_COLUMN), TIMING_SETTLE_COLUMN, target)
+            brk = _parse_ms(row.get(TIMING_BREAK_COLUMN), TIMING_BREAK_COLUMN, target)
+            for line in _target_lines(target, max_lines):
+                timing.settle_s[line] = settle
+                timing.break_s[line] = brk
+        return timing
+
+    @property
+    def is_empty(self):
+        """True if no line has any timing, i.e. plain single writes are enough"""
+        return not any(self.settle_s) and not any(self.break_s)
+
+
+def _changed_lines(before, after):
+    """(opening, closing) 0-based lines going 1->0 and 0->1 between two port images."""
+    opening, closing = [], []
+    for port, (old, new) in enumerate(zip(before, after)):
+        diff = old ^ new
+        for bit in range(8):
+            if diff & (1 << bit):
+                (closing if new & (1 << bit) else opening).append(port * 8 + bit)
+    return opening, closing
+
+
+class SwitchResult:
+    """
+    Outcome of one scheduled transition.
+
+    Attributes:
+        opened (list): 0-based lines switched 1->0.
+        closed (list): 0-based lines switched 0->1.
+        changed_ports (list): Indexes of the ports holding those lines.
+        writes (int): Port-image writes issued (2 when break-before-make applied).
+        settled_at (float): time.monotonic() when every changed relay has settled.
+    """
+
+    def __init__(self, opened, closed, writes, settled_at):
+        self.opened = opened
+        self.closed = closed
+        self.writes = writes
+        self.settled_at = settled_at
+
+    @property
+    def changed_ports(self):
+        return sorted({line // 8 for line in self.opened + self.closed})
+
+
+class SwitchScheduler:
+    """
+    Applies compiled commands to one board honoring relay timing.
+
+    Lines that open and have a break time are written first, on their own,
+    and the lines that close are only written once those breaks have elapsed.
+    The settle time is then the latest settle deadline of the lines that
+    actually changed, instead of a worst-case blanket delay. A command with
+    the "0" reset token is a single forced write, without break-before-make.
+
+    Args:
+        dio (AccesDIO): Board access object.
+        device_index (int): Device index of the board.
+        timing (RelayTiming): Timing for this board.
+    """
+
+    def __init__(self, dio, device_index, timing):
+        self.dio = dio
+        self.device_index = device_index
+        self.timing = timing
+
+    def apply(self, compiled, wait=True):
+        """
+        Apply a compiled command.
+
+        Args:
+            compiled (CompiledCommand): Command compiled for this board model.
+            wait (bool): Sleep until the changed relays have settled before returning.
+
+        Returns:
+            SwitchResult: Changed lines, writes issued and the settled-at timestamp.
+
+        Raises:
+            ValueError: If the command was compiled for a different port count.
+            RuntimeError: If DIO_ReadAll or DIO_Configure fails.
+        """
+        if compiled.port_count != self.dio.port_count:
+            raise ValueError(f"Command compiled for {compiled.port_count} ports, {self.dio.dio_model} has {self.dio.port_count}")
+        if compiled.is_noop:
+            return SwitchResult([], [], 0, time.monotonic())
+
+        # The whole read-open-break-close sequence holds the board lock: another
+        # thread on the same AccesDIO cannot write between the two images
+        with self.dio.locked():
+            if compiled.reset:
+                # A reset does not build on the board state: no read-back, and it
+                # always reaches the board. Lines count as changed against the
+                # shadow, or all of them if it is unknown.
+                target = compiled.apply([0x00] * compiled.port_count)
+                current = self.dio.get_shadow(self.device_index)
+                if current is None:
+                    current = [~value & 0xFF for value in target]
+            else:
+                current = self.dio.current_image(self.device_index)
+                target = compiled.apply(current)
+            opening, closing = _changed_lines(current, target)
+
+            settled_at = time.monotonic()
+            writes = 0
+            break_s = max((self.timing.break_s[line] for line in opening), default=0.0)
+            if break_s and closing and not compiled.reset:
+                # Break before make: open first, wait, then close
+                intermediate = list(current)
+                for line in opening:
+                    intermediate[line // 8] &= ~(1 << (line % 8)) & 0xFF
+                self.dio.write_port_image(self.device_index, intermediate)
+                writes += 1
+                opened_at = time.monotonic()
+                settled_at = max(opened_at + self.timing.settle_s[line] for line in opening)
+                remaining = opened_at + break_s - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                changed_now = closing
+            else:
+                changed_now = opening + closing
+
+            if self.dio.write_port_image(self.device_index, target, force=compiled.reset) or compiled.reset:
+                writes += 1
+            written_at = time.monotonic()
+        settled_at = max([settled_at] + [written_at + self.timing.settle_s[line] for line in changed_now])
+
+        # Settling needs no lock: other boards' and threads' writes may proceed
+        if wait:
+            remaining = settled_at - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        return SwitchResult(opening, closing, writes, settled_at)
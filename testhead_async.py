@@ -0,0 +1,143 @@
+"""
+Async TestHead Control
+asyncio facade over TestheadSession for asyncio-based test executives.
+Blocking config loading and DLL calls run in a bounded thread pool, so the
+event loop keeps serving instrument I/O while relays switch.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from testhead_session import TestheadSession
+
+
+class AsyncTesthead:
+    """
+    Awaitable testhead control for one configuration file.
+
+    Operations on the same DIO name are serialized; operations on different
+    boards run concurrently (up to max_workers at a time). Each board gets a
+    TestheadSession on its first operation, so later operations only look the
+    path up and write.
+
+    A timeout or cancellation returns control to the caller right away, but
+    the board stays locked until the blocking DLL call has actually finished.
+    The next operation on that board therefore starts from a known relay
+    state, and read_state() reports what was really written.
+
+    Args:
+        config_file_name (str): Excel or JSON config, resolved like Testhead_Control.run.
+        max_workers (int): Size of the thread pool for blocking calls.
+        timeout (float): Default timeout in seconds per operation. None waits forever.
+
+    Example:
+        async with AsyncTesthead("Langley_Testhead Switch Path Configuration.json") as testhead:
+            await testhead.apply_path("TestHead", "Bal In 1-8, Bal Out 1-7 and Main L", "Model_TM30")
+            ports = await testhead.read_state("TestHead")
+    """
+
+    def __init__(self, config_file_name, max_workers=4, timeout=None):
+        if not config_file_name:
+            raise ValueError("config_file_name is required. Must be path to Excel (.xlsx) or JSON (.json) file.")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.config_file_name = config_file_name
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="testhead")
+        self._device_locks = {}     # dio_name -> asyncio.Lock
+        self._sessions = {}         # dio_name -> TestheadSession (only used under its lock)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def apply_path(self, dio_name, path_name, sheet_name, timeout=None):
+        """
+        Look up a PathName in a sheet and apply it to a board.
+
+        Returns:
+            bool: True (failures raise).
+
+        Raises:
+            asyncio.TimeoutError: If the operation took longer than the timeout.
+        """
+        return await self._submit(dio_name, self._apply_path_blocking, timeout, dio_name, path_name, sheet_name)
+
+    async def apply_command(self, dio_name, switch_command, timeout=None):
+        """
+        Apply a direct switch driver command, e.g. "0;0B4,1;0B5,1".
+
+        Returns:
+            bool: True (failures raise).
+        """
+        return await self._submit(dio_name, self._apply_command_blocking, timeout, dio_name, switch_command)
+
+    async def reset(self, dio_name, timeout=None):
+        """Set every line of a board low (command "0")."""
+        return await self.apply_command(dio_name, "0", timeout=timeout)
+
+    async def read_state(self, dio_name, timeout=None):
+        """
+        Current port image of a board, one byte per port.
+
+        Waits for any operation still running on the board (including ones
+        whose caller timed out or was cancelled).
+        """
+        return await self._submit(dio_name, self._read_state_blocking, timeout, dio_name)
+
+    async def close(self):
+        """Waits for running operations, shuts the thread pool down and closes the sessions."""
+        await asyncio.get_running_loop().run_in_executor(None, self._close_blocking)
+
+    # ***********************************
+    # Scheduling
+    # ***********************************
+    async def _submit(self, dio_name, func, timeout, *args):
+        if not dio_name:
+            raise ValueError("dio_name is required. Must match a NAME in the DIO_List.")
+        if timeout is None:
+            timeout = self.timeout
+
+        loop = asyncio.get_running_loop()
+        lock = self._device_locks.setdefault(dio_name, asyncio.Lock())
+        await lock.acquire()
+        try:
+            future = loop.run_in_executor(self._executor, func, *args)
+        except BaseException:
+            lock.release()
+            raise
+
+        # Release the board when the blocking call finishes, not when the caller
+        # stops waiting: a timed-out write may still be in progress
+        def release(done):
+            lock.release()
+            if not done.cancelled():
+                done.exception()  # Mark as retrieved if nobody is waiting any more
+
+        future.add_done_callback(release)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    # ***********************************
+    # Blocking work (runs in the thread pool)
+    # ***********************************
+    def _session(self, dio_name):
+        session = self._sessions.get(dio_name)
+        if session is None:
+            session = self._sessions[dio_name] = TestheadSession.open(self.config_file_name, dio_name)
+        return session
+
+    def _apply_path_blocking(self, dio_name, path_name, sheet_name):
+        return self._session(dio_name).apply_path(path_name, sheet_name)
+
+    def _apply_command_blocking(self, dio_name, switch_command):
+        return self._session(dio_name).apply_command(switch_command)
+
+    def _read_state_blocking(self, dio_name):
+        return self._session(dio_name).state()
+
+    def _close_blocking(self):
+        self._executor.shutdown(True)
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
@@ -0,0 +1,220 @@
+"""
+TestHead Client
+Thin command-line client of the resident testhead daemon (testhead_daemon).
+Takes the same arguments as testhead_control.py and imports only the standard
+library, so a step costs a process start and one local round trip instead of
+a config parse, DLL load and board discovery.
+
+If no daemon is listening, the command runs in this process through
+testhead_control as before.
+
+Protocol: one JSON object per line in each direction over a localhost TCP
+connection. A request has "op" plus its fields; a response has "ok" and
+either the result fields or "error".
+"""
+import json
+import os
+import socket
+import sys
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47821
+PORT_ENV = "TESTHEAD_DAEMON_PORT"
+
+# Seconds to wait for a connection / a response (relay settling included)
+CONNECT_TIMEOUT_S = 0.5
+REQUEST_TIMEOUT_S = 30.0
+
+
+def daemon_port():
+    """Daemon port: TESTHEAD_DAEMON_PORT if set, otherwise DEFAULT_PORT."""
+    return int(os.environ.get(PORT_ENV, DEFAULT_PORT))
+
+
+class DaemonUnavailable(ConnectionError):
+    """No daemon is listening on the port."""
+
+
+class TestheadClient:
+    """
+    One connection to the daemon, reused for many requests.
+
+    Args:
+        host (str): Daemon address (the daemon only listens on localhost).
+        port (int): Daemon port. daemon_port() if None.
+
+    Raises:
+        DaemonUnavailable: If no daemon accepts the connection.
+
+    Example:
+        with TestheadClient() as client:
+            client.apply_path("Langley_Testhead Switch Path Configuration.json", "TestHead",
+                              ["Bal In 1-8, Bal Out 1-7 and Main L"], "Model_TM30")
+            ports = client.read_state("Langley_Testhead Switch Path Configuration.json", "TestHead")
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=None):
+        try:
+            self._socket = socket.create_connection((host, port or daemon_port()), timeout=CONNECT_TIMEOUT_S)
+        except OSError as e:
+            raise DaemonUnavailable(f"No testhead daemon on {host}:{port or daemon_port()}: {e}")
+        self._socket.settimeout(REQUEST_TIMEOUT_S)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile('rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def request(self, op, **fields):
+        """
+        Send one request and wait for its response.
+
+        Returns:
+            dict: The response fields.
+
+        Raises:
+            RuntimeError: If the daemon reports an error (its message is kept).
+            ConnectionError: If the daemon closed the connection.
+        """
+        fields["op"] = op
+        self._socket.sendall(json.dumps(fields, separators=(',', ':')).encode('utf-8') + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Testhead daemon closed the connection")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "Unknown daemon error"))
+        return response
+
+    def apply_path(self, config_file_name, dio_name, path_names, sheet_name, coalesce=True):
+        """Apply one or more PathNames (net effect in one write unless coalesce is False)."""
+        return self.request("apply_path", config=_config_argument(config_file_name), dio=dio_name,
+                            paths=list(path_names), sheet=sheet_name, coalesce=coalesce)
+
+    def apply_command(self, config_file_name, dio_name, switch_command):
+        """Apply a direct switch driver command, e.g. "0;0B4,1"."""
+        return self.request("apply_command", config=_config_argument(config_file_name), dio=dio_name,
+                            command=switch_command)
+
+    def reset(self, config_file_name, dio_name):
+        """Set every line of a board low."""
+        return self.request("reset", config=_config_argument(config_file_name), dio=dio_name)
+
+    def read_state(self, config_file_name, dio_name):
+        """Port image of a board, one byte per port."""
+        return self.request("read_state", config=_config_argument(config_file_name), dio=dio_name)["state"]
+
+    def recent_log(self, count=None):
+        """Most recent daemon log lines (all buffered if count is None), oldest first."""
+        return self.request("log", count=count)["lines"]
+
+    def stats(self, reset=False):
+        """DLL call statistics snapshot of the daemon (see accesio.dio_stats); reset clears them after."""
+        return self.request("stats", reset=reset)["stats"]
+
+    def ping(self):
+        """Daemon process ID and open session count."""
+        return self.request("ping")
+
+    def shutdown(self):
+        """Ask the daemon to close its sessions and exit."""
+        return self.request("shutdown")
+
+
+def _config_argument(config_file_name):
+    # The daemon resolves names from its own directory: send a path that exists here as absolute
+    if os.path.exists(config_file_name):
+        return os.path.abspath(config_file_name)
+    return config_file_name
+
+
+def main(arguments=None):
+    """
+    Client entry point with the arguments of testhead_control.py:
+        <config_file> <sheet_name> <dio_name> <command_component> [...] [--no-coalesce]
+    plus --ping, --log [count], --stats [--reset] and --shutdown.
+
+    Returns:
+        int: Process exit code, 0 on success.
+    """
+    arguments = list(sys.argv[1:] if arguments is None else arguments)
+    coalesce = "--no-coalesce" not in arguments
+    if not coalesce:
+        arguments.remove("--no-coalesce")
+
+    if arguments and arguments[0] == "--log":
+        try:
+            with TestheadClient() as client:
+                lines = client.recent_log(int(arguments[1]) if len(arguments) > 1 else None)
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Error: {e}")
+            return 1
+        for line in lines:
+            print(line)
+        return 0
+
+    if arguments and arguments[0] == "--stats":
+        try:
+            with TestheadClient() as client:
+                snapshot = client.stats(reset="--reset" in arguments)
+        except (OSError, RuntimeError) as e:
+            print(f"Error: {e}")
+            return 1
+        from accesio.dio_stats import format_stats
+        print(format_stats(snapshot))
+        return 0
+
+    if arguments and arguments[0] in ("--ping", "--shutdown"):
+        try:
+            with TestheadClient() as client:
+                response = client.ping() if arguments[0] == "--ping" else client.shutdown()
+        except (OSError, RuntimeError) as e:
+            print(f"Error: {e}")
+            return 1
+        print(response)
+        return 0
+
+    if len(arguments) < 4:
+        print("Usage: python testhead_client.py <config_file> <sheet_name> <dio_name> <command_component> [...] [--no-coalesce]")
+        print("       python testhead_client.py --ping | --log [count] | --stats [--reset] | --shutdown")
+        print("Start the daemon first: python testhead_control.py --daemon")
+        return 1
+
+    config_file_name, sheet_name, dio_name = arguments[:3]
+    path_names = [name.strip() for name in ", ".join(arguments[3:]).split('|')]
+    try:
+        client = TestheadClient()
+    except DaemonUnavailable:
+        # No daemon: same behaviour (and output) as calling testhead_control.py directly
+        print("No testhead daemon running, executing in this process")
+        import testhead_control
+        sys.argv = [sys.argv[0]] + ([] if coalesce else ["--no-coalesce"]) + arguments
+        try:
+            return 0 if testhead_control.main() else 1
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+    with client:
+        try:
+            response = client.apply_path(config_file_name, dio_name, path_names, sheet_name, coalesce)
+        except (OSError, RuntimeError) as e:
+            # OSError covers a request timeout (socket.timeout) and a dropped connection
+            print(f"✗ Command failed with error: {e}")
+            print("command_success: False")
+            print("Command execution complete. Final status: FAILED")
+            return 1
+    print(f"✓ {len(path_names)} command(s) applied in {response['elapsed_ms']:.1f} ms (daemon)")
+    print("command_success: True")
+    print("Command execution complete. Final status: SUCCESS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
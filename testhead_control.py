@@ -1,9 +1,30 @@
-from accesio import accesio_dio as dio
 import os
-#This script also requires openpyxl "pip install openpyxl"
-import pandas as pd
 import sys # for command line arguments
+# Import-time measurement has to start before the other imports are made. The
+# --import-times flag only counts for a script run; TESTHEAD_IMPORT_TIMES=1 also
+# measures an import of this module (GUI, test executive)
+if os.environ.get("TESTHEAD_IMPORT_TIMES") or (__name__ == "__main__" and "--import-times" in sys.argv):
+    import atexit
+    import startup_profile
+    startup_profile.install()
+    atexit.register(startup_profile.print_report)
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from accesio import accesio_dio as dio
+from accesio.command_compiler import compile_switch_command
+from accesio.dio_registry import get_registry
+# pandas (and openpyxl) are imported only when an Excel workbook has to be parsed
+from config_compiler import CompiledArtifact, is_artifact_path, load_artifact, main as compile_main
 from config_loader import ConfigLoader
+from config_preloader import PRELOAD_WORKERS, find_config_files, preload_configs as start_preload
+from route_timing import RouteTimer, get_route_timings
+from switch_scheduler import RelayTiming, SwitchScheduler
+from testhead_logging import configure_logging, get_logger
+
+logger = get_logger("control")
 
 
 def get_config_path(filename):
@@ -41,6 +62,49 @@ def get_config_path(filename):
     return os.path.join(app_dir, "config", filename)
 
 
+def get_config_dir():
+    """
+    The config/ directory get_config_path searches: next to the executable
+    (or script) if it exists, otherwise in the current working directory.
+    """
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+    else:
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+    config_dir = os.path.join(app_dir, "config")
+    if os.path.isdir(config_dir):
+        return config_dir
+    return os.path.join(os.getcwd(), "config")
+
+
+def preload_configs(config_dir=None, max_workers=PRELOAD_WORKERS):
+    """
+    Compile every platform config in the background (see config_preloader).
+
+    A long-running caller (test executive, AsyncTesthead user) calls this once
+    at startup; afterwards Testhead_Control.run on any of those configs opens
+    it from the in-process cache instead of parsing it.
+
+    Args:
+        config_dir (str): Directory of config files. get_config_dir() if None.
+        max_workers (int): Size of the worker pool.
+
+    Returns:
+        ConfigPreloader: Already started; wait() blocks until it finishes.
+    """
+    return start_preload(find_config_files(config_dir or get_config_dir()), max_workers=max_workers)
+
+
+def open_config(config_file_path):
+    """
+    Open a config file: ConfigLoader for .xlsx/.xls/.json, CompiledArtifact for
+    a .thc artifact written by --compile (paths applied without parsing).
+    """
+    if is_artifact_path(config_file_path):
+        return load_artifact(config_file_path)
+    return ConfigLoader(config_file_path)
+
+
 class Testhead_Control:
     def __init__(self):
         """Initialize instance variables"""
@@ -48,6 +112,8 @@ class Testhead_Control:
         self.dio_model = None
         self.dio = None
         self.device_index = None
+        self.scheduler = None       # SwitchScheduler if the config declares relay timing
+        self.settled_at = None      # time.monotonic() when the last command's relays settled
     
     def run(self, config_file_name, dio_name, command_name, sheet_name):
         """
@@ -56,7 +122,8 @@ class Testhead_Control:
         All parameters are MANDATORY and must be provided.
         
         Args:
-            config_file_name (str): Path to configuration file. Supports both Excel (.xlsx) and JSON (.json) formats.
+            config_file_name (str): Path to configuration file. Supports both Excel (.xlsx) and JSON (.json) formats,
+                                   and compiled artifacts (.thc) from --compile.
                                    Can be absolute path or relative to config/ directory.
                                    Example: "Langley_Testhead Switch Path Configuration.xlsx"
                                    Example: "config/testhead_config.json"
@@ -95,61 +162,51 @@ class Testhead_Control:
         
         self.command_success = False  # Initialize command success status
         
+        # Phase timings of this route (see route_timing), saved for successful runs
+        timer = RouteTimer()
+        
         # Resolve config file path - use get_config_path to search multiple locations
         config_file_name = get_config_path(config_file_name)
-        print(f"Using config file: {config_file_name}")
-        
-        # Use ConfigLoader to handle both Excel and JSON formats
-        config_loader = ConfigLoader(config_file_name)
+        timer.mark("resolve")
+        logger.info("Using config file: %s", config_file_name)
         
-        # Load DIO List
-        dio_list_df = config_loader.load_dio_list()
+        # ConfigLoader for Excel and JSON formats, CompiledArtifact for .thc
+        config_loader = open_config(config_file_name)
+        timer.mark("load")
         
-        # Print preview of the DIO List
-        print("DIO List loaded:")
-        if config_loader.file_format == 'excel':
-            print(dio_list_df.head())
-        else:
-            print(f"Found {len(dio_list_df)} DIO devices")
-
-        # Get the MODEL and HEXADDRESS for the dio_name
-        dio_model, dio_hexaddress = config_loader.get_device_info(dio_name)
-        self.dio_model = dio_model.upper()  # Ensure model is uppercase (needed for set_line method)
-
-        # Load Command List
-        dio_cmdlist_df = config_loader.load_command_list(sheet_name)
-        
-        # Print preview of the Command List
-        print("Command List loaded:")
-        if config_loader.file_format == 'excel':
-            print(dio_cmdlist_df.head())
-        else:
-            print(f"Found {len(dio_cmdlist_df)} commands for {sheet_name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # DIO List and Command List sizes (rows are only counted when asked for)
+            logger.debug("DIO List loaded: %d DIO devices", len(config_loader.get_dio_devices()))
+            logger.debug("Command List loaded: %d commands for %s", config_loader.get_command_count(sheet_name), sheet_name)
 
         # Get the Switch Driver Command for the command name
         switch_driver_command = config_loader.get_switch_command(command_name, sheet_name)
+        timer.mark("lookup")
 
-        # Convert to int
-        device_board_id = int(dio_hexaddress, 16)
-        
-        # Initialize the DIO object with the specified model (needed for all DIO operations)
-        self.dio = dio.AccesDIO(dio_model=self.dio_model)
-        
-        # get the custom programmed board ID from EEPROM at address 0 (needed for all DIO operations)
-        self.device_index = self.dio.get_device_by_eeprom_byte(device_board_id)
-
-        if self.device_index is None:
-            raise RuntimeError(f"Device with board ID {device_board_id} not found.")
-        
-        print(f"Board ID: {device_board_id} found with Device Index: {self.device_index}")
+        # Get the MODEL and HEXADDRESS for the dio_name and attach to the board
+        self.attach_board(config_loader, dio_name)
+        timer.mark("attach")
+        
+        # A compiled artifact already holds the validated port masks for this board's model
+        compiled = None
+        if isinstance(config_loader, CompiledArtifact):
+            compiled = config_loader.get_compiled_command(command_name, sheet_name, self.dio.max_lines)
+        elif switch_driver_command:
+            compiled = compile_switch_command(switch_driver_command, self.dio.max_lines, self.dio_model)
+        timer.mark("compile")
         
         # Process the Switch Driver Command
-        print(f"Processing Switch Driver Command: {switch_driver_command}")
-        self.process_switch_driver_command(switch_driver_command)
+        logger.info("Processing Switch Driver Command: %s", switch_driver_command)
+        self.process_switch_driver_command(switch_driver_command, compiled)
+        timer.mark("write")
 
-        # No raise exception here, print success message and set command_success to True
+        # No raise exception here, log success and set command_success to True
         self.command_success = True
-        print(f"command_success: {self.command_success}")
+        logger.info("command_success: %s", self.command_success)
+        
+        store = get_route_timings()
+        if store is not None:
+            store.record(config_file_name, sheet_name, command_name, timer)
     
     def run_direct_command(self, config_file_name, dio_name, switch_command):
         """
@@ -189,59 +246,173 @@ class Testhead_Control:
         
         # Resolve config file path
         config_file_name = get_config_path(config_file_name)
-        print(f"Using config file: {config_file_name}")
+        logger.info("Using config file: %s", config_file_name)
+        
+        # ConfigLoader for Excel and JSON formats, CompiledArtifact for .thc
+        config_loader = open_config(config_file_name)
+        
+        # Get the MODEL and HEXADDRESS for the dio_name and attach to the board
+        self.attach_board(config_loader, dio_name)
+        
+        # Process the Switch Driver Command directly
+        logger.info("Processing Direct Switch Driver Command: %s", switch_command)
+        self.process_switch_driver_command(switch_command)
+        
+        # Set command success to True
+        self.command_success = True
+        logger.info("command_success: %s", self.command_success)
+
+    def run_multi_board(self, config_file_name, board_commands, sheet_name=None):
+        """
+        Apply one logical step that touches several boards, one worker thread per board.
+        
+        All lookups are resolved before any board is touched, then each board's
+        command is written in parallel so the blocking DLL calls overlap: step
+        latency is that of the slowest board instead of the sum.
+        
+        Args:
+            config_file_name (str): Path to configuration file (Excel or JSON).
+            
+            board_commands (dict): dio_name -> command for that board.
+                                  With sheet_name: PathName to look up, e.g. {"TestHead": "Reset", "GPIO": "Fan ON"}
+                                  Without sheet_name: direct switch command, e.g. {"TestHead": "0;0B4,1"}
+            
+            sheet_name (str): Lookup table/sheet for PathNames. None for direct switch commands.
+        
+        Returns:
+            dict: dio_name -> {"success": bool, "elapsed_s": float, "error": str or None,
+                               "settled_at": float or None}.
+                  Sets self.command_success to True only if every board succeeded.
+        
+        Raises:
+            ValueError: If a parameter is missing, a name or PathName is unknown,
+                        or two names share the same board.
+        """
+        if not config_file_name:
+            raise ValueError("config_file_name is required. Must be path to Excel (.xlsx) or JSON (.json) file.")
+        if not board_commands:
+            raise ValueError("board_commands is required. Must map at least one DIO name to a command.")
+        
+        self.command_success = False
+        
+        config_file_name = get_config_path(config_file_name)
+        logger.info("Using config file: %s", config_file_name)
+        config_loader = open_config(config_file_name)
+        
+        # Resolve every board and command up front so a typo fails before any relay moves
+        switch_commands = {}
+        boards_seen = {}
+        for dio_name, command in board_commands.items():
+            _, dio_hexaddress = config_loader.get_device_info(dio_name)
+            board_id = int(dio_hexaddress, 16)
+            if board_id in boards_seen:
+                raise ValueError(f"DIO names '{boards_seen[board_id]}' and '{dio_name}' refer to the same board ID {board_id}.")
+            boards_seen[board_id] = dio_name
+            if sheet_name:
+                switch_commands[dio_name] = config_loader.get_switch_command(command, sheet_name)
+            else:
+                switch_commands[dio_name] = command
+        
+        def apply_to_board(dio_name):
+            # Each board gets its own Testhead_Control so attach state is not shared
+            worker = Testhead_Control()
+            start = time.perf_counter()
+            try:
+                worker.attach_board(config_loader, dio_name)
+                compiled = None
+                if sheet_name and isinstance(config_loader, CompiledArtifact):
+                    compiled = config_loader.get_compiled_command(board_commands[dio_name], sheet_name, worker.dio.max_lines)
+                worker.process_switch_driver_command(switch_commands[dio_name], compiled)
+                return {"success": True, "elapsed_s": time.perf_counter() - start, "error": None,
+                        "settled_at": worker.settled_at}
+            except Exception as e:
+                return {"success": False, "elapsed_s": time.perf_counter() - start, "error": str(e),
+                        "settled_at": None}
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(switch_commands)) as executor:
+            futures = {dio_name: executor.submit(apply_to_board, dio_name) for dio_name in switch_commands}
+            results = {dio_name: future.result() for dio_name, future in futures.items()}
+        elapsed = time.perf_counter() - start
+        
+        for dio_name, result in results.items():
+            if result["success"]:
+                logger.info("  %s: OK in %.1f ms", dio_name, result['elapsed_s'] * 1000)
+            else:
+                logger.error("  %s: FAILED (%s) in %.1f ms", dio_name, result['error'], result['elapsed_s'] * 1000)
+        logger.info("Step completed on %d board(s) in %.1f ms", len(results), elapsed * 1000)
         
-        # Use ConfigLoader to handle both Excel and JSON formats
-        config_loader = ConfigLoader(config_file_name)
+        self.command_success = all(result["success"] for result in results.values())
+        logger.info("command_success: %s", self.command_success)
+        return results
+
+    def attach_board(self, config_loader, dio_name):
+        """
+        Resolve dio_name to its board and attach the shared DIO object.
         
-        # Load DIO List
-        dio_list_df = config_loader.load_dio_list()
+        Sets self.dio_model, self.device_index and self.dio, and self.scheduler
+        if the config declares relay timing for this board.
         
-        # Get the MODEL and HEXADDRESS for the dio_name
+        Raises:
+            ValueError: If dio_name is not in the DIO list or its relay timing is invalid.
+            RuntimeError: If the board is not attached.
+        """
         dio_model, dio_hexaddress = config_loader.get_device_info(dio_name)
-        self.dio_model = dio_model.upper()
+        self.dio_model = dio_model.upper()  # Ensure model is uppercase (needed for set_line method)
         
         # Convert to int
         device_board_id = int(dio_hexaddress, 16)
         
-        # Initialize the DIO object with the specified model
-        self.dio = dio.AccesDIO(dio_model=self.dio_model)
-        
-        # Get the custom programmed board ID from EEPROM at address 0
-        self.device_index = self.dio.get_device_by_eeprom_byte(device_board_id)
+        # Get the device index for the custom programmed board ID (cached per process)
+        self.device_index = self.find_device_index(config_loader, device_board_id)
         
         if self.device_index is None:
             raise RuntimeError(f"Device with board ID {device_board_id} not found.")
         
-        print(f"Board ID: {device_board_id} found with Device Index: {self.device_index}")
+        # Get the shared DIO object for this board (library is loaded once per process)
+        self.dio = get_registry().get_dio(self.dio_model, self.device_index)
         
-        # Process the Switch Driver Command directly
-        print(f"Processing Direct Switch Driver Command: {switch_command}")
-        self.process_switch_driver_command(switch_command)
+        logger.debug("Board ID: %d found with Device Index: %d", device_board_id, self.device_index)
         
-        # Set command success to True
-        self.command_success = True
-        print(f"command_success: {self.command_success}")
+        # Relay settle / break-before-make timing is optional; without it every
+        # command stays a single write with no waiting
+        timing = RelayTiming.from_rows(config_loader.load_relay_timing(), dio_name, self.dio.max_lines)
+        self.scheduler = None if timing.is_empty else SwitchScheduler(self.dio, self.device_index, timing)
+
+    def find_device_index(self, config_loader, device_board_id):
+        """
+        Resolve a board ID to its device index through the process-wide discovery cache.
+        
+        Every board in the config's DIO_List is registered, so the first lookup
+        enumerates them all and later commands (for any of those boards) skip
+        the USB scan until a lookup misses or a hot-plug error is seen.
+        """
+        board_ids = []
+        for _, _, address in config_loader.get_dio_devices():
+            try:
+                board_ids.append(int(str(address), 16))
+            except ValueError:
+                pass  # Invalid HEXADDRESS entries only matter if they are selected
+        registry = get_registry()
+        registry.discovery.register_boards(board_ids)
+        return registry.find_device_index(device_board_id)
 
     # ***********************************
     # Excel and Dataframe Related Functions
     # ***********************************
     def read_excelfile_sheet_to_df(self, excel_file_path, excel_sheet_name, header_row_num=0):
+        #This function also requires openpyxl "pip install openpyxl"
+        import pandas as pd
         if not os.path.exists(excel_file_path):
-            print(f"Excel file not found at {excel_file_path}")
             raise FileNotFoundError(f"Excel file not found at {excel_file_path}")
-        else:
-            print(f"Excel file found at {excel_file_path}")
+        logger.debug("Excel file found at %s", excel_file_path)
         #Check if Sheet exists
         xl = pd.ExcelFile(excel_file_path)
         if excel_sheet_name not in xl.sheet_names:
-            print(f"Sheet {excel_sheet_name} not found in {excel_file_path}")
             raise ValueError(f"Sheet {excel_sheet_name} not found in {excel_file_path}")
-        else:
-            print(f"Sheet '{excel_sheet_name}' found")
         #Read Excel file to DataFrame
         #Read all data as string
-        print(f"Reading Excel file to DataFrame with header row at: {header_row_num}")
+        logger.debug("Reading sheet '%s' to DataFrame with header row at: %d", excel_sheet_name, header_row_num)
         df = pd.read_excel(excel_file_path, sheet_name=excel_sheet_name, dtype=str, header=header_row_num, keep_default_na=False)
         return df
 
@@ -254,10 +425,8 @@ class Testhead_Control:
         ]
         for col in required_columns:
             if col not in self.dio_list_df.columns:
-                print(f"Column '{col}' not found in the DataFrame")
                 raise ValueError(f"Column '{col}' not found in the DataFrame")
-                sys.exit(1)
-        print(f"All required columns found in the DataFrame")
+        logger.debug("All required columns found in the DataFrame")
 
     def dio_cmdlist_validate_column_names(self):
         #Check if all required columns are present
@@ -267,10 +436,8 @@ class Testhead_Control:
         ]
         for col in required_columns:
             if col not in self.dio_cmdlist_df.columns:
-                print(f"Column '{col}' not found in the DataFrame")
                 raise ValueError(f"Column '{col}' not found in the DataFrame")
-                sys.exit(1)
-        print(f"All required columns found in the DataFrame")
+        logger.debug("All required columns found in the DataFrame")
 
     # Lookup NAME to MODEL and HEXADDRESS in dio_list_df
     def dio_name_to_model_and_address(self, dio_name):
@@ -280,11 +447,11 @@ class Testhead_Control:
         
         model = self.dio_list_df.loc[self.dio_list_df[self.DIO_List_NAME_Columnname] == dio_name,
                                      self.DIO_List_MODEL_Columnname].values[0]
-        print(f"DIO name '{dio_name}' corresponds to MODEL '{model}'")
+        logger.debug("DIO name '%s' corresponds to MODEL '%s'", dio_name, model)
 
         address = self.dio_list_df.loc[self.dio_list_df[self.DIO_List_NAME_Columnname] == dio_name, 
                                        self.DIO_List_HEXADDRESS_Columnname].values[0]
-        print(f"DIO name '{dio_name}' corresponds to HEXADDRESS '{address}'")
+        logger.debug("DIO name '%s' corresponds to HEXADDRESS '%s'", dio_name, address)
         return model, address
 
     # Lookup PathName to SwitchDriverCommand in dio_cmdlist_df
@@ -295,7 +462,7 @@ class Testhead_Control:
         
         command = self.dio_cmdlist_df.loc[self.dio_cmdlist_df[self.DIO_CmdList_PathName_Columnname] == dio_pathname, 
                                           self.DIO_CmdList_SwitchDriverCommand_Columnname].values[0]
-        print(f"DIO pathname '{dio_pathname}' corresponds to SwitchDriverCommand '{command}'")
+        logger.debug("DIO pathname '%s' corresponds to SwitchDriverCommand '%s'", dio_pathname, command)
         return command
 
     # ***********************************
@@ -306,24 +473,67 @@ class Testhead_Control:
         if not (0 <= line_number < self.dio.max_lines):
             raise ValueError(f"Line number {line_number} exceeds max for model {self.dio_model}")
         self.dio.write_line(self.device_index, line_number, value)
-        print(f"Line {line_number} set to {value}")
+        logger.debug("Line %d set to %d", line_number, value)
 
     def set_groupportbit_preserve(self, groupportbit, value):
         """Set a group port bit to a specific value without affecting other bits."""
         self.dio.write_groupportbit_preserve(self.device_index, groupportbit, value)
-        print(f"Group Port Bit {groupportbit} set to {value} (preserved)")
+        logger.debug("Group Port Bit %s set to %d (preserved)", groupportbit, value)
 
     def set_line_preserve(self, line_number, value):
         """Set a digital output line to a specific value without affecting other lines."""
         if not (0 <= line_number < self.dio.max_lines):
             raise ValueError(f"Line number {line_number} exceeds max for model {self.dio_model}")
         self.dio.write_line_preserve(self.device_index, line_number, value)
-        print(f"Line {line_number} set to {value} (preserved)")
+        logger.debug("Line %d set to %d (preserved)", line_number, value)
+
+    def read_state(self):
+        """
+        Return the port image (one byte per port) of the attached board.
+
+        Uses the shadow of the last write when it is known, otherwise reads the board.
+        """
+        if self.dio is None:
+            raise RuntimeError("No board attached. Run a command or attach_board() first.")
+        image = self.dio.get_shadow(self.device_index)
+        if image is None:
+            image = self.dio.read_all_lines(self.device_index)
+        return image
 
     def reset_all_lines_low(self):
         """Reset all digital output lines to low."""
         self.dio.reset_all_lines_low(self.device_index)
-        print("All lines reset to low")
+        logger.debug("All lines reset to low")
+
+    def apply_compiled(self, compiled):
+        """
+        Write a compiled command to the attached board (through the scheduler
+        if the config declares relay timing) and set self.settled_at.
+
+        Args:
+            compiled (CompiledCommand): Command compiled for this board's model.
+
+        Returns:
+            list: Indexes of the ports whose value changed. Empty if the relays
+                  were already in the requested state.
+
+        Raises:
+            DIOError: If a DLL call fails. The board is rescanned on the next lookup.
+        """
+        try:
+            if self.scheduler is not None:
+                result = self.scheduler.apply(compiled)
+                self.settled_at = result.settled_at
+                if result.writes > 1:
+                    logger.debug("Break-before-make: opened %d line(s) before closing %d", len(result.opened), len(result.closed))
+                return result.changed_ports
+            changed_ports = self.dio.write_compiled_command(self.device_index, compiled)
+            self.settled_at = time.monotonic()
+            return changed_ports
+        except dio.DIOError as e:
+            # Board may have been unplugged or re-enumerated: rescan on the next command
+            get_registry().discovery.report_dll_error(e.code)
+            raise
 
     # Function to process the Switch Driver Command
     # Example command: "0;0B4,1;0B5,1;0B6,1;0B7,1;0B1,1;3A1,1"
@@ -331,42 +541,42 @@ class Testhead_Control:
     # '0' means reset all lines low
     # It's possible to only have a single command like "0B4,1"
     # Only '0' is acceptable as single part. Other commands must be 2-part like "0B4,1" or "0B4,0"
-    def process_switch_driver_command(self, command):
-        """Process the Switch Driver Command to set lines."""
+    def process_switch_driver_command(self, command, compiled=None):
+        """
+        Process the Switch Driver Command to set lines.
+
+        The whole command is compiled into a final port image first and then
+        written with a single DIO_Configure, instead of one read-modify-write
+        per token. If the config declares relay timing, the scheduler splits
+        the write for break-before-make and waits until the changed relays have
+        settled. self.settled_at is set either way.
+        
+        Args:
+            command (str): Switch driver command string.
+            compiled (CompiledCommand): Precompiled form of command for this
+                                        board, e.g. from a .thc artifact. Compiled here if None.
+        """
         if not command:
-            print("No command provided.")
+            logger.warning("No command provided.")
             return
         
-        # Split commands by ';' or also accept single command without ';'
-        commands = command.split(';')
-        if len(commands) == 1 and ',' in commands[0]:
-            # Single command without ';'
-            commands = [commands[0]]
-        elif len(commands) == 1:
-            # Single command with no ',' or ';'
-            commands = [f"{commands[0]}"]
-        elif len(commands) == 0:
-            print("No valid commands found in the provided command string.")
+        # Memoized: replaying a path reuses its compiled form without re-parsing
+        if compiled is None:
+            compiled = compile_switch_command(command, self.dio.max_lines, self.dio_model)
+        logger.debug("Processing commands: %s", compiled.tokens)
+        for error in compiled.errors:
+            logger.warning("%s (at position %d)", error, error.position)
+        
+        changed_ports = self.apply_compiled(compiled)
+        if not logger.isEnabledFor(logging.DEBUG):
             return
-        print(f"Processing commands: {commands}")
-        for cmd in commands:
-            # If command is '0', set all pins to output and reset all lines to low
-            if cmd == '0':
-                self.dio.configure_output(self.device_index, {i: 0 for i in range(self.dio.max_lines)}, default_low=True)
-                self.reset_all_lines_low()
-                continue
-            elif ',' not in cmd:
-                print(f"Invalid command format: {cmd}. Expected format is 'line,value'.")
-                continue
-            else:
-                # Split the command into line and value
-                line, value = cmd.split(',')
-                try:
-                    groupportbit = line.strip()
-                    value = int(value.strip())
-                    self.set_groupportbit_preserve(groupportbit, value)
-                except ValueError as e:
-                    print(f"Error processing command '{cmd}': {e}")
+        if not changed_ports and not compiled.is_noop:
+            stats = self.dio.get_write_stats(self.device_index)
+            logger.debug("Relays already in requested state, write skipped (%d write(s) elided)", stats['elided'])
+        if compiled.reset:
+            logger.debug("All lines reset to low")
+        for groupportbit, value in compiled.bits:
+            logger.debug("Group Port Bit %s set to %d (preserved)", groupportbit, value)
 
 
 # Main for testing
@@ -379,11 +589,154 @@ class Testhead_Control:
 # "C:\gitrepos\qsctestexecutive\Resources\LookupData\Amplifier_Testhead Switch Path Configuration.xlsx" "TestHead" "Configure Load Relays to 8ohms"
 # "C:\gitrepos\qsctestexecutive\Resources\LookupData\Amplifier_Testhead Switch Path Configuration.xlsx" "TestHead" "CMRR Test Mode ON"
 
+def parse_board_commands(arguments):
+    """Parse CLI "dio_name=command" arguments into a dict (split at the first '=')."""
+    board_commands = {}
+    for argument in arguments:
+        dio_name, separator, command = argument.partition('=')
+        if not separator or not dio_name.strip() or not command.strip():
+            raise ValueError(f"Invalid board command '{argument}'. Expected format is 'dio_name=command'.")
+        if dio_name.strip() in board_commands:
+            raise ValueError(f"DIO name '{dio_name.strip()}' given more than once.")
+        board_commands[dio_name.strip()] = command.strip()
+    return board_commands
+
+
+def main_multi_board(arguments, direct=False):
+    """
+    Command-line entry point for one step across several boards (applied in parallel).
+    
+    --multi <config_file> <sheet_name> <dio_name>=<PathName> [<dio_name>=<PathName> ...]
+    --multi-direct <config_file> <dio_name>=<switch_command> [<dio_name>=<switch_command> ...]
+    
+    Returns:
+        bool: True if every board succeeded.
+    """
+    min_args = 2 if direct else 3
+    if len(arguments) < min_args:
+        print("Usage: python testhead_control.py --multi <config_file> <sheet_name> <dio_name>=<PathName> [...]")
+        print("       python testhead_control.py --multi-direct <config_file> <dio_name>=<switch_command> [...]")
+        print("")
+        print("Example:")
+        print("  testhead_control.py --multi \"Amplifier_Testhead Switch Path Configuration.json\" \"Model_Common\" \"TestHead=Reset\" \"CMProd_TestHead=Reset\"")
+        print("")
+        raise ValueError(f"Invalid number of arguments. Expected at least {min_args}, got {len(arguments)}")
+    
+    config_file_name = arguments[0]
+    sheet_name = None if direct else arguments[1]
+    board_commands = parse_board_commands(arguments[1 if direct else 2:])
+    
+    testhead = Testhead_Control()
+    try:
+        testhead.run_multi_board(config_file_name, board_commands, sheet_name)
+    except Exception as e:
+        print(f"✗ Multi-board step failed with error: {e}")
+    
+    print(f"Command execution complete. Final status: {'SUCCESS' if testhead.command_success else 'FAILED'}")
+    return testhead.command_success
+
+
+def run_command_list(config_file_name, sheet_name, dio_name, command_names, coalesce=True):
+    """
+    Apply "A|B|C" from the command line through one TestheadSession.
+    
+    The config is loaded and the board attached once. With coalesce, every
+    PathName is looked up before a relay moves and only the net final port
+    image is written (resets honored). Without, each path is looked up and
+    applied in turn and the run stops at the first failure.
+    
+    Returns:
+        bool: True if every command was applied.
+    """
+    from testhead_session import TestheadSession
+    
+    try:
+        session = TestheadSession.open(config_file_name, dio_name)
+    except Exception as e:
+        print(f"✗ Commands failed with error: {e}")
+        return False
+    with session:
+        if coalesce:
+            print(f"--- Coalescing {len(command_names)} commands into one write ---")
+            try:
+                session.apply_paths(command_names, sheet_name)
+            except Exception as e:
+                print(f"✗ Commands failed with error: {e}")
+                return False
+            print(f"✓ {len(command_names)} commands applied")
+            return True
+        
+        for idx, command_name in enumerate(command_names, 1):
+            print(f"--- Executing command {idx}/{len(command_names)}: {command_name} ---")
+            try:
+                session.apply_path(command_name, sheet_name)
+            except Exception as e:
+                print(f"✗ Command {idx} failed with error: {e}")
+                return False  # Stop on first error
+            print(f"✓ Command {idx} completed successfully")
+        return True
+
+
 def main():
     """
     Main entry point for command-line usage.
     Supports executing multiple commands sequentially.
+    
+    Returns:
+        bool: The final status printed on the last line (True for SUCCESS).
+              Modes that exit with their own code (--compile, --plan, --routes,
+              --daemon) raise SystemExit instead.
     """
+    # Import-time measurement mode: the report is printed at exit (see top of file)
+    if "--import-times" in sys.argv:
+        sys.argv.remove("--import-times")
+        if len(sys.argv) == 1:
+            return True  # Only measure startup
+    
+    # Quiet by default: -v shows each step, -vv every bit (or TESTHEAD_LOG_LEVEL=INFO / DEBUG)
+    level = None
+    for flag, flag_level in (("-vv", logging.DEBUG), ("-v", logging.INFO), ("--verbose", logging.INFO)):
+        if flag in sys.argv:
+            sys.argv.remove(flag)
+            level = flag_level if level is None else min(level, flag_level)
+    configure_logging(level)
+    
+    # DLL call timing: collect for this run and print the table at exit
+    if "--stats" in sys.argv:
+        sys.argv.remove("--stats")
+        import atexit
+        from accesio.dio_stats import format_stats, get_dio_stats
+        get_dio_stats().enable()
+        atexit.register(lambda: print("\n" + format_stats(get_dio_stats().snapshot())))
+    
+    # "A|B|C" writes only the net final state unless intermediate states are asked for
+    coalesce = "--no-coalesce" not in sys.argv
+    if not coalesce:
+        sys.argv.remove("--no-coalesce")
+    
+    # Offline compile: validate every path and write a .thc artifact
+    if len(sys.argv) > 1 and sys.argv[1] == "--compile":
+        sys.exit(compile_main(sys.argv[2:]))
+    
+    # Plan mode: compile a whole route sequence, then run it in one session per board
+    if len(sys.argv) > 1 and sys.argv[1] == "--plan":
+        from plan_runner import main as plan_main
+        sys.exit(plan_main(sys.argv[2:]))
+    
+    # Route latency report: slowest routes, p95 regressions against a baseline
+    if len(sys.argv) > 1 and sys.argv[1] == "--routes":
+        from route_timing import main as routes_main
+        sys.exit(routes_main(sys.argv[2:]))
+    
+    # Resident mode: keep configs and boards open, serve testhead_client.py requests
+    if len(sys.argv) > 1 and sys.argv[1] == "--daemon":
+        from testhead_daemon import main as daemon_main
+        sys.exit(daemon_main(sys.argv[2:]))
+    
+    # Multi-board mode: one step, several boards, applied in parallel
+    if len(sys.argv) > 1 and sys.argv[1] in ("--multi", "--multi-direct"):
+        return main_multi_board(sys.argv[2:], direct=(sys.argv[1] == "--multi-direct"))
+    
     # Accept 4+ arguments from command line: config_file, sheet_name, dio_name, command_components...
     # Minimum 4 arguments: config_file, sheet_name, dio_name, and at least one command component
     if len(sys.argv) < 5:
@@ -395,6 +748,29 @@ def main():
         print("")
         print("Multiple commands (separate with '|' for multiple commands):")
         print("  testhead_control.py \"config.xlsx\" \"Model_Common\" \"TestHead\" \"Reset|Generator 1|Analyzer 2\"")
+        print("  (config loaded once, net final state written once; add --no-coalesce to apply each in turn)")
+        print("")
+        print("Several boards in one step (applied in parallel):")
+        print("  testhead_control.py --multi \"config.json\" \"Model_Common\" \"TestHead=Reset\" \"GPIO=Reset\"")
+        print("  testhead_control.py --multi-direct \"config.json\" \"TestHead=0;0B4,1\" \"GPIO=0A1,1\"")
+        print("")
+        print("Validate a config offline and write a compiled artifact (then pass the .thc as config_file):")
+        print("  testhead_control.py --compile \"config.xlsx\" [output.thc] [--allow-errors]")
+        print("")
+        print("Run a plan file (ordered steps, compiled before any relay moves; --check needs no hardware):")
+        print("  testhead_control.py --plan \"plan.json\" [--check] [--report report.json]")
+        print("")
+        print("Output: warnings only by default; add -v for each step, -vv for every bit (or set TESTHEAD_LOG_LEVEL)")
+        print("DLL call timing: add --stats to print per-device call counts and latency histograms at exit")
+        print("")
+        print("Route latency (per platform/sheet/PathName and phase; exit code 1 on a p95 regression):")
+        print("  testhead_control.py --routes [--top N] [--baseline FILE] [--save-baseline [FILE]] [--reset]")
+        print("")
+        print("Resident daemon (then run steps with testhead_client.py and the same arguments):")
+        print("  testhead_control.py --daemon [--port N] [--no-preload]")
+        print("")
+        print("Startup budget (import time per module, printed at exit; also TESTHEAD_IMPORT_TIMES=1):")
+        print("  testhead_control.py --import-times \"config.json\" \"Model_Common\" \"TestHead\" \"Reset\"")
         print("")
         raise ValueError(f"Invalid number of arguments. Expected at least 4, got {len(sys.argv) - 1}")
     
@@ -421,6 +797,11 @@ def main():
     print(f"commands to execute: {command_names}")
     print("")
     
+    if len(command_names) > 1:
+        command_success = run_command_list(config_file_name, sheet_name, dio_name, command_names, coalesce)
+        print(f"Command execution complete. Final status: {'SUCCESS' if command_success else 'FAILED'}")
+        return command_success
+    
     # Execute each command sequentially
     testhead = Testhead_Control()
     for idx, command_name in enumerate(command_names, 1):
@@ -442,6 +823,7 @@ def main():
         print("")
     
     print(f"Command execution complete. Final status: {'SUCCESS' if testhead.command_success else 'FAILED'}")
+    return testhead.command_success
 
     # ************************************
     # Example usage of Testhead_Control class and test code
@@ -0,0 +1,216 @@
+"""
+TestHead Daemon
+Resident process that keeps configs compiled and boards attached, so a test
+executive step costs one localhost round trip plus the USB write instead of a
+whole testhead_control.exe start. Requests and responses are JSON lines (see
+testhead_client).
+
+Start with:  python testhead_control.py --daemon [--port N] [--no-preload]
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from accesio import dio_registry
+from accesio.dio_stats import STATS_ENV, get_dio_stats
+from testhead_client import DEFAULT_HOST, daemon_port
+from testhead_control import get_config_path, preload_configs
+from testhead_logging import LOG_LEVEL_ENV, configure_logging, enable_ring_buffer, get_logger, get_ring_buffer
+from testhead_session import TestheadSession
+
+logger = get_logger("daemon")
+
+# Log level of the daemon console unless one is set on the command line or in TESTHEAD_LOG_LEVEL
+DAEMON_LOG_LEVEL = "INFO"
+
+
+class TestheadDaemon:
+    """
+    Serves apply_path / apply_command / reset / read_state requests from
+    local clients, one thread per connection.
+
+    Each (config file, DIO name) pair gets a TestheadSession on first use and
+    keeps it, so later requests only look the path up and write. Before each
+    request the config file is checked for edits (one stat). Requests on the
+    same board are serialized by its session; different boards run in parallel.
+
+    Only localhost is served: the port is bound to 127.0.0.1. The "log"
+    request returns the most recent records of the ring buffer (see
+    testhead_logging) for post-mortem after a failed step, and "stats" the
+    DLL call timings (see accesio.dio_stats), collected unless
+    TESTHEAD_DIO_STATS=0.
+
+    Args:
+        port (int): TCP port. daemon_port() if None.
+        preload (bool): Compile every config in config/ at startup.
+    """
+
+    def __init__(self, port=None, preload=True):
+        self.port = port or daemon_port()
+        self.preload = preload
+        self._sessions = {}     # (config path, dio_name) -> TestheadSession
+        self._sessions_lock = threading.Lock()
+        self._server = None
+        self.requests = 0
+
+    # ***********************************
+    # Server
+    # ***********************************
+    def serve_forever(self):
+        """Serve until a shutdown request (or Ctrl+C), then close every session."""
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def handle(self):
+                for line in self.rfile:
+                    response = daemon.handle_line(line)
+                    self.wfile.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b"\n")
+                    if response.get("shutdown"):
+                        threading.Thread(target=daemon._server.shutdown, daemon=True).start()
+                        return
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = os.name != 'nt'   # On Windows it would let a second daemon share the port
+            daemon_threads = True
+
+        if self.preload:
+            preloader = preload_configs()
+            preloader.wait()
+            logger.info("%s", preloader.summary())
+        self._server = Server((DEFAULT_HOST, self.port), Handler)
+        logger.info("Testhead daemon listening on %s:%d (pid %d)", DEFAULT_HOST, self.port, os.getpid())
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            self.close()
+            logger.info("Testhead daemon stopped")
+
+    def close(self):
+        """Closes every session and releases the DLL."""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+        dio_registry.shutdown()
+
+    # ***********************************
+    # Requests
+    # ***********************************
+    def handle_line(self, line):
+        """
+        Handle one request line.
+
+        Returns:
+            dict: Response with "ok" True plus result fields, or False plus "error".
+        """
+        start = time.perf_counter()
+        with self._sessions_lock:
+            self.requests += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            response = self.handle(request)
+            response["ok"] = True
+        except Exception as e:
+            logger.warning("Request failed: %s: %s", type(e).__name__, e)
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        response["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return response
+
+    def handle(self, request):
+        """
+        Dispatch a decoded request.
+
+        Raises:
+            ValueError: If op or a required field is missing or unknown.
+        """
+        op = request.get("op")
+        if op == "ping":
+            return {"pid": os.getpid(), "sessions": len(self._sessions), "requests": self.requests}
+        if op == "shutdown":
+            return {"shutdown": True}
+        if op == "stats":
+            # DLL call counters and latency histograms since startup or the last reset
+            stats = get_dio_stats()
+            snapshot = stats.snapshot()
+            if request.get("reset"):
+                stats.reset()
+            return {"stats": snapshot}
+        if op == "log":
+            # Recent records for post-mortem, including DEBUG ones the console does not show
+            ring = get_ring_buffer()
+            return {"lines": ring.lines(request.get("count")) if ring is not None else []}
+        if op not in ("apply_path", "apply_command", "reset", "read_state"):
+            raise ValueError(f"Unknown op '{op}'. Expected apply_path, apply_command, reset, read_state, stats, log, ping or shutdown")
+
+        session = self._session(request.get("config"), request.get("dio"))
+        session.check_for_changes()
+        if op == "apply_path":
+            paths = request.get("paths")
+            if isinstance(paths, str):
+                paths = [paths]
+            session.apply_paths(paths, request.get("sheet"), coalesce=request.get("coalesce", True))
+            return {}
+        if op == "apply_command":
+            session.apply_command(request.get("command"))
+            return {}
+        if op == "reset":
+            session.reset()
+            return {}
+        return {"state": session.state()}
+
+    def _session(self, config_file_name, dio_name):
+        if not config_file_name:
+            raise ValueError("config is required. Must be path to Excel (.xlsx) or JSON (.json) file.")
+        if not dio_name:
+            raise ValueError("dio is required. Must match a NAME in the DIO_List.")
+        key = (os.path.abspath(get_config_path(config_file_name)), dio_name)
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                # Opened under the lock: two first requests for a board attach it once
+                session = self._sessions[key] = TestheadSession.open(key[0], dio_name)
+            return session
+
+
+def main(arguments):
+    """
+    Daemon entry point: [--port N] [--no-preload].
+
+    Returns:
+        int: Process exit code.
+    """
+    port = None
+    preload = True
+    arguments = list(arguments)
+    if "--no-preload" in arguments:
+        arguments.remove("--no-preload")
+        preload = False
+    if arguments[:1] == ["--port"] and len(arguments) > 1:
+        port = int(arguments[1])
+        arguments = arguments[2:]
+    if arguments:
+        print("Usage: python testhead_control.py --daemon [--port N] [--no-preload]")
+        return 1
+    # INFO unless TESTHEAD_LOG_LEVEL or -v/-vv already asked for a level
+    if not os.environ.get(LOG_LEVEL_ENV) and logger.getEffectiveLevel() > logging.INFO:
+        configure_logging(DAEMON_LOG_LEVEL)
+    if get_ring_buffer() is None:
+        enable_ring_buffer()
+    if os.environ.get(STATS_ENV, "").strip().lower() not in ("0", "false", "off", "no"):
+        get_dio_stats().enable()
+    TestheadDaemon(port=port, preload=preload).serve_forever()
+    return 0
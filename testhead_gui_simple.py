@@ -15,6 +15,12 @@ try:
 except ImportError:
     PANDAS_AVAILABLE = False
 
+# How often the selected config file is checked for edits (one stat per poll)
+CONFIG_POLL_MS = 2000
+
+# How often the status bar shows background preload progress, until it finishes
+PRELOAD_POLL_MS = 200
+
 
 class TestHeadGUI:
     def __init__(self, root):
@@ -28,6 +34,8 @@ class TestHeadGUI:
         self.current_lookup_table = None
         self.config_files = []
         self.lookup_tables = []
+        self.preloader = None       # ConfigPreloader compiling every platform config in the background
+        self.platform_loaders = {}  # config path -> ConfigLoader, reused when switching back
         
         # Get app directory for finding config files
         if getattr(sys, 'frozen', False):
@@ -42,6 +50,9 @@ class TestHeadGUI:
         
         # Load available config files
         self.load_config_files()
+        
+        # Pick up edits to the selected config without restarting
+        self.root.after(CONFIG_POLL_MS, self.poll_config_changes)
     
     def create_widgets(self):
         """Create all GUI widgets"""
@@ -188,6 +199,10 @@ class TestHeadGUI:
         status_frame = ttk.Frame(main_frame)
         status_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
+        self.preload_var = tk.StringVar(value="")
+        preload_label = ttk.Label(status_frame, textvariable=self.preload_var, relief=tk.SUNKEN, anchor=tk.E)
+        preload_label.pack(side=tk.RIGHT, padx=5)
+        
         self.status_var = tk.StringVar(value="Ready")
         status_label = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_label.pack(fill=tk.X, padx=5)
@@ -206,6 +221,7 @@ class TestHeadGUI:
                     files.append(file)
             
             self.config_files = sorted(files)
+            self.start_preload()
             self.apply_file_type_filter()
             
             self.status_var.set(f"Loaded {len(self.config_files)} configuration file(s)")
@@ -214,6 +230,24 @@ class TestHeadGUI:
             messagebox.showerror("Error", f"Failed to load config files: {str(e)}")
             self.status_var.set("Error loading config files")
     
+    def start_preload(self):
+        """Compile every platform config on worker threads so switching platforms is a cache hit"""
+        from config_preloader import preload_configs
+        paths = [os.path.join(self.config_dir, name) for name in self.config_files]
+        self.preloader = preload_configs(paths)
+        self.poll_preload()
+    
+    def poll_preload(self):
+        """Show preload progress in the status bar (Tk thread) until every config is loaded"""
+        if self.preloader is None:
+            return
+        self.preload_var.set(self.preloader.summary())
+        if not self.preloader.is_done():
+            self.root.after(PRELOAD_POLL_MS, self.poll_preload)
+        else:
+            for status in self.preloader.failures():
+                print(f"Warning: could not preload {status.path}: {status.error}")
+    
     def apply_file_type_filter(self):
         """Filter config files based on Platform File Type selection"""
         file_type = self.file_type_var.get()
@@ -252,9 +286,15 @@ class TestHeadGUI:
             config_path = os.path.join(self.config_dir, platform_file)
             self.filepath_var.set(config_path)
             
-            # Load configuration using config_loader
+            # Load configuration using config_loader (compiled by the preloader, or
+            # waits for it if that file is still being compiled)
             from config_loader import ConfigLoader
-            self.config_loader = ConfigLoader(config_path)
+            self.config_loader = self.platform_loaders.get(config_path)
+            if self.config_loader is None:
+                self.config_loader = ConfigLoader(config_path)
+                self.platform_loaders[config_path] = self.config_loader
+            else:
+                self.config_loader.check_for_changes()  # Edited while another platform was shown
             
             # Determine file type and update display
             if platform_file.endswith('.json'):
@@ -263,25 +303,15 @@ class TestHeadGUI:
                 self.file_type_var.set("EXCEL")
             
             # Load lookup tables (sheets or JSON keys)
-            # Filter out system sheets: Rev History, DIO_List, Reference
-            system_sheets = ['Rev History', 'DIO_List']
+            # Filter out system sheets: Rev History, DIO_List, Relay_Timing, Reference
+            system_sheets = ['Rev History', 'DIO_List', 'Relay_Timing']
             
-            if self.config_loader.file_format == 'excel':
-                import pandas as pd
-                xl = pd.ExcelFile(config_path)
-                # Get all sheets except system sheets and those starting with "Reference"
-                self.lookup_tables = [
-                    sheet for sheet in xl.sheet_names 
-                    if sheet not in system_sheets and not sheet.startswith('Reference')
-                ]
-            else:
-                # JSON format
-                with open(config_path, 'r') as f:
-                    data = json.load(f)
-                self.lookup_tables = [
-                    key for key in data.keys() 
-                    if key not in system_sheets and not key.startswith('Reference')
-                ]
+            # Sheet names (Excel) or top-level keys (JSON) come from the compiled config
+            # Get all sheets except system sheets and those starting with "Reference"
+            self.lookup_tables = [
+                sheet for sheet in self.config_loader.get_sheet_names()
+                if sheet not in system_sheets and not sheet.startswith('Reference')
+            ]
             
             self.lookup_table_combo['values'] = self.lookup_tables
             if self.lookup_tables:
@@ -297,6 +327,29 @@ class TestHeadGUI:
             messagebox.showerror("Error", f"Failed to load platform: {str(e)}")
             self.status_var.set("Error loading platform")
     
+    def poll_config_changes(self):
+        """Reload the selected config when it is edited on disk (stat polling on the Tk thread)"""
+        try:
+            if self.config_loader is not None:
+                changed = self.config_loader.check_for_changes()
+                if changed:
+                    self.on_config_changed(changed)
+        except Exception as e:
+            print(f"Warning: config reload failed: {e}")
+        self.root.after(CONFIG_POLL_MS, self.poll_config_changes)
+    
+    def on_config_changed(self, changed):
+        """Refresh only the views showing a sheet / model that changed"""
+        if 'DIO_List' in changed:
+            dio_name = self.dio_name_var.get()
+            self.load_dio_names()
+            if dio_name in self.dio_name_combo['values']:
+                self.dio_name_var.set(dio_name)
+                self.on_dio_name_selected(None)
+        if self.current_lookup_table in changed:
+            self.load_command_table(self.current_lookup_table)
+        self.status_var.set(f"Config reloaded from disk (changed: {', '.join(str(name) for name in changed)})")
+    
     def on_lookup_table_selected(self, event):
         """Handle lookup table selection change"""
         try:
@@ -606,6 +659,8 @@ class TestHeadGUI:
 
 def main():
     """Main entry point for GUI application"""
+    from testhead_logging import configure_logging
+    configure_logging()
     root = tk.Tk()
     app = TestHeadGUI(root)
     root.mainloop()
@@ -0,0 +1,162 @@
+"""
+TestHead Logging
+Leveled logging for the library code (config loading, board attach, command
+processing). Everything logs to children of the "testhead" logger with lazy
+%-style arguments, so a message below the active level costs one level check
+and no string formatting.
+
+Default level is WARNING (set TESTHEAD_LOG_LEVEL, or pass -v on the command
+line, for more). A ring buffer can keep the most recent records, including
+DEBUG ones, for post-mortem without printing them; records are only
+formatted when the buffer is read.
+"""
+import collections
+import logging
+import os
+import sys
+
+LOGGER_NAME = "testhead"
+LOG_LEVEL_ENV = "TESTHEAD_LOG_LEVEL"     # e.g. DEBUG, INFO, WARNING
+LOG_RING_ENV = "TESTHEAD_LOG_RING"       # Ring buffer size; enables it at configure_logging()
+DEFAULT_LEVEL = logging.WARNING
+RING_BUFFER_SIZE = 2000
+
+# Console output reads like the former prints; the ring buffer keeps context
+CONSOLE_FORMAT = "%(message)s"
+RING_FORMAT = "%(asctime)s.%(msecs)03d %(threadName)s %(levelname)s %(name)s: %(message)s"
+
+_console_handler = None
+_ring_handler = None
+
+
+def get_logger(name=None):
+    """Logger "testhead" or "testhead.<name>"."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+def parse_level(level):
+    """
+    Level number from a number or a name like "debug".
+
+    Raises:
+        ValueError: If the name is not a logging level.
+    """
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level '{level}'. Expected DEBUG, INFO, WARNING, ERROR or CRITICAL")
+    return value
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the last `capacity` records unformatted.
+
+    Appending a record is the whole cost on the hot path; the message is
+    built only when lines() or dump() is called. Arguments are kept by
+    reference, so log immutable values (not lists that change later).
+
+    Args:
+        capacity (int): Records kept; older ones are dropped.
+        level (int): Lowest level kept.
+    """
+
+    def __init__(self, capacity=RING_BUFFER_SIZE, level=logging.DEBUG):
+        super().__init__(level)
+        self._records = collections.deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(RING_FORMAT, "%H:%M:%S"))
+
+    def emit(self, record):
+        self._records.append(record)
+
+    def records(self):
+        """Records in the buffer, oldest first."""
+        return list(self._records)
+
+    def lines(self, count=None):
+        """The most recent records (all if count is None), formatted, oldest first."""
+        records = self.records()
+        if count is not None:
+            records = records[-count:] if count > 0 else []
+        return [self.format(record) for record in records]
+
+    def dump(self, stream=None):
+        """Write every buffered record to a stream (stderr if None)."""
+        stream = stream or sys.stderr
+        for line in self.lines():
+            stream.write(line + "\n")
+        stream.flush()
+
+    def clear(self):
+        self._records.clear()
+
+
+def _update_level():
+    # The logger has to let through what the most verbose handler wants
+    levels = [handler.level for handler in (_console_handler, _ring_handler) if handler is not None]
+    get_logger().setLevel(min(levels) if levels else logging.NOTSET)
+
+
+def configure_logging(level=None, stream=None):
+    """
+    Send "testhead" records at or above a level to a stream. Called by the
+    command-line entry points; library users can configure logging themselves.
+
+    Args:
+        level (int | str): Console level. TESTHEAD_LOG_LEVEL, else WARNING, if None.
+        stream: Output stream (stdout if None, where the former prints went).
+
+    Returns:
+        logging.Logger: The "testhead" logger.
+    """
+    global _console_handler
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV) or DEFAULT_LEVEL
+    logger = get_logger()
+    if _console_handler is not None:
+        logger.removeHandler(_console_handler)
+    _console_handler = logging.StreamHandler(stream or sys.stdout)
+    _console_handler.setLevel(parse_level(level))
+    _console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    logger.addHandler(_console_handler)
+    logger.propagate = False    # Not printed twice if the application also logs to the root
+    ring_size = os.environ.get(LOG_RING_ENV)
+    if ring_size and _ring_handler is None:
+        enable_ring_buffer(int(ring_size))
+    _update_level()
+    return logger
+
+
+def enable_ring_buffer(capacity=RING_BUFFER_SIZE, level=logging.DEBUG):
+    """
+    Keep recent "testhead" records in memory (see RingBufferHandler).
+
+    Records at the buffer's level are created even if the console does not
+    show them; they are formatted only when the buffer is read.
+
+    Returns:
+        RingBufferHandler: The process-wide buffer (replaces an earlier one).
+    """
+    global _ring_handler
+    logger = get_logger()
+    if _ring_handler is not None:
+        logger.removeHandler(_ring_handler)
+    _ring_handler = RingBufferHandler(capacity, parse_level(level))
+    logger.addHandler(_ring_handler)
+    _update_level()
+    return _ring_handler
+
+
+def disable_ring_buffer():
+    """Stop buffering records (the buffer's content is dropped)."""
+    global _ring_handler
+    if _ring_handler is not None:
+        get_logger().removeHandler(_ring_handler)
+        _ring_handler = None
+        _update_level()
+
+
+def get_ring_buffer():
+    """The process-wide RingBufferHandler, or None if it is not enabled."""
+    return _ring_handler
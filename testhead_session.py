@@ -0,0 +1,264 @@
+"""
+TestHead Session
+One open config and one attached board for a whole test sequence. The config
+path, loader, DIO list, DLL and board index are resolved once in open(); each
+step then costs a PathName lookup and the USB writes.
+"""
+import threading
+
+from accesio import accesio_dio as dio
+from accesio.command_compiler import coalesce_commands, compile_switch_command
+from config_compiler import CompiledArtifact
+from testhead_control import Testhead_Control, get_config_path, open_config
+from testhead_logging import get_logger
+
+logger = get_logger("session")
+
+
+class TestheadSession:
+    """
+    A config file and one board of its DIO_List, set up once for many commands.
+
+    Compared to Testhead_Control.run, a step does not re-resolve the config
+    path, re-open the config, count the command list, print previews or look
+    the board up again. Resolved paths are kept per (sheet, PathName), so a
+    replayed path is a dictionary hit followed by the write.
+
+    If a DLL call fails (board unplugged or re-enumerated), the next call
+    attaches the board again through a fresh discovery scan.
+
+    Calls are serialized per session, so one session can be shared by
+    threads. Use one session per board.
+
+    Args:
+        config_file_name (str): Excel, JSON or .thc config, resolved like Testhead_Control.run.
+        dio_name (str): NAME of the board in the DIO_List.
+
+    Raises:
+        ValueError: If a parameter is missing or dio_name is not in the DIO_List.
+        FileNotFoundError: If the config file is not found.
+        RuntimeError: If the board is not attached.
+
+    Example:
+        with TestheadSession.open("Langley_Testhead Switch Path Configuration.json", "TestHead") as session:
+            session.apply_path("Bal In 1-8, Bal Out 1-7 and Main L", "Model_TM30")
+            session.apply_command("0;0B4,1")
+            ports = session.state()
+    """
+
+    def __init__(self, config_file_name, dio_name):
+        if not config_file_name:
+            raise ValueError("config_file_name is required. Must be path to Excel (.xlsx) or JSON (.json) file.")
+        if not dio_name:
+            raise ValueError("dio_name is required. Must match a NAME in the DIO_List.")
+        self.config_file_path = get_config_path(config_file_name)
+        self.dio_name = dio_name
+        self.config = open_config(self.config_file_path)
+        self._lock = threading.Lock()
+        self._paths = {}        # (sheet_name, path_name) -> CompiledCommand, None for an empty command
+        self._testhead = None
+        self._closed = False
+        self.dio_model = None
+        self.device_index = None
+        self.settled_at = None      # time.monotonic() when the relays of the last command settled
+        self._attach()
+
+    @classmethod
+    def open(cls, config_file_name, dio_name):
+        """Opens a session (same as the constructor)."""
+        return cls(config_file_name, dio_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _attach(self):
+        testhead = Testhead_Control()
+        testhead.attach_board(self.config, self.dio_name)
+        self._testhead = testhead
+        self.dio_model = testhead.dio_model
+        self.device_index = testhead.device_index
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError(f"Session for '{self.dio_name}' is closed.")
+        if self._testhead is None:
+            self._attach()  # Last call failed in the DLL: find the board again
+
+    # ***********************************
+    # Commands
+    # ***********************************
+    def apply_path(self, path_name, sheet_name):
+        """
+        Look up a PathName in a sheet / model and apply it.
+
+        Returns:
+            bool: True (failures raise).
+
+        Raises:
+            ValueError: If the sheet or PathName is unknown (or, for a .thc
+                        artifact, the path failed validation).
+            DIOError: If a DLL call fails.
+        """
+        if not path_name:
+            raise ValueError("path_name is required. Must match a PathName in the specified sheet.")
+        if not sheet_name:
+            raise ValueError("sheet_name is required. Must be a valid lookup table/sheet name.")
+        with self._lock:
+            self._check_open()
+            key = (sheet_name, path_name)
+            if key in self._paths:
+                compiled = self._paths[key]
+            else:
+                compiled = self._compile_path(path_name, sheet_name)
+                self._paths[key] = compiled
+            if compiled is not None:
+                self._write(compiled)
+            return True
+
+    def apply_paths(self, path_names, sheet_name, coalesce=True):
+        """
+        Apply several PathNames of a sheet in order.
+
+        Every path is looked up before anything is written, so an unknown
+        name fails with the relays untouched.
+
+        Args:
+            path_names (list): PathNames in the order they would be applied.
+            sheet_name (str): Lookup table/sheet of all paths.
+            coalesce (bool): Write only the net final port image (one write,
+                             resets honored). False applies each path in turn,
+                             for callers that need the intermediate states.
+
+        Returns:
+            bool: True (failures raise).
+        """
+        if not path_names:
+            raise ValueError("path_names is required. Must list at least one PathName.")
+        if not sheet_name:
+            raise ValueError("sheet_name is required. Must be a valid lookup table/sheet name.")
+        with self._lock:
+            self._check_open()
+            programs = []
+            for path_name in path_names:
+                key = (sheet_name, path_name)
+                if key not in self._paths:
+                    self._paths[key] = self._compile_path(path_name, sheet_name)
+                if self._paths[key] is not None:
+                    programs.append(self._paths[key])
+            if not programs:
+                return True
+            if coalesce:
+                self._write(coalesce_commands(programs))
+            else:
+                for compiled in programs:
+                    self._write(compiled)
+            return True
+
+    def apply_command(self, switch_command):
+        """
+        Apply a direct switch driver command, e.g. "0;0B4,1;0B5,1".
+
+        Returns:
+            bool: True (failures raise).
+        """
+        if not switch_command:
+            raise ValueError("switch_command is required. Must be a valid switch driver command.")
+        with self._lock:
+            self._check_open()
+            testhead = self._testhead
+            compiled = compile_switch_command(switch_command, testhead.dio.max_lines, testhead.dio_model)
+            self._write(compiled)
+            return True
+
+    def apply_compiled(self, compiled):
+        """
+        Apply a command already compiled for this board's line count (e.g. a
+        step of a compiled plan).
+
+        Returns:
+            bool: True (failures raise).
+
+        Raises:
+            ValueError: If it was compiled for another line count.
+        """
+        with self._lock:
+            self._check_open()
+            if compiled.port_count != self._testhead.dio.max_lines // 8:
+                raise ValueError(f"Command compiled for {compiled.port_count * 8} lines, "
+                                 f"'{self.dio_name}' has {self._testhead.dio.max_lines}.")
+            self._write(compiled)
+            return True
+
+    def reset(self):
+        """Set every line of the board low (command "0")."""
+        return self.apply_command("0")
+
+    def state(self):
+        """Port image of the board, one byte per port (shadow of the last write, else read)."""
+        with self._lock:
+            self._check_open()
+            return self._testhead.read_state()
+
+    def check_for_changes(self):
+        """
+        Pick up edits to the config file (see ConfigLoader.check_for_changes).
+        Paths of changed sheets are looked up again; a changed DIO_List or
+        Relay_Timing re-attaches the board. A .thc artifact is not reloaded.
+
+        Returns:
+            list: Changed sheet / model names (empty if none).
+        """
+        check = getattr(self.config, 'check_for_changes', None)
+        if check is None:
+            return []
+        with self._lock:
+            self._check_open()
+            changed = check()
+            if changed:
+                for key in [key for key in self._paths if key[0] in changed]:
+                    del self._paths[key]
+                if 'DIO_List' in changed or 'Relay_Timing' in changed:
+                    self._paths.clear()
+                    self._attach()
+            return changed
+
+    def close(self, reset=False):
+        """
+        Ends the session. The shared DLL handle stays loaded for other users
+        (dio_registry.shutdown() releases it).
+
+        Args:
+            reset (bool): Set every line low before closing.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                if reset:
+                    self._check_open()
+                    self._write(compile_switch_command("0", self._testhead.dio.max_lines, self._testhead.dio_model))
+            finally:
+                self._closed = True
+                self._paths.clear()
+
+    def _compile_path(self, path_name, sheet_name):
+        testhead = self._testhead
+        if isinstance(self.config, CompiledArtifact):
+            return self.config.get_compiled_command(path_name, sheet_name, testhead.dio.max_lines)
+        command = self.config.get_switch_command(path_name, sheet_name)
+        if not command:
+            return None
+        return compile_switch_command(command, testhead.dio.max_lines, testhead.dio_model)
+
+    def _write(self, compiled):
+        for error in compiled.errors:
+            logger.warning("%s (at position %d)", error, error.position)
+        try:
+            self._testhead.apply_compiled(compiled)
+        except dio.DIOError:
+            self._testhead = None   # Re-attach (rescan) before the next command
+            raise
+        self.settled_at = self._testhead.settled_at
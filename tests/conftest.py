@@ -0,0 +1,81 @@
+"""
+Shared pytest setup. The modules live at the repository root, not in an
+installed package, so the root is put on sys.path.
+
+Run from the repository root with: python -m pytest
+(pytest.ini limits collection to tests/, the root __init__.py is not
+importable on its own)
+
+Everything runs on the simulator backend; compiled configs, mapped indexes
+and route timings go to a temporary directory instead of the user profile.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from accesio import dio_registry  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_caches(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("TESTHEAD_CONFIG_CACHE_DIR", str(tmp_path_factory.mktemp("config_cache")))
+        patch.setenv("TESTHEAD_ROUTE_TIMINGS", "off")
+        yield
+
+
+@pytest.fixture
+def simulator(monkeypatch):
+    """
+    Puts the process-wide DIO registry on a SimulatedBackend.
+
+    Returns:
+        function: start(spec, latency_ms=0.0) -> SimulatedBackend, with spec as
+                  in TESTHEAD_SIM_BOARDS (e.g. "1:ACCESSIO_48,2:96").
+    """
+    def start(spec, latency_ms=0.0):
+        dio_registry.shutdown()
+        monkeypatch.setenv(dio_registry.BACKEND_ENV, "simulator")
+        monkeypatch.setenv(dio_registry.SIM_BOARDS_ENV, spec)
+        monkeypatch.setenv(dio_registry.SIM_LATENCY_ENV, str(latency_ms))
+        return dio_registry.get_registry().get_backend()
+
+    yield start
+    dio_registry.shutdown()
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """
+    Writes a JSON switch path configuration.
+
+    Returns:
+        function: make(paths, boards=(("TestHead", "ACCESSIO_48", "1"),), relay_timing=None,
+                  name="Test_Testhead Switch Path Configuration.json") -> file path.
+                  paths maps PathName -> SwitchDriverCommand (sheet Model_Common),
+                  or (sheet, PathName) -> SwitchDriverCommand.
+    """
+    def make(paths, boards=(("TestHead", "ACCESSIO_48", "1"),), relay_timing=None,
+             name="Test_Testhead Switch Path Configuration.json"):
+        rows = []
+        for key, command in paths.items():
+            sheet, path_name = key if isinstance(key, tuple) else ("Model_Common", key)
+            rows.append({"PathName": path_name, "SwitchDriverCommand": command, "Model_": sheet})
+        data = {
+            "Model Sheets": rows,
+            "DIO_List": [{"NAME": dio_name, "MODEL": model, "HEXADDRESS": address} for dio_name, model, address in boards],
+        }
+        if relay_timing is not None:
+            data["Relay_Timing"] = relay_timing
+        path = tmp_path / name
+        path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+        return str(path)
+
+    return make
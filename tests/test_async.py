@@ -0,0 +1,95 @@
+"""
+AsyncTesthead serializes operations per board, runs boards concurrently and
+keeps a board locked past a timeout until its DLL call has finished.
+"""
+import asyncio
+import time
+
+import pytest
+
+from testhead_async import AsyncTesthead
+
+BOARDS = (("TestHead", "ACCESSIO_48", "1"), ("GPIO", "ACCESSIO_48", "2"))
+PATHS = {"Main ON": "0;0A0,1", "Fan ON": "0;0B1,1"}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_apply_path_and_read_state(simulator, make_config):
+    simulator("1:ACCESSIO_48,2:ACCESSIO_48")
+
+    async def steps():
+        async with AsyncTesthead(make_config(PATHS, BOARDS)) as testhead:
+            assert await testhead.apply_path("TestHead", "Main ON", "Model_Common")
+            assert await testhead.apply_command("GPIO", "0;0B1,1")
+            return await testhead.read_state("TestHead"), await testhead.read_state("GPIO")
+
+    assert run(steps()) == ([0x01, 0, 0, 0, 0, 0], [0, 0x02, 0, 0, 0, 0])
+
+
+def test_same_board_is_serialized_other_boards_overlap(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_48")
+    delay = 0.1
+
+    async def timed(*operations):
+        start = time.perf_counter()
+        await asyncio.gather(*operations)
+        return time.perf_counter() - start
+
+    async def steps():
+        async with AsyncTesthead(make_config(PATHS, BOARDS)) as testhead:
+            # Attach both boards before timing the writes
+            await testhead.reset("TestHead")
+            await testhead.reset("GPIO")
+            backend.latency["DIO_Configure"] = delay
+            same = await timed(testhead.apply_command("TestHead", "0;0A0,1"),
+                               testhead.apply_command("TestHead", "0;0A1,1"))
+            other = await timed(testhead.apply_command("TestHead", "0;0C0,1"),
+                                testhead.apply_command("GPIO", "0;0C0,1"))
+            return same, other, await testhead.read_state("TestHead")
+
+    same, other, state = run(steps())
+    assert same >= 2 * delay
+    assert other < 1.8 * delay
+    # The second command on a board sees the first one's result
+    assert state[0] == 0x00 and state[2] == 0x01
+
+
+def test_timeout_returns_early_but_keeps_the_board_locked(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+
+    async def steps():
+        async with AsyncTesthead(make_config(PATHS)) as testhead:
+            await testhead.reset("TestHead")
+            backend.latency["DIO_Configure"] = 0.2
+            start = time.perf_counter()
+            with pytest.raises(asyncio.TimeoutError):
+                await testhead.apply_path("TestHead", "Main ON", "Model_Common", timeout=0.02)
+            assert time.perf_counter() - start < 0.2
+            # Waits for the timed-out write and reports it
+            return await testhead.read_state("TestHead")
+
+    assert run(steps())[0] == 0x01
+
+
+def test_failures_reach_the_caller(simulator, make_config):
+    simulator("1:ACCESSIO_48")
+
+    async def steps():
+        async with AsyncTesthead(make_config(PATHS)) as testhead:
+            with pytest.raises(ValueError):
+                await testhead.apply_path("TestHead", "Nope", "Model_Common")
+            with pytest.raises(ValueError):
+                await testhead.apply_command("", "0")
+            # The board is usable after a failed operation
+            return await testhead.apply_path("TestHead", "Main ON", "Model_Common")
+
+    assert run(steps())
+
+
+@pytest.mark.parametrize("arguments", [("",), ("config.json", 0)])
+def test_invalid_arguments(arguments):
+    with pytest.raises(ValueError):
+        AsyncTesthead(*arguments)
@@ -0,0 +1,88 @@
+"""
+BoardDiscovery scans the bus once per process and again only on a miss, an
+invalidation or a DLL error that looks like a hot-plug.
+"""
+import pytest
+
+from accesio.accesio_dio import AccesDIO
+from accesio.board_discovery import ERROR_DEV_NOT_EXIST, BoardDiscovery
+from accesio.dio_simulator import SimulatedBackend
+from accesio.dio_stats import DIOStats
+
+
+def make_dio(*board_ids):
+    backend = SimulatedBackend([(board_id, 48) for board_id in board_ids])
+    return AccesDIO("ACCESSIO_48", backend=backend, stats=DIOStats()), backend
+
+
+def test_lookups_are_cached_after_one_enumeration():
+    dio, backend = make_dio(0x01, 0x02)
+    discovery = BoardDiscovery()
+    discovery.register_boards([0x01, 0x02])
+    assert discovery.get_device_index(dio, 0x02) == 1
+    scans = backend.call_counts["GetDeviceByEEPROMByte"]
+    assert scans == 2       # Every registered board, once
+
+    for _ in range(10):
+        assert discovery.get_device_index(dio, 0x01) == 0
+        assert discovery.get_device_index(dio, 0x02) == 1
+    assert backend.call_counts["GetDeviceByEEPROMByte"] == scans
+    assert discovery.enumeration_count == 1
+
+
+def test_missing_board_raises_after_rescan():
+    dio, _ = make_dio(0x01)
+    discovery = BoardDiscovery()
+    assert discovery.get_device_index(dio, 0x01) == 0
+    with pytest.raises(RuntimeError, match="0x07"):
+        discovery.get_device_index(dio, 0x07)
+    assert discovery.enumeration_count == 2
+
+
+def test_replugged_board_is_found_after_hotplug_error():
+    dio, backend = make_dio(0x01, 0x02)
+    discovery = BoardDiscovery()
+    moves = []
+    discovery.add_index_listener(lambda board_id, old, new: moves.append((board_id, old, new)))
+    discovery.register_boards([0x01, 0x02])
+    assert discovery.get_device_index(dio, 0x01) == 0
+
+    backend.replug(0x01)
+    assert discovery.get_device_index(dio, 0x01) == 0     # Still cached
+    assert discovery.report_dll_error(ERROR_DEV_NOT_EXIST)
+    assert discovery.get_device_index(dio, 0x01) == 2
+    assert moves == [(0x01, 0, 2)]
+
+
+def test_other_dll_errors_keep_the_cache():
+    dio, _ = make_dio(0x01)
+    discovery = BoardDiscovery()
+    discovery.get_device_index(dio, 0x01)
+    assert not discovery.report_dll_error(87)   # ERROR_INVALID_PARAMETER
+    discovery.get_device_index(dio, 0x01)
+    assert discovery.enumeration_count == 1
+
+
+def test_removed_listener_is_not_called():
+    dio, backend = make_dio(0x01, 0x02)
+    discovery = BoardDiscovery()
+    moves = []
+    listener = lambda board_id, old, new: moves.append(board_id)  # noqa: E731
+    discovery.add_index_listener(listener)
+    discovery.remove_index_listener(listener)
+    discovery.get_device_index(dio, 0x01)
+    backend.replug(0x01)
+    discovery.invalidate()
+    discovery.get_device_index(dio, 0x01)
+    assert moves == []
+
+
+def test_moved_board_drops_the_shadow():
+    dio, backend = make_dio(0x01, 0x02)
+    device_index = dio.get_device_by_eeprom_byte(0x01)
+    dio.write_port_image(device_index, [0x01] * 6)
+    backend.replug(0x01)
+    new_index = dio.get_device_by_eeprom_byte(0x01)
+    assert new_index != device_index
+    assert dio.get_shadow(device_index) is None
+    assert dio.get_shadow(new_index) is None
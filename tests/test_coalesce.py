@@ -0,0 +1,90 @@
+"""
+coalesce_commands folds a command sequence into one write with the same
+final port image, with a reset anywhere in the sequence discarding what
+came before it.
+"""
+import random
+
+import pytest
+
+from accesio.command_compiler import coalesce_commands, compile_switch_command
+from testhead_control import run_command_list
+
+TOKENS = ("0", "0A0,1", "0A0,0", "0B4,1", "0B4,0", "1A0,1", "1B7,1", "1B7,0", "0C7,1", "x", "0A21,1")
+
+
+def compiled(command, max_lines=48):
+    return compile_switch_command(command, max_lines, f"ACCESSIO_{max_lines}")
+
+
+def apply_in_turn(commands, image):
+    for command in commands:
+        image = command.apply(image)
+    return image
+
+
+@pytest.mark.parametrize("commands", [
+    ["0B4,1", "0;1A0,1", "0B4,1"],                  # Reset in the middle
+    ["0A0,1;1B7,1", "0A0,0", "0"],                  # Reset last
+    ["0;0A0,1", "1A0,1;0", "0C7,1"],                # Reset inside a later command
+    ["0B4,1", "0B4,0", "0B4,1"],                    # Same line flipped back and forth
+])
+def test_coalesced_image_matches_applying_in_turn(commands):
+    programs = [compiled(command) for command in commands]
+    coalesced = coalesce_commands(programs)
+    for start in ([0x00] * 6, [0xFF] * 6, [0x5A] * 6):
+        assert coalesced.apply(start) == apply_in_turn(programs, start)
+    assert coalesced.reset == any(program.reset for program in programs)
+
+
+def test_random_sequences_match_applying_in_turn():
+    generator = random.Random(20)
+    for _ in range(300):
+        commands = [";".join(generator.choice(TOKENS) for _ in range(generator.randint(1, 4)))
+                    for _ in range(generator.randint(1, 5))]
+        programs = [compiled(command) for command in commands]
+        start = [generator.randrange(256) for _ in range(6)]
+        assert coalesce_commands(programs).apply(start) == apply_in_turn(programs, start), commands
+
+
+def test_coalesce_matches_joined_command():
+    commands = ["0;1A0,1;x", "1A0,0;0B4,1", "0C7,1;0A21,1"]
+    coalesced = coalesce_commands([compiled(command) for command in commands])
+    joined = compiled(';'.join(commands))
+    assert coalesced.apply([0x5A] * 6) == joined.apply([0x5A] * 6)
+    assert coalesced.reset == joined.reset
+    assert [(error.position, error.token) for error in coalesced.errors] == \
+           [(error.position, error.token) for error in joined.errors]
+
+
+def test_coalesce_rejects_mixed_models():
+    with pytest.raises(ValueError):
+        coalesce_commands([compiled("0A0,1", 16), compiled("0A0,1", 48)])
+    with pytest.raises(ValueError):
+        coalesce_commands([])
+
+
+PATHS = {"Main ON": "0;0A0,1", "Fan ON": "0B1,1", "Fan OFF": "0B1,0", "Lamp ON": "0C7,1", "Clear": "0"}
+
+
+def test_cli_list_is_one_write(simulator, make_config, capsys):
+    backend = simulator("1:ACCESSIO_48")
+    assert run_command_list(make_config(PATHS), "Model_Common", "TestHead",
+                            ["Main ON", "Fan ON", "Clear", "Lamp ON", "Fan ON", "Fan OFF"])
+    assert backend.call_counts["DIO_Configure"] == 1
+    assert backend.get_board(0x01).latch == [0, 0, 0x80, 0, 0, 0]
+
+
+def test_cli_list_fails_before_any_write(simulator, make_config, capsys):
+    backend = simulator("1:ACCESSIO_48")
+    assert not run_command_list(make_config(PATHS), "Model_Common", "TestHead", ["Main ON", "Nope", "Lamp ON"])
+    assert backend.call_counts["DIO_Configure"] == 0
+    assert "Nope" in capsys.readouterr().out
+
+
+def test_cli_list_without_coalescing_stops_at_the_failure(simulator, make_config, capsys):
+    backend = simulator("1:ACCESSIO_48")
+    assert not run_command_list(make_config(PATHS), "Model_Common", "TestHead",
+                                ["Main ON", "Fan ON", "Nope", "Lamp ON"], coalesce=False)
+    assert backend.call_counts["DIO_Configure"] == 2
+    assert backend.get_board(0x01).latch == [0x01, 0x02, 0, 0, 0, 0]
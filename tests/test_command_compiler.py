@@ -0,0 +1,131 @@
+"""
+The compiled single-write path must leave a board exactly as the legacy
+token-by-token path did (one read-modify-write per GroupPortBit token),
+and reject the same tokens with the same messages.
+"""
+import glob
+import json
+import os
+import random
+
+import pytest
+
+from accesio.accesio_dio import AccesDIO
+from accesio.command_compiler import compile_switch_command
+from accesio.dio_simulator import SimulatedBackend
+from accesio.dio_stats import DIOStats
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+MODELS = ("ACCESSIO_16", "ACCESSIO_48", "ACCESSIO_96")
+BOARD_ID = 0x01
+
+# Valid, out-of-range and malformed tokens for the random commands
+TOKENS = ("0", "0A0,1", "0A0,0", "3C7,1", "1B7,0", "2A0,1", "0B4,1", "0B4,0", "1C2,1", "0C7,1", "1A8,1",
+          "x", "0A21,1", "0,FFFF", "1A0,2", "", " 0", "0B1, 1", "0B1,01", "4A0,1", "0D1,1", "0a1,1", "0B,1")
+
+
+def make_board(model, image=None):
+    """AccesDIO on a simulated board of the model, optionally written with a starting image first."""
+    backend = SimulatedBackend([(BOARD_ID, model)])
+    dio = AccesDIO(model, backend=backend, stats=DIOStats())
+    device_index = dio.get_device_by_eeprom_byte(BOARD_ID)
+    if image is not None:
+        dio.write_port_image(device_index, image)
+    return dio, device_index, backend.get_board(BOARD_ID)
+
+
+def apply_token_by_token(dio, device_index, command):
+    """
+    The SwitchDriverCommand loop of Testhead_Control before commands were compiled.
+
+    Returns:
+        list: (token, message) for every rejected token, in order.
+    """
+    rejected = []
+    if not command:
+        return rejected     # "No command provided."
+    for cmd in command.split(';'):
+        if cmd == '0':
+            dio.reset_all_lines_low(device_index)
+            continue
+        if ',' not in cmd:
+            rejected.append((cmd, f"Invalid command format: {cmd}. Expected format is 'line,value'."))
+            continue
+        line, value = cmd.split(',')
+        try:
+            dio.write_groupportbit_preserve(device_index, line.strip(), int(value.strip()))
+        except ValueError as e:
+            rejected.append((cmd, f"Error processing command '{cmd}': {e}"))
+    return rejected
+
+
+def config_commands():
+    """Every SwitchDriverCommand of the shipped JSON configurations."""
+    commands = []
+    for path in sorted(glob.glob(os.path.join(CONFIG_DIR, "*Switch Path Configuration.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        commands.extend(row["SwitchDriverCommand"] for row in data["Model Sheets"] if row.get("SwitchDriverCommand"))
+    return commands
+
+
+def random_commands(count, seed):
+    generator = random.Random(seed)
+    return [';'.join(generator.choice(TOKENS) for _ in range(generator.randint(1, 8))) for _ in range(count)]
+
+
+def assert_same_as_legacy(model, command, start_image):
+    legacy_dio, legacy_index, legacy_board = make_board(model, start_image)
+    rejected = apply_token_by_token(legacy_dio, legacy_index, command)
+
+    dio, device_index, board = make_board(model, start_image)
+    compiled = compile_switch_command(command, dio.max_lines, dio.dio_model)
+    dio.write_compiled_command(device_index, compiled)
+
+    assert board.read_ports() == legacy_board.read_ports(), f"{model}: {command!r}"
+    assert [(error.token, error.message) for error in compiled.errors] == rejected, f"{model}: {command!r}"
+
+
+def test_config_commands_match_legacy_path():
+    commands = config_commands()
+    assert commands, "no SwitchDriverCommand found in config/*.json"
+    for model in MODELS:
+        start_image = [0xA5] * (AccesDIO(model, backend=SimulatedBackend()).port_count)
+        for command in commands:
+            assert_same_as_legacy(model, command, start_image)
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_random_commands_match_legacy_path(model):
+    generator = random.Random(model)
+    port_count = AccesDIO(model, backend=SimulatedBackend()).port_count
+    for command in random_commands(500, model):
+        start_image = [generator.randrange(256) for _ in range(port_count)]
+        assert_same_as_legacy(model, command, start_image)
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_unwritten_board_is_read_back_like_legacy_path(model):
+    # Ports power up as inputs, so both paths start from the DIO_ReadAll value
+    for command in ("0B4,1", "0A0,0;1B7,1", "x;0B1,1"):
+        assert_same_as_legacy(model, command, None)
+
+
+def test_error_positions_and_messages():
+    compiled = compile_switch_command("0B4,1;x;0A0,1;2A0,1", 16, "ACCESSIO_16")
+    assert [(error.position, error.token) for error in compiled.errors] == [(6, "x"), (14, "2A0,1")]
+    assert compiled.errors[0].message == "Invalid command format: x. Expected format is 'line,value'."
+    assert "exceeds max line count for ACCESSIO_16" in compiled.errors[1].message
+    assert compiled.bits == (("0B4", 1), ("0A0", 1))
+
+
+def test_reset_discards_earlier_tokens():
+    compiled = compile_switch_command("0B4,1;0;0A0,1", 48, "ACCESSIO_48")
+    assert compiled.reset
+    assert compiled.apply([0xFF] * 6) == [0x01, 0, 0, 0, 0, 0]
+
+
+def test_write_rejects_command_for_other_model():
+    dio, device_index, _ = make_board("ACCESSIO_48")
+    with pytest.raises(ValueError):
+        dio.write_compiled_command(device_index, compile_switch_command("0A0,1", 96, "ACCESSIO_96"))
@@ -0,0 +1,111 @@
+"""
+ConfigCache compiles a config once, answers unchanged files from memory or
+disk, and recompiles only what an edit changed.
+"""
+import json
+import os
+
+import pytest
+
+from config_cache import CACHE_FORMAT_VERSION, ConfigCache, cache_file_path, compile_config, default_cache_dir
+
+CONFIG = {
+    "DIO_List": [{"NAME": "TestHead", "MODEL": "ACCESSIO_48", "HEXADDRESS": "1"}],
+    "Model Sheets": [
+        {"PathName": "Main ON", "SwitchDriverCommand": "0;0A0,1", "Model_": "Model_A"},
+        {"PathName": "Fan ON", "SwitchDriverCommand": "0;0B1,1", "Model_": "Model_B"},
+    ],
+}
+
+
+def write_json(path, data, mtime_ns=None):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    return write_json(tmp_path / "config.json", CONFIG, mtime_ns=1_000_000_000)
+
+
+def test_compiled_content(config_file):
+    compiled = compile_config(config_file, 'json')
+    assert compiled.sheet_names == ["DIO_List", "Model Sheets"]
+    assert compiled.model_names == ["Model_A", "Model_B"]
+    assert compiled.get_records("DIO_List")[0]["NAME"] == "TestHead"
+    assert [row["PathName"] for row in compiled.models["Model_B"]] == ["Fan ON"]
+    assert compiled.get_records("Nope") is None
+
+
+def test_unchanged_file_is_a_memory_hit(tmp_path, config_file):
+    cache = ConfigCache(str(tmp_path / "cache"))
+    compiled = cache.load(config_file, 'json')
+    assert cache.load(config_file, 'json') is compiled
+    assert cache.stats["compiles"] == 1 and cache.stats["memory_hits"] == 1
+
+
+def test_second_process_reads_the_cache_file(tmp_path, config_file):
+    cache_dir = str(tmp_path / "cache")
+    ConfigCache(cache_dir).load(config_file, 'json')
+    assert os.path.exists(cache_file_path(config_file, cache_dir))
+
+    other = ConfigCache(cache_dir)
+    compiled = other.load(config_file, 'json')
+    assert other.stats["compiles"] == 0 and other.stats["disk_hits"] == 1
+    assert compiled.models["Model_A"][0]["SwitchDriverCommand"] == "0;0A0,1"
+
+
+def test_touched_file_with_same_content_is_not_recompiled(tmp_path, config_file):
+    cache = ConfigCache(str(tmp_path / "cache"))
+    compiled = cache.load(config_file, 'json')
+    os.utime(config_file, ns=(2_000_000_000, 2_000_000_000))
+    assert cache.load(config_file, 'json') is compiled
+    assert cache.stats["compiles"] == 1
+    assert compiled.source["mtime_ns"] == 2_000_000_000
+
+
+def test_edit_recompiles_and_keeps_unchanged_tables(tmp_path, config_file):
+    cache = ConfigCache(str(tmp_path / "cache"))
+    before = cache.load(config_file, 'json')
+    edited = json.loads(json.dumps(CONFIG))
+    edited["Model Sheets"][1]["SwitchDriverCommand"] = "0;0B2,1"
+    write_json(tmp_path / "config.json", edited, mtime_ns=2_000_000_000)
+
+    after = cache.load(config_file, 'json')
+    assert cache.stats["compiles"] == 2
+    assert after.models["Model_B"][0]["SwitchDriverCommand"] == "0;0B2,1"
+    assert after.tables["DIO_List"] is before.tables["DIO_List"]
+    assert after.models["Model_A"] is before.models["Model_A"]
+    assert after.changed_tables(before) == ["Model_B"]
+
+
+@pytest.mark.parametrize("content", ["{not json", json.dumps({"version": CACHE_FORMAT_VERSION - 1})])
+def test_unusable_cache_file_is_rebuilt(tmp_path, config_file, content):
+    cache_dir = str(tmp_path / "cache")
+    ConfigCache(cache_dir).load(config_file, 'json')
+    with open(cache_file_path(config_file, cache_dir), 'w', encoding='utf-8') as f:
+        f.write(content)
+
+    cache = ConfigCache(cache_dir)
+    assert cache.load(config_file, 'json').model_names == ["Model_A", "Model_B"]
+    assert cache.stats["compiles"] == 1
+
+
+def test_memory_only_cache_writes_nothing(tmp_path, config_file):
+    cache = ConfigCache(None)
+    cache.load(config_file, 'json')
+    assert os.listdir(tmp_path) == ["config.json"]
+    assert cache.load_mapped_index(config_file, 'json') is None
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConfigCache(None).load(str(tmp_path / "missing.json"), 'json')
+
+
+@pytest.mark.parametrize("value, expected", [("off", None), ("", None), ("/tmp/th_cache", "/tmp/th_cache")])
+def test_default_cache_dir(monkeypatch, value, expected):
+    monkeypatch.setenv("TESTHEAD_CONFIG_CACHE_DIR", value)
+    assert default_cache_dir() == expected
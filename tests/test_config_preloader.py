@@ -0,0 +1,87 @@
+"""
+ConfigPreloader fills the cache on worker threads, reports each file's state
+and leaves later opens as cache hits.
+"""
+import json
+import os
+
+import pytest
+
+from config_cache import ConfigCache
+from config_loader import ConfigLoader
+from config_preloader import FAILED, PENDING, READY, ConfigPreloader, find_config_files, preload_configs
+
+
+def write_config(directory, name, command="0;0A0,1"):
+    data = {"DIO_List": [{"NAME": "TestHead", "MODEL": "ACCESSIO_48", "HEXADDRESS": "1"}],
+            "Model_Common": [{"PathName": "Main ON", "SwitchDriverCommand": command}]}
+    path = directory / name
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    directory = tmp_path / "config"
+    directory.mkdir()
+    for number in range(5):
+        write_config(directory, f"Platform_{number}.json", f"0;0A{number},1")
+    (directory / "notes.txt").write_text("not a config")
+    return directory
+
+
+def test_find_config_files(config_dir):
+    assert [os.path.basename(path) for path in find_config_files(str(config_dir))] == \
+        [f"Platform_{number}.json" for number in range(5)]
+    with pytest.raises(FileNotFoundError):
+        find_config_files(str(config_dir / "missing"))
+
+
+def test_every_file_is_loaded_into_the_cache(config_dir, tmp_path):
+    cache = ConfigCache(str(tmp_path / "cache"))
+    finished = []
+    preloader = preload_configs(str(config_dir), config_cache=cache, max_workers=3, on_progress=finished.append)
+    assert preloader.wait(10)
+    assert preloader.progress() == (5, 5)
+    assert all(status.state == READY and status.elapsed is not None for status in preloader.statuses())
+    assert len(finished) == 5
+    assert preloader.summary().startswith("Preloaded 5/5 config(s)")
+    assert cache.stats["compiles"] == 5 and cache.stats["index_builds"] == 5
+
+    # Opening a preloaded file neither compiles nor builds an index
+    loader = ConfigLoader(find_config_files(str(config_dir))[2], config_cache=cache)
+    assert loader.get_switch_command("Main ON", "Model_Common") == "0;0A2,1"
+    loader.get_compiled()
+    assert cache.stats["compiles"] == 5 and cache.stats["index_builds"] == 5
+
+
+def test_a_broken_file_fails_alone(config_dir, tmp_path):
+    (config_dir / "Broken.json").write_text("{", encoding='utf-8')
+    preloader = preload_configs(str(config_dir), config_cache=ConfigCache(str(tmp_path / "cache")))
+    assert preloader.wait(10)
+    failed = preloader.failures()
+    assert [os.path.basename(status.path) for status in failed] == ["Broken.json"]
+    assert failed[0].state == FAILED and failed[0].error
+    assert preloader.summary().endswith("failed: Broken.json")
+    assert len([status for status in preloader.statuses() if status.state == READY]) == 5
+
+
+def test_not_started_and_empty(config_dir):
+    paths = find_config_files(str(config_dir))
+    preloader = ConfigPreloader(paths, config_cache=ConfigCache(None))
+    assert preloader.status(paths[0]).state == PENDING
+    assert not preloader.is_done() and not preloader.wait(0.01)
+    with pytest.raises(KeyError):
+        preloader.status("elsewhere.json")
+
+    empty = ConfigPreloader([]).start()
+    assert empty.is_done() and empty.progress() == (0, 0)
+    with pytest.raises(ValueError):
+        ConfigPreloader(paths, max_workers=0)
+
+
+def test_memory_only_cache(config_dir):
+    cache = ConfigCache(None)
+    preloader = preload_configs(str(config_dir), config_cache=cache)
+    assert preloader.wait(10) and not preloader.failures()
+    assert cache.stats["compiles"] == 5 and cache.stats["index_maps"] == 0
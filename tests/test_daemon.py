@@ -0,0 +1,122 @@
+"""
+The daemon answers JSON-line requests over localhost with one session per
+board, and the client reports its errors and falls back to running in
+process when no daemon listens.
+"""
+import json
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+import testhead_client
+import testhead_daemon
+
+BOARDS = (("TestHead", "ACCESSIO_48", "1"), ("GPIO", "ACCESSIO_48", "2"))
+PATHS = {"Main ON": "0;0A0,1", "Fan ON": "0B1,1", "Lamp ON": "0C7,1"}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def connect(port, attempts=100):
+    for _ in range(attempts):
+        try:
+            return testhead_client.TestheadClient(port=port)
+        except testhead_client.DaemonUnavailable:
+            time.sleep(0.02)
+    raise AssertionError(f"daemon did not start on port {port}")
+
+
+@pytest.fixture
+def daemon(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_48")
+    port = free_port()
+    server = testhead_daemon.TestheadDaemon(port=port, preload=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = connect(port)
+    yield client, backend, make_config(PATHS, BOARDS), server
+    try:
+        client.shutdown()
+    except (OSError, RuntimeError):
+        pass    # Already shut down by the test
+    client.close()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_round_trip(daemon):
+    client, backend, config, _ = daemon
+    response = client.apply_path(config, "TestHead", ["Main ON", "Fan ON", "Lamp ON"], "Model_Common")
+    assert response["ok"] and response["elapsed_ms"] >= 0
+    assert backend.call_counts["DIO_Configure"] == 1    # Coalesced into one write
+    assert client.read_state(config, "TestHead") == [0x01, 0x02, 0x80, 0, 0, 0]
+
+    client.apply_command(config, "GPIO", "0;1A1,1")
+    client.reset(config, "TestHead")
+    assert client.read_state(config, "TestHead") == [0] * 6
+    assert backend.get_board(0x02).latch == [0, 0, 0, 0x02, 0, 0]
+    assert client.ping()["sessions"] == 2
+
+
+def test_errors_keep_the_connection_usable(daemon):
+    client, backend, config, _ = daemon
+    with pytest.raises(RuntimeError, match="ValueError: .*Nope"):
+        client.apply_path(config, "TestHead", ["Main ON", "Nope"], "Model_Common")
+    with pytest.raises(RuntimeError, match="Unknown op"):
+        client.request("fly")
+    with pytest.raises(RuntimeError, match="dio is required"):
+        client.request("read_state", config=config)
+    assert backend.call_counts["DIO_Configure"] == 0
+    assert client.ping()["requests"] == 4
+
+
+def test_stats_and_log(daemon):
+    client, _, config, _ = daemon
+    client.apply_command(config, "TestHead", "0")
+    assert isinstance(client.stats(), dict)
+    assert isinstance(client.recent_log(5), list)
+
+
+def test_shutdown_stops_the_server(daemon):
+    client, backend, config, server = daemon
+    client.apply_command(config, "TestHead", "0;0A0,1")
+    assert client.shutdown()["shutdown"]
+    with pytest.raises((OSError, ConnectionError)):
+        for _ in range(3):
+            client.ping()
+    assert server.requests == 2
+
+
+def test_handle_line_rejects_malformed_requests(simulator):
+    simulator("1:ACCESSIO_48")
+    server = testhead_daemon.TestheadDaemon(port=free_port(), preload=False)
+    for line, error in ((b"{", "JSONDecodeError"), (b"[1]", "must be a JSON object"),
+                        (json.dumps({"op": "apply_path", "dio": "TestHead"}).encode(), "config is required")):
+        response = server.handle_line(line)
+        assert not response["ok"] and error in response["error"]
+    assert server.handle_line(b'{"op": "ping"}')["ok"]
+
+
+def test_client_falls_back_without_a_daemon(simulator, make_config, monkeypatch, capsys):
+    backend = simulator("1:ACCESSIO_48")
+    monkeypatch.setenv(testhead_client.PORT_ENV, str(free_port()))
+    monkeypatch.setattr(sys, "argv", ["testhead_client.py"])
+    assert testhead_client.main([make_config(PATHS), "Model_Common", "TestHead", "Main ON"]) == 0
+    assert "No testhead daemon running" in capsys.readouterr().out
+    assert backend.get_board(0x01).latch[0] == 0x01
+
+
+def test_client_reports_daemon_errors(daemon, monkeypatch, capsys):
+    _, _, config, server = daemon
+    monkeypatch.setenv(testhead_client.PORT_ENV, str(server.port))
+    assert testhead_client.main([config, "Model_Common", "TestHead", "Nope"]) == 1
+    assert "Final status: FAILED" in capsys.readouterr().out
+    assert testhead_client.main([config, "Model_Common", "TestHead", "Main ON | Fan ON"]) == 0
+    assert "2 command(s) applied" in capsys.readouterr().out
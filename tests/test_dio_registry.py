@@ -0,0 +1,95 @@
+"""
+DIORegistry hands out one pooled AccesDIO per (model, device index) over a
+shared backend, and shutdown() leaves no caller on a closed backend.
+"""
+import pytest
+
+from accesio import dio_registry
+from accesio.accesio_dio import ERROR_INVALID_HANDLE, DIOError
+from accesio.board_discovery import ERROR_DEV_NOT_EXIST, BoardDiscovery
+from accesio.dio_registry import DIORegistry
+from accesio.dio_simulator import SimulatedBackend
+
+
+def make_registry(*board_ids):
+    backend = SimulatedBackend([(board_id, 96) for board_id in board_ids])
+    return DIORegistry(discovery=BoardDiscovery(), backend=backend), backend
+
+
+def test_pool_returns_one_object_per_model_and_device():
+    registry, backend = make_registry(0x01, 0x02)
+    dio = registry.get_dio("accessio_96", 0)
+    assert registry.get_dio("ACCESSIO_96", 0) is dio
+    assert registry.get_dio("ACCESSIO_96", 1) is not dio
+    assert registry.get_dio("ACCESSIO_48", 0) is not dio
+    assert dio.backend.backend is backend
+
+
+def test_find_device_index_uses_the_discovery_cache():
+    registry, backend = make_registry(0x01, 0x02)
+    assert registry.find_device_index(0x02) == 1
+    scans = backend.call_counts["GetDeviceByEEPROMByte"]
+    assert registry.find_device_index(0x02) == 1
+    assert backend.call_counts["GetDeviceByEEPROMByte"] == scans
+
+
+def test_moved_board_drops_pooled_shadows():
+    registry, backend = make_registry(0x01, 0x02)
+    device_index = registry.find_device_index(0x01)
+    dio = registry.get_dio("ACCESSIO_96", device_index)
+    dio.write_port_image(device_index, [0x01] * 12)
+    assert dio.get_shadow(device_index) is not None
+
+    backend.replug(0x01)
+    registry.discovery.report_dll_error(ERROR_DEV_NOT_EXIST)
+    assert registry.find_device_index(0x01) == 2
+    assert dio.get_shadow(device_index) is None
+
+
+def test_shutdown_removes_the_discovery_listener():
+    discovery = BoardDiscovery()
+    for _ in range(5):
+        registry = DIORegistry(discovery=discovery, backend=SimulatedBackend([(0x01, 96)]))
+        registry.find_device_index(0x01)
+        registry.shutdown()
+    assert discovery._listeners == []
+
+
+def test_registry_listens_again_after_restart():
+    registry, _ = make_registry(0x01)
+    registry.shutdown()
+    registry.find_device_index(0x01)
+    assert registry.discovery._listeners == [registry._on_index_changed]
+
+
+def test_objects_held_past_shutdown_raise_dio_error():
+    registry, backend = make_registry(0x01)
+    device_index = registry.find_device_index(0x01)
+    dio = registry.get_dio("ACCESSIO_96", device_index)
+    dio.write_port_image(device_index, [0x00] * 12)
+    configures = backend.call_counts["DIO_Configure"]
+    registry.shutdown()
+
+    for call in (lambda: dio.write_port_image(device_index, [0x01] * 12),
+                 lambda: dio.read_all_lines(device_index),
+                 lambda: dio.write_line(device_index, 1, 1),
+                 lambda: dio.get_device_by_eeprom_byte(0x01)):
+        with pytest.raises(DIOError) as raised:
+            call()
+        assert raised.value.code == ERROR_INVALID_HANDLE
+    assert backend.call_counts["DIO_Configure"] == configures
+
+    # The next request gets a fresh, working object
+    fresh = registry.get_dio("ACCESSIO_96", registry.find_device_index(0x01))
+    assert fresh is not dio
+    fresh.write_port_image(device_index, [0x01] * 12)
+
+
+@pytest.mark.parametrize("value, expected", [(None, dio_registry.POOLED_SHADOW_MAX_AGE_S), ("", dio_registry.POOLED_SHADOW_MAX_AGE_S),
+                                             ("none", None), ("OFF", None), ("2.5", 2.5)])
+def test_pooled_shadow_max_age(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv(dio_registry.SHADOW_MAX_AGE_ENV, raising=False)
+    else:
+        monkeypatch.setenv(dio_registry.SHADOW_MAX_AGE_ENV, value)
+    assert dio_registry.pooled_shadow_max_age() == expected
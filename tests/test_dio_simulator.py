@@ -0,0 +1,126 @@
+"""
+SimulatedBackend behaves like AIOUSB.dll for the calls AccesDIO makes,
+including hot-plug and injected errors, and DIOBackend rejects incomplete
+backends up front.
+"""
+import time
+
+import pytest
+
+from accesio.accesio_dio import AccesDIO, DIOError
+from accesio.dio_backend import DEVICE_NOT_FOUND, DIOBackend
+from accesio.dio_registry import create_default_backend
+from accesio.dio_simulator import ERROR_DEV_NOT_EXIST, ERROR_INVALID_PARAMETER, SimulatedBackend, SimulatedBoard
+from accesio.dio_stats import DIOStats, instrument
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class WriteOnlyBackend(DIOBackend):
+        def dio_configure(self, device_index, tristate, out_mask, data):
+            return 0
+
+    with pytest.raises(TypeError):
+        WriteOnlyBackend()
+    with pytest.raises(TypeError):
+        DIOBackend()
+
+
+def test_from_spec_reads_hex_ids_and_models():
+    backend = SimulatedBackend.from_spec("1:ACCESSIO_96, 1F:16,2")
+    assert backend.get_device_by_eeprom_byte(0x1F) == 1
+    assert backend.get_board(0x1F).lines == 16
+    assert backend.get_board(0x02).lines == 96
+    assert backend.get_device_by_eeprom_byte(0x05) == DEVICE_NOT_FOUND
+
+
+@pytest.mark.parametrize("model", ["ACCESSIO_32", 24, "abc"])
+def test_unsupported_model_is_rejected(model):
+    with pytest.raises(ValueError):
+        SimulatedBoard(0x01, model)
+
+
+def test_input_ports_read_the_input_level():
+    backend = SimulatedBackend([SimulatedBoard(0x01, 48, input_level=0x5A)])
+    assert backend.dio_read_all(0, 6) == (0, [0x5A] * 6)
+    # Ports 0 and 1 become outputs, the rest stay inputs
+    assert backend.dio_configure(0, 0, 0b000011, [0x01, 0x02, 0x03, 0x04, 0x05, 0x06]) == 0
+    assert backend.dio_read_all(0, 6) == (0, [0x01, 0x02, 0x5A, 0x5A, 0x5A, 0x5A])
+    # A buffer for a bigger model only gets this board's ports
+    assert backend.dio_read_all(0, 8)[1][6:] == [0x00, 0x00]
+
+
+def test_write1_sets_one_line():
+    backend = SimulatedBackend([(0x01, 16)])
+    backend.dio_configure(0, 0, 0b11, [0x00, 0x00])
+    assert backend.dio_write1(0, 9, 1) == 0
+    assert backend.get_board(0x01).latch == [0x00, 0x02]
+    assert backend.dio_write1(0, 16, 1) == ERROR_INVALID_PARAMETER
+
+
+def test_unplugged_board_fails_and_replugs_at_a_new_index():
+    backend = SimulatedBackend([(0x01, 48), (0x02, 48)])
+    backend.dio_configure(0, 0, 0x3F, [0xFF] * 6)
+    backend.unplug(0x01)
+    assert backend.get_device_by_eeprom_byte(0x01) == DEVICE_NOT_FOUND
+    assert backend.dio_configure(0, 0, 0x3F, [0x00] * 6) == ERROR_DEV_NOT_EXIST
+    assert backend.dio_read_all(0, 6)[0] == ERROR_DEV_NOT_EXIST
+
+    # Plugged back in, a board enumerates at the next free index
+    board = backend.unplug(0x02)
+    assert backend.add_board(board) == 2
+    assert backend.get_device_by_eeprom_byte(0x02) == 2
+    with pytest.raises(ValueError):
+        backend.unplug(0x01)
+
+
+def test_replug_powers_the_board_up_again():
+    backend = SimulatedBackend([(0x01, 48)])
+    backend.dio_configure(0, 0, 0x3F, [0xFF] * 6)
+    assert backend.replug(0x01) == 1
+    board = backend.get_board(0x01)
+    assert board.latch == [0x00] * 6 and board.out_mask == 0
+
+
+def test_injected_failures_surface_as_dio_error():
+    backend = SimulatedBackend([(0x01, 48)])
+    dio = AccesDIO("ACCESSIO_48", backend=backend, stats=DIOStats())
+    backend.fail_next("DIO_Configure", ERROR_DEV_NOT_EXIST, count=2)
+    for _ in range(2):
+        with pytest.raises(DIOError) as raised:
+            dio.write_port_image(0, [0x01] * 6)
+        assert raised.value.code == ERROR_DEV_NOT_EXIST
+    dio.write_port_image(0, [0x01] * 6)
+    assert backend.call_counts["DIO_Configure"] == 3
+    with pytest.raises(ValueError):
+        backend.fail_next("DIO_Nope", 1)
+
+
+def test_instrumented_backend_passes_simulator_controls_through():
+    backend = instrument(SimulatedBackend([(0x01, 48)]), DIOStats())
+    backend.fail_next("DIO_ReadAll", ERROR_DEV_NOT_EXIST)
+    assert backend.dio_read_all(0, 6)[0] == ERROR_DEV_NOT_EXIST
+    assert backend.get_board(0x01) is not None
+
+
+def test_latency_per_call():
+    with pytest.raises(ValueError):
+        SimulatedBackend(latency={"DIO_Nope": 0.1})
+    backend = SimulatedBackend([(0x01, 48)], latency={"DIO_Configure": 0.02})
+    assert backend.latency["DIO_ReadAll"] == 0.0
+    start = time.perf_counter()
+    backend.dio_configure(0, 0, 0x3F, [0x00] * 6)
+    assert time.perf_counter() - start >= 0.02
+
+
+def test_default_backend_from_environment(monkeypatch):
+    monkeypatch.setenv("TESTHEAD_DIO_BACKEND", "simulator")
+    monkeypatch.setenv("TESTHEAD_SIM_BOARDS", "3:ACCESSIO_16")
+    backend = create_default_backend()
+    assert isinstance(backend, SimulatedBackend)
+    assert backend.get_device_by_eeprom_byte(0x03) == 0
+
+    monkeypatch.setenv("TESTHEAD_DIO_BACKEND", "aiousb")
+    assert create_default_backend() is None
+    monkeypatch.setenv("TESTHEAD_DIO_BACKEND", "usb3")
+    with pytest.raises(ValueError):
+        create_default_backend()
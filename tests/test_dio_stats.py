@@ -0,0 +1,126 @@
+"""
+Every DLL call is counted per device with its errors and a latency
+histogram; while collection is off nothing is recorded.
+"""
+import pytest
+
+from accesio.accesio_dio import AccesDIO
+from accesio.dio_backend import DEVICE_NOT_FOUND
+from accesio.dio_simulator import ERROR_DEV_NOT_EXIST, SimulatedBackend
+from accesio.dio_stats import (BUCKET_EDGES_US, DIO_CONFIGURE, DIO_READ_ALL, DIO_WRITE1, GET_DEVICE_BY_EEPROM_BYTE,
+                               CallStats, DIOStats, InstrumentedBackend, format_stats, instrument)
+
+
+def bucket_of(elapsed_us):
+    stats = CallStats()
+    stats.add(int(elapsed_us * 1000), False)
+    return stats.buckets.index(1)
+
+
+@pytest.mark.parametrize("elapsed_us, bucket", [
+    (0, 0), (10, 0), (10.001, 1), (100, 3), (100.5, 4), (100000, len(BUCKET_EDGES_US) - 1),
+    (100000.001, len(BUCKET_EDGES_US)), (10 ** 7, len(BUCKET_EDGES_US)),
+])
+def test_bucket_edges_are_inclusive(elapsed_us, bucket):
+    assert bucket_of(elapsed_us) == bucket
+
+
+def test_call_stats_counters():
+    stats = CallStats()
+    for elapsed_us in (20, 40, 40, 40, 3000):
+        stats.add(elapsed_us * 1000, elapsed_us > 1000)
+    row = stats.to_dict()
+    assert (row["count"], row["errors"]) == (5, 1)
+    assert (row["min_us"], row["max_us"], row["mean_us"]) == (20, 3000, 628)
+    assert sum(row["histogram"]) == 5
+    assert row["p50_us"] == 50          # Upper edge of the bucket holding the median
+    assert row["p95_us"] == 3000        # Capped at the slowest call
+    assert CallStats().to_dict()["p99_us"] == 0.0
+
+
+def test_counts_per_device_and_call():
+    stats = DIOStats(enabled=True)
+    backend = InstrumentedBackend(SimulatedBackend([(0x01, 48), (0x02, 16)]), stats)
+    assert backend.get_device_by_eeprom_byte(0x02) == 1
+    assert backend.get_device_by_eeprom_byte(0x07) == DEVICE_NOT_FOUND
+    for _ in range(3):
+        backend.dio_configure(0, 0, 0x3F, [0] * 6)
+    backend.dio_write1(1, 3, 1)
+    backend.dio_read_all(1, 2)
+    backend.fail_next(DIO_CONFIGURE, ERROR_DEV_NOT_EXIST)    # Passed through to the simulator
+    assert backend.dio_configure(1, 0, 0x03, [0, 0]) == ERROR_DEV_NOT_EXIST
+
+    assert stats.get(0, DIO_CONFIGURE)["count"] == 3
+    assert stats.get(1, DIO_CONFIGURE)["errors"] == 1
+    assert stats.get(None, GET_DEVICE_BY_EEPROM_BYTE)["errors"] == 1
+    assert stats.get(0, DIO_WRITE1) is None
+    assert [(row["device"], row["call"], row["count"]) for row in stats.snapshot()["calls"]] == [
+        (0, DIO_CONFIGURE, 3),
+        (1, GET_DEVICE_BY_EEPROM_BYTE, 1), (1, DIO_CONFIGURE, 1), (1, DIO_WRITE1, 1), (1, DIO_READ_ALL, 1),
+        (None, GET_DEVICE_BY_EEPROM_BYTE, 1),
+    ]
+
+
+def test_a_raising_call_counts_as_an_error():
+    class Broken(SimulatedBackend):
+        def dio_read_all(self, device_index, port_count):
+            raise OSError("USB gone")
+
+    stats = DIOStats(enabled=True)
+    backend = instrument(Broken([(0x01, 48)]), stats)
+    with pytest.raises(OSError):
+        backend.dio_read_all(0, 6)
+    assert stats.get(0, DIO_READ_ALL)["errors"] == 1
+
+
+def test_latency_lands_in_its_bucket():
+    stats = DIOStats(enabled=True)
+    backend = instrument(SimulatedBackend([(0x01, 48)], latency={DIO_CONFIGURE: 0.012}), stats)
+    backend.dio_configure(0, 0, 0x3F, [0] * 6)
+    row = stats.get(0, DIO_CONFIGURE)
+    assert row["min_us"] >= 12000
+    assert sum(row["histogram"][:BUCKET_EDGES_US.index(10000) + 1]) == 0
+
+
+def test_disabled_records_nothing_and_reset_clears():
+    stats = DIOStats()
+    backend = instrument(SimulatedBackend([(0x01, 48)]), stats)
+    backend.dio_configure(0, 0, 0x3F, [0] * 6)
+    assert stats.snapshot()["calls"] == []
+
+    stats.enable()
+    backend.dio_configure(0, 0, 0x3F, [0] * 6)
+    stats.disable()
+    backend.dio_configure(0, 0, 0x3F, [0] * 6)
+    assert stats.get(0, DIO_CONFIGURE)["count"] == 1
+
+    since = stats.since
+    stats.reset()
+    assert stats.snapshot()["calls"] == [] and stats.since >= since
+    assert not stats.enabled
+
+
+def test_board_calls_are_seen_through_acces_dio():
+    stats = DIOStats(enabled=True)
+    backend = SimulatedBackend([(0x01, 48)])
+    dio = AccesDIO("ACCESSIO_48", backend=backend, stats=stats)
+    assert instrument(dio.backend) is dio.backend
+    device_index = dio.get_device_by_eeprom_byte(0x01)
+    dio.reset_all_lines_low(device_index)
+    dio.write_groupportbit_preserve(device_index, "0A0", 1)
+    calls = {row["call"]: row["count"] for row in stats.snapshot()["calls"]}
+    assert calls[GET_DEVICE_BY_EEPROM_BYTE] == 1
+    assert calls[DIO_CONFIGURE] == backend.call_counts[DIO_CONFIGURE]
+
+
+def test_format_stats():
+    stats = DIOStats()
+    assert "disabled" in format_stats(stats.snapshot())
+    stats.enable()
+    assert "enabled" in format_stats(stats.snapshot())
+    stats.record(DIO_CONFIGURE, 0, 30_000, False)
+    stats.record(GET_DEVICE_BY_EEPROM_BYTE, None, 5_000, True)
+    lines = format_stats(stats.snapshot()).splitlines()
+    assert lines[1].split()[:4] == ["0", DIO_CONFIGURE, "1", "0"]
+    assert lines[2].split()[:4] == ["-", GET_DEVICE_BY_EEPROM_BYTE, "1", "1"]
+    assert lines[-2].endswith("<=50:1") and lines[-1].endswith("<=10:1")
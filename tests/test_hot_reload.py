@@ -0,0 +1,145 @@
+"""
+ConfigLoader.check_for_changes swaps in an edited config, re-parsing and
+re-indexing only the changed sheets / models, and unmaps a replaced index
+once no loader holds it.
+"""
+import json
+import os
+
+import pytest
+
+from config_cache import ConfigCache
+from config_loader import ConfigLoader
+
+ROWS = [
+    {"PathName": "Main ON", "SwitchDriverCommand": "0;0A0,1", "Model_": "Model_A"},
+    {"PathName": "Fan ON", "SwitchDriverCommand": "0;0B1,1", "Model_": "Model_B"},
+]
+DIO_LIST = [{"NAME": "TestHead", "MODEL": "ACCESSIO_48", "HEXADDRESS": "1"}]
+
+
+class ConfigFile:
+    """A JSON config that is rewritten with a new mtime on every save."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.saves = 0
+
+    def save(self, rows, text=None):
+        self.saves += 1
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text if text is not None else json.dumps({"DIO_List": DIO_LIST, "Model Sheets": rows}))
+        mtime_ns = self.saves * 1_000_000_000
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def edit(self, model, command):
+        rows = [dict(row) for row in ROWS]
+        for row in rows:
+            if row["Model_"] == model:
+                row["SwitchDriverCommand"] = command
+        self.save(rows)
+
+
+def mapped_index(cache, config):
+    """The index the cache currently hands out for the config (without holding it)."""
+    index = cache.load_mapped_index(config.path, 'json')
+    cache.release_mapped_index(index)
+    return index
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = ConfigFile(tmp_path / "config.json")
+    config.save(ROWS)
+    return config
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ConfigCache(str(tmp_path / "cache"))
+
+
+def test_unchanged_file_reports_nothing(config, cache):
+    loader = ConfigLoader(config.path, config_cache=cache)
+    assert loader.check_for_changes() == []     # Nothing loaded yet
+    loader.get_switch_command("Main ON", "Model_A")
+    assert loader.check_for_changes() == []
+    config.save(ROWS)                           # Saved without content changes
+    assert loader.check_for_changes() == []
+
+
+def test_compiled_reload_reindexes_only_the_edited_model(config, cache):
+    loader = ConfigLoader(config.path, config_cache=cache)
+    loader.get_compiled()
+    before = loader.get_path_index()
+    config.edit("Model_B", "0;0B2,1")
+
+    assert loader.check_for_changes() == ["Model_B"]
+    after = loader.get_path_index()
+    assert after.reindexed == ["Model_B"]
+    assert after.tables["Model_A"] is before.tables["Model_A"]
+    assert loader.get_switch_command("Fan ON", "Model_B") == "0;0B2,1"
+
+
+def test_unparsable_save_keeps_the_loaded_config(config, cache):
+    loader = ConfigLoader(config.path, config_cache=cache)
+    loader.get_compiled()
+    config.save(ROWS, text='{"DIO_List": [')
+    assert loader.check_for_changes() == []
+    assert loader.get_switch_command("Main ON", "Model_A") == "0;0A0,1"
+
+    config.edit("Model_A", "0;0A3,1")
+    assert loader.check_for_changes() == ["Model_A"]
+    assert loader.get_switch_command("Main ON", "Model_A") == "0;0A3,1"
+
+
+def test_mapped_reload_closes_the_replaced_index(config, cache):
+    loader = ConfigLoader(config.path, config_cache=cache)
+    assert loader.get_switch_command("Main ON", "Model_A") == "0;0A0,1"
+    old = mapped_index(cache, config)
+    config.edit("Model_B", "0;0B2,1")
+
+    assert loader.check_for_changes() == ["Model_B"]
+    assert old.closed
+    assert loader.get_switch_command("Fan ON", "Model_B") == "0;0B2,1"
+    assert cache.stats["index_builds"] == 2
+    # The old version's index file is removed with it
+    assert len([name for name in os.listdir(cache.cache_dir) if name.endswith(".idx")]) == 1
+
+
+def test_mapped_reload_reuses_unchanged_tables(config, cache):
+    loader = ConfigLoader(config.path, config_cache=cache)
+    loader.get_switch_command("Main ON", "Model_A")
+    before = cache.load(config.path, 'json').get_path_index()
+    config.edit("Model_B", "0;0B2,1")
+    loader.check_for_changes()
+    assert cache.load(config.path, 'json').get_path_index().reindexed == ["Model_B"]
+    assert before.tables["Model_A"] is cache.load(config.path, 'json').get_path_index().tables["Model_A"]
+
+
+def test_shared_index_stays_mapped_for_other_loaders(config, cache):
+    first = ConfigLoader(config.path, config_cache=cache)
+    second = ConfigLoader(config.path, config_cache=cache)
+    first.get_switch_command("Main ON", "Model_A")
+    second.get_switch_command("Main ON", "Model_A")
+    old = mapped_index(cache, config)
+    config.edit("Model_A", "0;0A3,1")
+
+    assert first.check_for_changes() == ["Model_A"]
+    assert not old.closed
+    assert second.get_switch_command("Fan ON", "Model_B") == "0;0B1,1"
+    assert second.check_for_changes() == ["Model_A"]
+    assert old.closed
+    assert second.get_switch_command("Main ON", "Model_A") == "0;0A3,1"
+
+
+def test_switching_to_the_compiled_config_releases_the_index(config, cache):
+    loader = ConfigLoader(config.path, config_cache=cache)
+    loader.get_switch_command("Main ON", "Model_A")
+    old = mapped_index(cache, config)
+    loader.get_compiled()
+    config.edit("Model_A", "0;0A3,1")
+    assert loader.check_for_changes() == ["Model_A"]
+    # Another loader maps the new version, which replaces the released index
+    ConfigLoader(config.path, config_cache=cache).get_switch_command("Main ON", "Model_A")
+    assert old.closed
@@ -0,0 +1,130 @@
+"""
+The ring buffer keeps the most recent records unformatted, so a record the
+console does not show costs an append until the buffer is read.
+"""
+import io
+import logging
+
+import pytest
+
+import testhead_logging
+from testhead_control import run_command_list
+from testhead_logging import (RingBufferHandler, configure_logging, disable_ring_buffer, enable_ring_buffer,
+                              get_logger, get_ring_buffer, parse_level)
+
+
+class Counted:
+    """Counts how often it is turned into text."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "counted"
+
+
+@pytest.fixture(autouse=True)
+def clean_logging(monkeypatch):
+    monkeypatch.delenv(testhead_logging.LOG_LEVEL_ENV, raising=False)
+    monkeypatch.delenv(testhead_logging.LOG_RING_ENV, raising=False)
+    yield
+    disable_ring_buffer()
+    if testhead_logging._console_handler is not None:
+        get_logger().removeHandler(testhead_logging._console_handler)
+        testhead_logging._console_handler = None
+    get_logger().setLevel(logging.NOTSET)
+    get_logger().propagate = True
+
+
+def test_capacity_keeps_the_newest_records():
+    ring = enable_ring_buffer(capacity=3)
+    for number in range(5):
+        get_logger("test").debug("record %d", number)
+    assert [line.rsplit(": ", 1)[-1] for line in ring.lines()] == ["record 2", "record 3", "record 4"]
+    assert [line.rsplit(": ", 1)[-1] for line in ring.lines(2)] == ["record 3", "record 4"]
+    assert ring.lines(0) == []
+    assert "DEBUG testhead.test: record 4" in ring.lines(1)[0]
+
+
+def test_records_are_formatted_only_when_read():
+    stream = io.StringIO()
+    configure_logging("WARNING", stream)
+    ring = enable_ring_buffer()
+    value = Counted()
+    get_logger("test").debug("value %s", value)
+    assert value.formatted == 0 and stream.getvalue() == ""
+    assert ring.lines()[-1].endswith("value counted")
+    assert value.formatted == 1
+
+
+def test_below_every_handler_nothing_is_kept():
+    configure_logging("WARNING", io.StringIO())
+    enable_ring_buffer(level="INFO")
+    value = Counted()
+    get_logger("test").debug("value %s", value)
+    assert not get_logger("test").isEnabledFor(logging.DEBUG)
+    assert get_ring_buffer().records() == [] and value.formatted == 0
+
+
+def test_console_level_and_ring_level_are_independent():
+    stream = io.StringIO()
+    configure_logging("INFO", stream)
+    ring = enable_ring_buffer(level="DEBUG")
+    get_logger("test").debug("quiet")
+    get_logger("test").info("shown")
+    assert stream.getvalue() == "shown\n"
+    assert [record.getMessage() for record in ring.records()] == ["quiet", "shown"]
+
+    disable_ring_buffer()
+    assert get_ring_buffer() is None
+    assert get_logger().level == logging.INFO
+
+
+def test_enable_replaces_the_buffer():
+    first = enable_ring_buffer()
+    get_logger().warning("old")
+    second = enable_ring_buffer()
+    assert second is get_ring_buffer() and second is not first
+    assert second.records() == []
+    assert get_logger().handlers.count(second) == 1 and first not in get_logger().handlers
+
+
+def test_configure_from_environment(monkeypatch):
+    monkeypatch.setenv(testhead_logging.LOG_LEVEL_ENV, "info")
+    monkeypatch.setenv(testhead_logging.LOG_RING_ENV, "5")
+    stream = io.StringIO()
+    configure_logging(stream=stream)
+    assert get_ring_buffer()._records.maxlen == 5
+    get_logger("test").info("hello")
+    assert stream.getvalue() == "hello\n"
+
+
+def test_dump_and_clear():
+    ring = RingBufferHandler(capacity=10)
+    ring.handle(logging.makeLogRecord({"name": "testhead", "levelno": logging.INFO, "levelname": "INFO",
+                                       "msg": "one %s", "args": ("two",)}))
+    stream = io.StringIO()
+    ring.dump(stream)
+    assert stream.getvalue().endswith("INFO testhead: one two\n")
+    ring.clear()
+    assert ring.lines() == []
+
+
+def test_switching_step_is_recorded(simulator, make_config, capsys):
+    simulator("1:ACCESSIO_48")
+    configure_logging("WARNING", io.StringIO())
+    ring = enable_ring_buffer()
+    assert run_command_list(make_config({"Main ON": "0;0A0,1"}), "Model_Common", "TestHead", ["Main ON"])
+    messages = [record.getMessage() for record in ring.records()]
+    assert any("Board ID: 1 found" in message for message in messages)
+
+
+@pytest.mark.parametrize("level, expected", [("debug", logging.DEBUG), (" Warning ", logging.WARNING), (15, 15)])
+def test_parse_level(level, expected):
+    assert parse_level(level) == expected
+
+
+def test_parse_level_rejects_unknown_names():
+    with pytest.raises(ValueError, match="loud"):
+        parse_level("loud")
@@ -0,0 +1,127 @@
+"""
+MappedIndex answers the same lookups as the compiled config's PathIndex
+straight from the mapped file, and rejects files that are not a valid index.
+"""
+import json
+import struct
+
+import pytest
+
+from config_cache import ConfigCache, compile_config
+from config_loader import ConfigLoader
+from mapped_index import INDEX_MAGIC, INDEX_VERSION, MappedIndex, write_mapped_index
+
+CONFIG = {
+    "DIO_List": [{"NAME": "TestHead", "MODEL": "ACCESSIO_48", "HEXADDRESS": "1"}],
+    "Relay_Timing": [{"NAME": "", "GroupPortBit": "*", "SETTLE_MS": "5", "BREAK_MS": ""}],
+    "Model Sheets": [{"PathName": f"Path {number}", "SwitchDriverCommand": f"0;0A{number % 8},1",
+                      "ITEM": str(number), "Model_": f"Model_{number % 3}"} for number in range(40)]
+                    + [{"PathName": "Path 0", "SwitchDriverCommand": "0;0C0,1", "Model_": "Model_0"},
+                       {"PathName": "Ünïcode ✓", "SwitchDriverCommand": "0;0B0,1", "Model_": "Model_0"}],
+}
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(CONFIG), encoding='utf-8')
+    return compile_config(str(path), 'json')
+
+
+@pytest.fixture
+def index(compiled, tmp_path):
+    index_path = str(tmp_path / "config.idx")
+    write_mapped_index(compiled, index_path)
+    index = MappedIndex(index_path)
+    yield index
+    index.close()
+
+
+def test_lookups_match_the_path_index(compiled, index):
+    path_index = compiled.get_path_index()
+    for table, entries in path_index.tables.items():
+        for path_name, expected in entries.items():
+            entry = index.lookup(path_name, table)
+            assert (entry.command, entry.position, entry.row) == (expected.command, expected.position, expected.row)
+    assert index.lookup("Path 0", "Model_0").command == "0;0A0,1"     # First row wins
+    assert index.lookup("Ünïcode ✓", "Model_0").item is None
+
+
+def test_meta_block(compiled, index):
+    assert index.source == compiled.source
+    assert index.sheet_names == ["DIO_List", "Relay_Timing", "Model Sheets"]
+    assert index.model_names == ["Model_0", "Model_1", "Model_2"]
+    assert index.dio_list == CONFIG["DIO_List"]
+    assert index.relay_timing == CONFIG["Relay_Timing"]
+    assert index.row_count("Model_1") == 13 and index.row_count("Nope") is None
+
+
+@pytest.mark.parametrize("path_name, table", [("Path 1", "Model_0"), ("Nope", "Model_1"), ("Path 1", "Model_9")])
+def test_missing_entries_raise_like_the_path_index(compiled, index, path_name, table):
+    with pytest.raises(ValueError) as expected:
+        compiled.get_path_index().lookup(path_name, table)
+    with pytest.raises(ValueError, match=str(expected.value)):
+        index.lookup(path_name, table)
+
+
+def test_changed_tables_between_versions(compiled, index, tmp_path):
+    data = json.loads(json.dumps(CONFIG))
+    data["Model Sheets"][1]["SwitchDriverCommand"] = "0;0B7,1"     # Model_1
+    path = tmp_path / "edited.json"
+    path.write_text(json.dumps(data), encoding='utf-8')
+    write_mapped_index(compile_config(str(path), 'json'), str(tmp_path / "edited.idx"))
+    edited = MappedIndex(str(tmp_path / "edited.idx"))
+    try:
+        assert edited.changed_tables(index) == ["Model_1"]
+    finally:
+        edited.close()
+
+
+def corrupt(data):
+    header = struct.Struct("<8sIIIIQQQQ")
+    return {
+        "empty": b"",
+        "truncated": data[:20],
+        "bad magic": b"NOTANIDX" + data[8:],
+        "old version": INDEX_MAGIC + struct.pack("<I", INDEX_VERSION - 1) + data[12:],
+        "bad meta": data[:header.size] + b"{" * 16 + data[header.size + 16:],
+    }
+
+
+@pytest.mark.parametrize("case", ["empty", "truncated", "bad magic", "old version", "bad meta"])
+def test_invalid_files_are_rejected(index, tmp_path, case):
+    with open(index.index_path, 'rb') as f:
+        data = f.read()
+    path = tmp_path / "broken.idx"
+    path.write_bytes(corrupt(data)[case])
+    with pytest.raises(ValueError):
+        MappedIndex(str(path))
+
+
+def test_corrupt_index_file_is_rebuilt(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(CONFIG), encoding='utf-8')
+    cache = ConfigCache(str(tmp_path / "cache"))
+    index = cache.load_mapped_index(str(config_path), 'json')
+    index_path = index.index_path
+    index.close()
+    with open(index_path, 'r+b') as f:
+        f.write(b"garbage!")
+
+    other = ConfigCache(cache.cache_dir)
+    loader = ConfigLoader(str(config_path), config_cache=other)
+    assert loader.get_switch_command("Path 4", "Model_1") == "0;0A4,1"
+    assert other.stats["index_builds"] == 1
+    assert other.stats["compiles"] == 0     # Rebuilt from the compiled cache file
+
+
+def test_second_cache_maps_the_existing_file(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(CONFIG), encoding='utf-8')
+    ConfigCache(str(tmp_path / "cache")).load_mapped_index(str(config_path), 'json')
+
+    other = ConfigCache(str(tmp_path / "cache"))
+    loader = ConfigLoader(str(config_path), config_cache=other)
+    assert loader.get_device_info("TestHead") == ("ACCESSIO_48", "1")
+    assert loader.get_command_count("Model_2") == 13
+    assert other.stats["index_builds"] == 0 and other.stats["compiles"] == 0
@@ -0,0 +1,79 @@
+"""
+run_multi_board resolves every board and PathName before touching any
+relay, then writes the boards in parallel.
+"""
+import time
+
+import pytest
+
+import testhead_control
+from testhead_control import parse_board_commands
+
+BOARDS = (("TestHead", "ACCESSIO_48", "1"), ("GPIO", "ACCESSIO_48", "2"), ("Spare", "ACCESSIO_48", "3"))
+PATHS = {"Main ON": "0;0A0,1", "Fan ON": "0;0B1,1", "Lamp ON": "0;1C7,1"}
+
+
+def test_each_board_gets_its_command(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_48,3:ACCESSIO_48")
+    control = testhead_control.Testhead_Control()
+    results = control.run_multi_board(make_config(PATHS, BOARDS),
+                                      {"TestHead": "Main ON", "GPIO": "Fan ON"}, "Model_Common")
+    assert control.command_success
+    assert all(result["success"] and result["settled_at"] for result in results.values())
+    assert backend.get_board(0x01).read_ports() == [0x01, 0, 0, 0, 0, 0]
+    assert backend.get_board(0x02).read_ports() == [0, 0x02, 0, 0, 0, 0]
+    assert backend.call_counts["DIO_Configure"] == 2
+
+
+def test_direct_commands_without_sheet(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_48")
+    control = testhead_control.Testhead_Control()
+    control.run_multi_board(make_config(PATHS, BOARDS), {"TestHead": "0;0C0,1", "GPIO": "0;1A1,1"})
+    assert control.command_success
+    assert backend.get_board(0x01).read_ports()[2] == 0x01
+    assert backend.get_board(0x02).read_ports()[3] == 0x02
+
+
+def test_boards_are_written_in_parallel(simulator, make_config):
+    simulator("1:ACCESSIO_48,2:ACCESSIO_48,3:ACCESSIO_48", latency_ms=40)
+    control = testhead_control.Testhead_Control()
+    start = time.perf_counter()
+    results = control.run_multi_board(make_config(PATHS, BOARDS),
+                                      {"TestHead": "Main ON", "GPIO": "Fan ON", "Spare": "Lamp ON"}, "Model_Common")
+    elapsed = time.perf_counter() - start
+    assert control.command_success
+    # Serial writes would take the sum of the per-board times
+    assert elapsed < sum(result["elapsed_s"] for result in results.values())
+
+
+def test_unknown_pathname_fails_before_any_write(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_48")
+    control = testhead_control.Testhead_Control()
+    with pytest.raises(ValueError):
+        control.run_multi_board(make_config(PATHS, BOARDS), {"TestHead": "Main ON", "GPIO": "Nope"}, "Model_Common")
+    assert backend.call_counts["DIO_Configure"] == 0
+    assert not control.command_success
+
+
+def test_two_names_for_one_board_are_rejected(simulator, make_config):
+    simulator("1:ACCESSIO_48")
+    boards = (("TestHead", "ACCESSIO_48", "1"), ("Alias", "ACCESSIO_48", "01"))
+    with pytest.raises(ValueError, match="same board"):
+        testhead_control.Testhead_Control().run_multi_board(make_config(PATHS, boards), {"TestHead": "0", "Alias": "0"})
+
+
+def test_missing_board_fails_only_its_own_command(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    control = testhead_control.Testhead_Control()
+    results = control.run_multi_board(make_config(PATHS, BOARDS), {"TestHead": "Main ON", "GPIO": "Fan ON"}, "Model_Common")
+    assert results["TestHead"]["success"]
+    assert not results["GPIO"]["success"] and "0x02" in results["GPIO"]["error"]
+    assert not control.command_success
+    assert backend.get_board(0x01).read_ports()[0] == 0x01
+
+
+def test_parse_board_commands():
+    assert parse_board_commands(["TestHead=0;0A0,1", "GPIO = Fan=ON"]) == {"TestHead": "0;0A0,1", "GPIO": "Fan=ON"}
+    for arguments in (["TestHead"], ["=0"], ["TestHead="], ["TestHead=0", "TestHead=1"]):
+        with pytest.raises(ValueError):
+            parse_board_commands(arguments)
@@ -0,0 +1,98 @@
+"""
+PathIndex answers PathName lookups like the sheet scans it replaced: the
+first row wins, duplicates are listed, and missing sheets, columns and
+PathNames raise the same errors.
+"""
+import json
+
+import pytest
+
+from config_cache import ConfigCache, compile_config
+from config_loader import ConfigLoader
+
+ROWS = [
+    {"PathName": "Main ON", "SwitchDriverCommand": "0;0A0,1", "ITEM": "1", "TEST_DESC": "Main", "Model_": "Model_A"},
+    {"PathName": "Fan ON", "SwitchDriverCommand": "0;0B1,1", "Model_": "Model_A"},
+    {"PathName": "Main ON", "SwitchDriverCommand": "0;0A7,1", "Model_": "Model_A"},
+    {"PathName": "Main ON", "SwitchDriverCommand": "0;0C0,1", "Model_": "Model_B"},
+]
+
+
+def write_json(tmp_path, data, name="config.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_first_row_wins_and_duplicates_are_listed(tmp_path):
+    index = compile_config(write_json(tmp_path, {"Model Sheets": ROWS}), 'json').get_path_index()
+    entry = index.lookup("Main ON", "Model_A")
+    assert (entry.command, entry.position, entry.item, entry.test_desc) == ("0;0A0,1", 0, "1", "Main")
+    assert index.lookup("Main ON", "Model_B").command == "0;0C0,1"
+    assert index.duplicates == [("Model_A", "Main ON", 0, 2)]
+    assert index.lookup("Fan ON", "Model_A").item is None
+
+
+def test_one_key_per_model_layout(tmp_path):
+    data = {"Model_Common": [{"PathName": "Reset", "SwitchDriverCommand": "0"},
+                             {"PathName": "Reset", "SwitchDriverCommand": "0;0A0,1"}]}
+    index = compile_config(write_json(tmp_path, data), 'json').get_path_index()
+    assert index.lookup("Reset", "Model_Common").command == "0"
+    assert index.duplicates == [("Model_Common", "Reset", 0, 1)]
+
+
+def test_blank_pathnames_are_not_reported(tmp_path):
+    rows = [{"PathName": "", "SwitchDriverCommand": "0"}, {"PathName": "", "SwitchDriverCommand": "0"}]
+    index = compile_config(write_json(tmp_path, {"Model_Common": rows}), 'json').get_path_index()
+    assert index.duplicates == []
+
+
+def test_json_lookup_errors(tmp_path):
+    index = compile_config(write_json(tmp_path, {"Model Sheets": ROWS}), 'json').get_path_index()
+    for path_name, table in (("Nope", "Model_A"), ("Main ON", "Model_C")):
+        with pytest.raises(ValueError, match="not found in the command list"):
+            index.lookup(path_name, table)
+
+
+def test_loader_matches_a_scan_of_the_rows(tmp_path):
+    loader = ConfigLoader(write_json(tmp_path, {"Model Sheets": ROWS}), config_cache=ConfigCache(None))
+    for row in ROWS:
+        first = next(other for other in ROWS if other["PathName"] == row["PathName"] and other["Model_"] == row["Model_"])
+        assert loader.get_switch_command(row["PathName"], row["Model_"]) == first["SwitchDriverCommand"]
+
+
+def test_recompile_reindexes_only_changed_models(tmp_path):
+    path = write_json(tmp_path, {"Model Sheets": ROWS})
+    before = compile_config(path, 'json')
+    old_index = before.get_path_index()
+    rows = [dict(row) for row in ROWS]
+    rows[3]["SwitchDriverCommand"] = "0;0C1,1"
+    write_json(tmp_path, {"Model Sheets": rows})
+
+    index = compile_config(path, 'json', previous=before).get_path_index(old_index)
+    assert index.reindexed == ["Model_B"]
+    assert index.tables["Model_A"] is old_index.tables["Model_A"]
+    assert index.duplicates == old_index.duplicates
+    assert index.lookup("Main ON", "Model_B").command == "0;0C1,1"
+
+
+def test_excel_sheets(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Model_Common"
+    for row in (["pathname", "SWITCHDRIVERCOMMAND"], ["Main ON", "0;0A0,1"], ["Main ON", "0;0A1,1"]):
+        sheet.append(row)
+    workbook.create_sheet("Notes").append(["Text"])
+    path = str(tmp_path / "config.xlsx")
+    workbook.save(path)
+
+    index = compile_config(path, 'excel').get_path_index()
+    assert index.lookup("Main ON", "Model_Common").command == "0;0A0,1"
+    assert index.duplicates == [("Model_Common", "Main ON", 0, 1)]
+    with pytest.raises(ValueError, match="'PathName' column not found in sheet 'Notes'"):
+        index.lookup("Main ON", "Notes")
+    with pytest.raises(ValueError, match="Sheet 'Model_X' not found"):
+        index.lookup("Main ON", "Model_X")
+    with pytest.raises(ValueError, match="not found in sheet 'Model_Common'"):
+        index.lookup("Nope", "Model_Common")
@@ -0,0 +1,123 @@
+"""
+A plan is looked up and compiled as a whole before any relay switches, so
+every bad step is reported up front; run_plan then applies the steps in
+order and reports their timing.
+"""
+import json
+
+import pytest
+
+from accesio.accesio_dio import DIOError
+from accesio.dio_simulator import ERROR_DEV_NOT_EXIST
+from plan_runner import compile_plan, load_plan, main, run_plan
+import testhead_session
+
+BOARDS = (("TestHead", "ACCESSIO_48", "1"), ("GPIO", "ACCESSIO_16", "2"))
+PATHS = {"Main ON": "0;0A0,1", "Fan ON": "0B1,1", ("Model_Common", "Clear"): "0", "Wide": "1A0,1", "Empty": ""}
+
+
+@pytest.fixture
+def write_plan(tmp_path, make_config):
+    """Writes a plan next to its config; returns its path."""
+    config = make_config(PATHS, BOARDS)
+
+    def write(steps, **defaults):
+        data = {"config": config.rsplit("/", 1)[-1], "dio": "TestHead", "sheet": "Model_Common", "steps": steps}
+        data.update(defaults)
+        path = tmp_path / "plan.json"
+        path.write_text(json.dumps(data), encoding='utf-8')
+        return str(path)
+
+    return write
+
+
+def test_load_plan_applies_defaults_and_overrides(write_plan):
+    plan = load_plan(write_plan(["Main ON", {"path": "Fan ON", "dwell_ms": 20},
+                                 {"command": "0;0A1,1", "dio": "GPIO"}]))
+    assert [(step.number, step.dio_name, step.sheet_name, step.path_name, step.command, step.dwell_s)
+            for step in plan.steps] == [(1, "TestHead", "Model_Common", "Main ON", None, 0.0),
+                                        (2, "TestHead", "Model_Common", "Fan ON", None, 0.02),
+                                        (3, "GPIO", None, None, "0;0A1,1", 0.0)]
+    assert plan.dio_names == ["TestHead", "GPIO"]
+    assert plan.config_file_name.startswith("/")    # Found next to the plan
+
+
+@pytest.mark.parametrize("steps, defaults, message", [
+    ([], {}, "no \"steps\""),
+    ([{"path": "Main ON", "command": "0"}], {}, "Plan step 1"),
+    (["Main ON", 5], {}, "Plan step 2"),
+    (["Main ON"], {"dio": None}, "no \"dio\""),
+    (["Main ON"], {"sheet": None}, "no \"sheet\""),
+    ([{"path": "Main ON", "dwell_ms": "long"}], {}, "dwell_ms must be a number"),
+])
+def test_invalid_plans(write_plan, steps, defaults, message):
+    with pytest.raises(ValueError, match=message):
+        load_plan(write_plan(steps, **defaults))
+
+
+def test_every_bad_step_is_reported_before_any_switching(simulator, write_plan):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_16")
+    plan = load_plan(write_plan(["Main ON", "Nope", {"command": "0;9Z9,1"}, {"path": "Wide", "dio": "GPIO"},
+                                 {"command": "0", "dio": "Nobody"}]))
+    with pytest.raises(ValueError) as raised:
+        run_plan(plan)
+    message = str(raised.value)
+    assert "4 error(s)" in message
+    for expected in ("Nobody", "Step 2 (Model_Common/Nope)", "Step 3 (0;9Z9,1)", "Step 4 (Model_Common/Wide)"):
+        assert expected in message
+    assert not plan.is_compiled
+    assert sum(backend.call_counts.values()) == 0
+
+
+def test_compile_needs_no_hardware(simulator, write_plan):
+    backend = simulator("")
+    plan = compile_plan(load_plan(write_plan(["Main ON", "Empty", {"command": "0;0A1,1", "dio": "GPIO"}])))
+    assert plan.is_compiled
+    assert plan.steps[0].command == "0;0A0,1" and plan.steps[0].compiled.reset
+    assert plan.steps[1].compiled is None
+    assert plan.steps[2].compiled.port_count == 2
+    assert sum(backend.call_counts.values()) == 0
+
+
+def test_run_plan_applies_steps_in_order(simulator, write_plan):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_16")
+    plan = load_plan(write_plan(["Main ON", {"path": "Fan ON", "dwell_ms": 30}, "Empty",
+                                 {"command": "0;0A7,1", "dio": "GPIO"}]))
+    report = run_plan(plan)
+    assert backend.get_board(0x01).latch == [0x01, 0x02, 0, 0, 0, 0]
+    assert backend.get_board(0x02).latch == [0x80, 0]
+    assert [entry["step"] for entry in report.steps] == [1, 2, 3, 4]
+    assert report.steps[1]["dwell_ms"] >= 30
+    assert report.total_ms >= report.setup_ms + sum(entry["switch_ms"] for entry in report.steps)
+
+
+def test_failed_step_keeps_earlier_steps(simulator, write_plan, monkeypatch, capsys):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_16")
+    plan = compile_plan(load_plan(write_plan(["Main ON", {"command": "0;0A1,1", "dio": "GPIO"}, "Fan ON"])))
+    apply_compiled = testhead_session.TestheadSession.apply_compiled
+
+    def fail_on_gpio(session, compiled):
+        if session.dio_name == "GPIO":
+            backend.fail_next("DIO_Configure", ERROR_DEV_NOT_EXIST)
+        return apply_compiled(session, compiled)
+
+    monkeypatch.setattr(testhead_session.TestheadSession, "apply_compiled", fail_on_gpio)
+    with pytest.raises(DIOError):
+        run_plan(plan)
+    assert "Step 2 (0;0A1,1) failed" in capsys.readouterr().out
+    assert backend.get_board(0x01).latch == [0x01, 0, 0, 0, 0, 0]    # Step 3 never ran
+
+
+def test_main_check_and_report(simulator, write_plan, tmp_path, capsys):
+    simulator("1:ACCESSIO_48")
+    plan_path = write_plan(["Main ON", "Fan ON"])
+    assert main([plan_path, "--check"]) == 0
+    assert "Plan OK: 2 step(s)" in capsys.readouterr().out
+
+    report_path = tmp_path / "report.json"
+    assert main([plan_path, "--report", str(report_path)]) == 0
+    assert [entry["label"] for entry in json.loads(report_path.read_text())["steps"]] == \
+        ["Model_Common/Main ON", "Model_Common/Fan ON"]
+
+    assert main([write_plan(["Nope"]), "--check"]) == 1
+    assert main([plan_path, "--report"]) == 1
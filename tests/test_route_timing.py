@@ -0,0 +1,137 @@
+"""
+Route timings are appended one line per run, compacted to a rolling window
+with each run's own time, and compared against a baseline by p95.
+"""
+import json
+import os
+
+import pytest
+
+import route_timing
+from route_timing import (PHASES, RouteTimer, RouteTimingStore, compact_timings, find_regressions, format_report,
+                          main, read_timings, rotated_path, write_timings)
+
+
+def sample(path, total_ms, when):
+    phases = [0.0] * (len(PHASES) - 1) + [total_ms]      # All of it spent writing
+    return json.dumps({"platform": "Platform_A", "sheet": "Model_Common", "path": path, "time": when,
+                       "ms": [total_ms] + phases}) + "\n"
+
+
+def write_samples(file_path, lines):
+    with open(file_path, 'a', encoding='utf-8') as f:
+        f.write("".join(lines))
+    return str(file_path)
+
+
+def routes_of(totals, path="Main ON", start=1000.0):
+    """Routes with one sample per total, spent writing, one second apart."""
+    return {("Platform_A", "Model_Common", path): {
+        "platform": "Platform_A", "sheet": "Model_Common", "path": path, "count": len(totals),
+        "updated": start + len(totals) - 1,
+        "samples": [[total] + [0.0] * (len(PHASES) - 1) + [total] for total in totals],
+        "times": [start + number for number in range(len(totals))]}}
+
+
+def test_read_keeps_each_samples_time(tmp_path):
+    timings = write_samples(tmp_path / "timings.jsonl", [sample("Main ON", 1.0, 100.0), sample("Fan ON", 2.0, 150.0),
+                                                         "{cut short\n", sample("Main ON", 3.0, 200.0)])
+    routes = read_timings(timings)
+    main_on = routes[("Platform_A", "Model_Common", "Main ON")]
+    assert main_on["times"] == [100.0, 200.0] and main_on["updated"] == 200.0
+    assert [row[0] for row in main_on["samples"]] == [1.0, 3.0]
+    assert routes[("Platform_A", "Model_Common", "Fan ON")]["count"] == 1
+
+
+def test_compaction_keeps_the_window_and_each_runs_time(tmp_path):
+    timings = str(tmp_path / "timings.jsonl")
+    write_samples(rotated_path(timings), [sample("Main ON", number, 1000.0 + number) for number in range(10)])
+    write_samples(timings, [sample("Main ON", number, 1000.0 + number) for number in range(10, 25)])
+    routes = compact_timings(timings, window=8)
+    assert not os.path.exists(rotated_path(timings))
+    assert routes[("Platform_A", "Model_Common", "Main ON")]["count"] == 25
+
+    with open(timings, encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["time"] for row in rows] == [1000.0 + number for number in range(17, 25)]
+    assert [row["ms"][0] for row in rows] == list(range(17, 25))
+
+    # Compacting again changes nothing
+    compact_timings(timings, window=8)
+    with open(timings, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == rows
+
+
+def test_store_appends_without_reading(tmp_path):
+    timings = str(tmp_path / "timings" / "timings.jsonl")
+    store = RouteTimingStore(timings, flush_interval=3600)
+    timer = RouteTimer()
+    for phase in PHASES:
+        timer.mark(phase)
+    store.record("C:/configs/Platform_A.xlsx", "Model_Common", "Main ON", timer)
+    store.record("Platform_A.json", "Model_Common", "Main ON", timer)
+    assert not os.path.exists(timings)
+    assert store.flush() == 2 and store.flush() == 0
+    route = store.routes()[("Platform_A", "Model_Common", "Main ON")]
+    assert route["count"] == 2 and len(route["times"]) == 2
+    assert route["samples"][0][0] == pytest.approx(sum(route["samples"][0][1:]), abs=0.01)
+
+
+def test_a_big_file_is_rotated_before_the_append(tmp_path, monkeypatch):
+    timings = write_samples(tmp_path / "timings.jsonl", [sample("Main ON", 1.0, 100.0)] * 3)
+    monkeypatch.setattr(route_timing, "ROTATE_BYTES", 10)
+    store = RouteTimingStore(timings)
+    store.record("Platform_A.json", "Model_Common", "Main ON", RouteTimer())
+    store.flush()
+    assert os.path.exists(rotated_path(timings))
+    assert read_timings(timings)[("Platform_A", "Model_Common", "Main ON")]["count"] == 4
+    assert read_timings(timings, include_rotated=False)[("Platform_A", "Model_Common", "Main ON")]["count"] == 1
+
+
+def test_regression_is_found_by_p95():
+    baseline = routes_of([10.0] * 20)
+    assert find_regressions(routes_of([11.0] * 20), baseline) == []           # +10% is noise
+    assert find_regressions(routes_of([15.0] * 3), baseline) == []            # Too few samples
+    assert find_regressions(routes_of([0.4] * 20), routes_of([0.1] * 20)) == []  # Below REGRESSION_MIN_MS
+
+    current = routes_of([10.0] * 18 + [30.0, 30.0])
+    current.update(routes_of([20.0] * 20, path="Fan ON"))
+    baseline.update(routes_of([10.0] * 20, path="Fan ON"))
+    regressions = find_regressions(current, baseline)
+    assert [entry["route"]["path"] for entry in regressions] == ["Main ON", "Fan ON"]
+    assert regressions[0]["increase_ms"] == 20.0 and regressions[0]["increase"] == 2.0
+    assert regressions[0]["phase"] == "write"
+
+
+def test_report():
+    assert format_report({}) == "No route timings recorded yet"
+    current = routes_of([10.0] * 20)
+    current.update(routes_of([30.0] * 20, path="Fan ON"))
+    report = format_report(current, top=1)
+    assert "(1 of 2)" in report and "Fan ON" in report and "Main ON" not in report
+
+    assert "is empty or missing" in format_report(current, {})
+    assert "No p95 regressions against saved.jsonl" in format_report(current, current, baseline_path="saved.jsonl")
+    report = format_report(current, routes_of([10.0] * 20, path="Fan ON"))
+    assert "1 route(s) regressed" in report
+    assert "Platform_A / Model_Common / Fan ON: p95 10.00 -> 30.00 ms (+20.00 ms), mostly write" in report
+
+
+def test_main_saves_a_baseline_and_flags_regressions(tmp_path, monkeypatch, capsys):
+    timings = str(tmp_path / "timings.jsonl")
+    monkeypatch.setenv(route_timing.TIMINGS_FILE_ENV, timings)
+    write_timings(timings, routes_of([10.0] * 20))
+    assert main(["--save-baseline"]) == 0
+    assert main([]) == 0
+    assert "No p95 regressions" in capsys.readouterr().out
+
+    write_timings(timings, routes_of([40.0] * 20, start=5000.0))
+    assert main([]) == 1
+    assert "1 route(s) regressed" in capsys.readouterr().out
+
+    assert main(["--top", "0"]) == 1
+    assert main(["--reset"]) == 0
+    assert not os.path.exists(timings)
+
+    monkeypatch.setenv(route_timing.TIMINGS_FILE_ENV, "off")
+    assert main([]) == 1
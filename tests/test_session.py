@@ -0,0 +1,144 @@
+"""
+TestheadSession resolves the config and board once, then each step is a
+lookup and a write; a DLL failure re-attaches the board on the next step.
+"""
+import json
+import os
+
+import pytest
+
+from accesio.accesio_dio import DIOError
+from accesio.command_compiler import compile_switch_command
+from accesio.dio_simulator import ERROR_DEV_NOT_EXIST
+import testhead_session
+
+PATHS = {"Main ON": "0A0,1", "Fan ON": "0B1,1", "Lamp ON": "0C7,1", "Clear": "0", "Empty": ""}
+
+
+def test_steps_write_the_board(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    with testhead_session.TestheadSession.open(make_config(PATHS), "TestHead") as session:
+        assert (session.dio_model, session.device_index) == ("ACCESSIO_48", 0)
+        session.apply_path("Main ON", "Model_Common")
+        session.apply_command("0;0B1,1;0B2,1")
+        assert session.state() == [0, 0x06, 0, 0, 0, 0]
+        assert session.settled_at is not None
+    assert backend.get_board(0x01).latch == [0, 0x06, 0, 0, 0, 0]
+
+
+def test_repeated_path_is_one_lookup_and_no_rewrite(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    scans = backend.call_counts["GetDeviceByEEPROMByte"]
+    session.reset()
+    for _ in range(3):
+        session.apply_path("Main ON", "Model_Common")
+    session.apply_path("Empty", "Model_Common")
+    assert backend.call_counts["DIO_Configure"] == 2    # Unchanged relays are not written again
+    assert backend.call_counts["GetDeviceByEEPROMByte"] == scans
+
+
+def test_apply_paths_writes_the_net_image_once(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    session.apply_paths(["Main ON", "Fan ON", "Clear", "Lamp ON"], "Model_Common")
+    assert backend.call_counts["DIO_Configure"] == 1
+    assert session.state() == [0, 0, 0x80, 0, 0, 0]
+
+    session.apply_paths(["Main ON", "Fan ON"], "Model_Common", coalesce=False)
+    assert backend.call_counts["DIO_Configure"] == 3
+    assert session.state() == [0x01, 0x02, 0x80, 0, 0, 0]
+
+
+def test_unknown_path_fails_before_any_write(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    with pytest.raises(ValueError, match="Nope"):
+        session.apply_paths(["Main ON", "Nope"], "Model_Common")
+    assert backend.call_counts["DIO_Configure"] == 0
+
+
+def test_dll_failure_reattaches_on_the_next_step(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48,2:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    session.reset()
+    session.apply_path("Main ON", "Model_Common")
+
+    backend.replug(0x01)    # Re-enumerated at a new device index
+    with pytest.raises(DIOError):
+        session.apply_path("Fan ON", "Model_Common")
+    session.apply_command("0;0B1,1")
+    assert session.device_index == 2
+    assert backend.get_board(0x01).latch == [0, 0x02, 0, 0, 0, 0]
+
+
+def test_apply_compiled_checks_the_line_count(simulator, make_config):
+    simulator("1:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    session.reset()
+    session.apply_compiled(compile_switch_command("0A3,1", 48, "ACCESSIO_48"))
+    assert session.state()[0] == 0x08
+    with pytest.raises(ValueError, match="96 lines"):
+        session.apply_compiled(compile_switch_command("0A3,1", 96, "ACCESSIO_96"))
+
+
+def test_close_with_reset(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    session.apply_command("0;0A0,1")
+    session.close(reset=True)
+    assert backend.get_board(0x01).latch == [0] * 6
+    with pytest.raises(RuntimeError, match="closed"):
+        session.apply_command("0")
+    session.close()
+
+
+def test_config_edit_is_picked_up(simulator, make_config):
+    simulator("1:ACCESSIO_48")
+    path = make_config(PATHS)
+    session = testhead_session.TestheadSession.open(path, "TestHead")
+    session.apply_path("Main ON", "Model_Common")
+    assert session.check_for_changes() == []
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data["Model Sheets"][0]["SwitchDriverCommand"] = "0;0A5,1"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    mtime_ns = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    assert session.check_for_changes() == ["Model_Common"]
+    session.apply_path("Main ON", "Model_Common")
+    assert session.state()[0] == 0x20
+
+
+@pytest.mark.parametrize("arguments, error", [(("", "TestHead"), ValueError), ((None, ""), ValueError),
+                                              (("missing.json", "TestHead"), FileNotFoundError)])
+def test_invalid_arguments(simulator, make_config, arguments, error):
+    simulator("1:ACCESSIO_48")
+    config, dio_name = arguments
+    with pytest.raises(error):
+        testhead_session.TestheadSession(config if config is not None else make_config(PATHS), dio_name)
+
+
+def test_unknown_board_name(simulator, make_config):
+    simulator("1:ACCESSIO_48")
+    with pytest.raises(ValueError, match="GPIO"):
+        testhead_session.TestheadSession(make_config(PATHS), "GPIO")
+
+
+def test_board_not_attached(simulator, make_config):
+    simulator("2:ACCESSIO_48")
+    with pytest.raises(RuntimeError):
+        testhead_session.TestheadSession(make_config(PATHS), "TestHead")
+
+
+def test_injected_write_failure_surfaces(simulator, make_config):
+    backend = simulator("1:ACCESSIO_48")
+    session = testhead_session.TestheadSession.open(make_config(PATHS), "TestHead")
+    backend.fail_next("DIO_Configure", ERROR_DEV_NOT_EXIST)
+    with pytest.raises(DIOError):
+        session.apply_command("0")
+    session.apply_command("0")
+    assert backend.get_board(0x01).latch == [0] * 6
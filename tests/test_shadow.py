@@ -0,0 +1,93 @@
+"""
+AccesDIO shadow port image: preserve-writes are built on the last image
+written instead of a read-back, and the shadow is read back when it cannot
+be trusted.
+"""
+import time
+
+import pytest
+
+from accesio.accesio_dio import AccesDIO, DIOError
+from accesio.command_compiler import compile_switch_command
+from accesio.dio_simulator import ERROR_DEV_NOT_EXIST, SimulatedBackend
+from accesio.dio_stats import DIOStats
+
+MODEL = "ACCESSIO_48"
+BOARD_ID = 0x01
+
+
+def make_dio(backend=None, **kwargs):
+    backend = backend or SimulatedBackend([(BOARD_ID, MODEL)])
+    dio = AccesDIO(MODEL, backend=backend, stats=DIOStats(), **kwargs)
+    return dio, dio.get_device_by_eeprom_byte(BOARD_ID), backend
+
+
+def compiled(command):
+    return compile_switch_command(command, 48, MODEL)
+
+
+def test_preserve_writes_use_the_shadow():
+    dio, device_index, backend = make_dio()
+    dio.reset_all_lines_low(device_index)
+    dio.write_groupportbit_preserve(device_index, "0A0", 1)
+    reads = backend.call_counts["DIO_ReadAll"]
+    dio.write_groupportbit_preserve(device_index, "0A1", 1)
+    dio.write_groupportbit_preserve(device_index, "0A1", 1)
+    assert backend.call_counts["DIO_ReadAll"] == reads
+    assert dio.get_write_stats(device_index)["elided"] == 1
+    assert backend.get_board(BOARD_ID).read_ports()[0] & 0x03 == 0x03
+
+
+def test_changed_ports_are_reported():
+    dio, device_index, _ = make_dio()
+    dio.write_compiled_command(device_index, compiled("0"))
+    assert dio.write_compiled_command(device_index, compiled("0B4,1;1C0,1")) == [1, 5]
+    assert dio.get_shadow(device_index) == [0x00, 0x10, 0x00, 0x00, 0x00, 0x01]
+
+
+def test_failed_write_drops_the_shadow():
+    dio, device_index, backend = make_dio()
+    dio.write_compiled_command(device_index, compiled("0;0B4,1"))
+    backend.fail_next("DIO_Configure", ERROR_DEV_NOT_EXIST)
+    with pytest.raises(DIOError) as raised:
+        dio.write_compiled_command(device_index, compiled("0B5,1"))
+    assert raised.value.code == ERROR_DEV_NOT_EXIST
+    assert dio.get_shadow(device_index) is None
+
+    # The next write starts from a read-back, not the stale image
+    reads = backend.call_counts["DIO_ReadAll"]
+    dio.write_compiled_command(device_index, compiled("0B5,1"))
+    assert backend.call_counts["DIO_ReadAll"] == reads + 1
+    assert backend.get_board(BOARD_ID).read_ports()[1] == 0x30
+
+
+def test_shadow_without_max_age_undoes_another_writer():
+    # Documents the single-writer assumption of the default
+    backend = SimulatedBackend([(BOARD_ID, MODEL)])
+    dio, device_index, _ = make_dio(backend)
+    other, _, _ = make_dio(backend)
+    dio.write_compiled_command(device_index, compiled("0;0A0,1"))
+    other.write_compiled_command(device_index, compiled("0B0,1"))
+    dio.write_compiled_command(device_index, compiled("0A1,1"))
+    assert backend.get_board(BOARD_ID).read_ports()[1] == 0x00
+
+
+def test_expired_shadow_is_read_back():
+    backend = SimulatedBackend([(BOARD_ID, MODEL)])
+    dio, device_index, _ = make_dio(backend, shadow_max_age=0.01)
+    other, _, _ = make_dio(backend)
+    dio.write_compiled_command(device_index, compiled("0;0A0,1"))
+    other.write_compiled_command(device_index, compiled("0B0,1"))
+    time.sleep(0.05)
+
+    assert dio.get_shadow(device_index) is None
+    dio.write_compiled_command(device_index, compiled("0A1,1"))
+    assert backend.get_board(BOARD_ID).read_ports()[:2] == [0x03, 0x01]
+
+
+def test_fresh_shadow_is_trusted_with_max_age():
+    dio, device_index, backend = make_dio(shadow_max_age=60.0)
+    dio.write_compiled_command(device_index, compiled("0;0A0,1"))
+    reads = backend.call_counts["DIO_ReadAll"]
+    dio.write_compiled_command(device_index, compiled("0A1,1"))
+    assert backend.call_counts["DIO_ReadAll"] == reads
@@ -0,0 +1,110 @@
+"""
+SwitchScheduler opens before it closes when a break time is set, waits only
+for the relays that changed, and writes a reset straight to the board.
+"""
+import time
+
+import pytest
+
+from accesio.accesio_dio import AccesDIO
+from accesio.command_compiler import compile_switch_command
+from accesio.dio_simulator import SimulatedBackend
+from accesio.dio_stats import DIOStats
+from switch_scheduler import RelayTiming, SwitchScheduler
+
+
+class RecordingBackend(SimulatedBackend):
+    """Keeps every image written by DIO_Configure, with its time."""
+
+    def __init__(self, boards):
+        super().__init__(boards)
+        self.images = []
+
+    def dio_configure(self, device_index, tristate, out_mask, data):
+        self.images.append((time.monotonic(), list(data)))
+        return super().dio_configure(device_index, tristate, out_mask, data)
+
+
+def make_scheduler(timing_rows):
+    backend = RecordingBackend([(0x01, 48)])
+    dio = AccesDIO("ACCESSIO_48", backend=backend, stats=DIOStats())
+    timing = RelayTiming.from_rows(timing_rows, "TestHead", dio.max_lines)
+    return SwitchScheduler(dio, 0, timing), backend
+
+
+def command(text):
+    return compile_switch_command(text, 48, "ACCESSIO_48")
+
+
+def test_break_before_make_opens_first():
+    scheduler, backend = make_scheduler([{"GroupPortBit": "0A0", "BREAK_MS": "30"}])
+    scheduler.apply(command("0;0A0,1"))
+    del backend.images[:]
+
+    result = scheduler.apply(command("0A0,0;0A1,1"))
+    assert result.opened == [0] and result.closed == [1]
+    assert result.writes == 2 and result.changed_ports == [0]
+    (opened_at, intermediate), (closed_at, final) = backend.images
+    assert intermediate[0] == 0x00 and final[0] == 0x02
+    assert closed_at - opened_at >= 0.03
+
+
+def test_without_break_time_one_write():
+    scheduler, backend = make_scheduler([{"GroupPortBit": "*", "SETTLE_MS": "1"}])
+    scheduler.apply(command("0;0A0,1"))
+    result = scheduler.apply(command("0A0,0;0A1,1"))
+    assert result.writes == 1
+    assert backend.get_board(0x01).latch[0] == 0x02
+
+
+def test_waits_only_for_changed_relays():
+    scheduler, _ = make_scheduler([{"GroupPortBit": "0B", "SETTLE_MS": "500"},
+                                   {"GroupPortBit": "0A0", "SETTLE_MS": "20"}])
+    scheduler.apply(command("0"))
+    start = time.monotonic()
+    result = scheduler.apply(command("0A0,1"))
+    assert 0.02 <= time.monotonic() - start < 0.5
+    assert result.settled_at <= time.monotonic()
+
+    result = scheduler.apply(command("0B3,1"), wait=False)
+    assert result.settled_at - time.monotonic() > 0.4
+
+
+def test_repeated_reset_reaches_the_board():
+    scheduler, backend = make_scheduler([{"GroupPortBit": "*", "SETTLE_MS": "1"}])
+    reads = backend.call_counts["DIO_ReadAll"]
+    for _ in range(2):
+        assert scheduler.apply(command("0")).writes == 1
+    assert backend.call_counts["DIO_Configure"] == 2
+    assert backend.call_counts["DIO_ReadAll"] == reads
+
+
+def test_reset_skips_break_before_make():
+    scheduler, backend = make_scheduler([{"GroupPortBit": "*", "BREAK_MS": "200"}])
+    scheduler.apply(command("0;0A0,1"))
+    del backend.images[:]
+    start = time.monotonic()
+    result = scheduler.apply(command("0;0A1,1"))
+    assert time.monotonic() - start < 0.2
+    assert result.writes == 1 and result.opened == [0] and result.closed == [1]
+    assert [image[0] for _, image in backend.images] == [0x02]
+
+
+def test_noop_and_wrong_model():
+    scheduler, backend = make_scheduler([])
+    assert scheduler.apply(command("")).writes == 0
+    assert backend.call_counts["DIO_Configure"] == 0
+    with pytest.raises(ValueError):
+        scheduler.apply(compile_switch_command("0", 96, "ACCESSIO_96"))
+
+
+@pytest.mark.parametrize("row", [{"GroupPortBit": "0D0"}, {"GroupPortBit": "2A"},
+                                 {"GroupPortBit": "*", "SETTLE_MS": "-1"}, {"GroupPortBit": "*", "BREAK_MS": "x"}])
+def test_invalid_timing_rows(row):
+    with pytest.raises(ValueError):
+        RelayTiming.from_rows([row], "TestHead", 48)
+
+
+def test_timing_rows_for_other_boards_are_ignored():
+    timing = RelayTiming.from_rows([{"NAME": "GPIO", "GroupPortBit": "*", "SETTLE_MS": "5"}], "TestHead", 48)
+    assert timing.is_empty
@@ -0,0 +1,76 @@
+"""
+groupportbit_table answers token lookups like the arithmetic it replaced,
+and compile_switch_command returns the same immutable result for a repeated
+command.
+"""
+import itertools
+
+import pytest
+
+from accesio.command_compiler import compile_switch_command, groupportbit_table, groupportbit_to_line_number
+
+
+def arithmetic_line_number(token, max_lines):
+    """The per-token computation the table was built from (None if rejected)."""
+    if len(token) != 3 or token[0] not in "0123" or token[1] not in "ABC" or not token[2].isdigit():
+        return None
+    line_number = int(token[0]) * 24 + (ord(token[1]) - ord('A')) * 8 + int(token[2]) + 1
+    return line_number if line_number < max_lines else None
+
+
+@pytest.mark.parametrize("max_lines", [16, 48, 96])
+def test_table_matches_arithmetic(max_lines):
+    table = groupportbit_table(max_lines)
+    for token in map("".join, itertools.product("0123", "ABC", "0123456789")):
+        expected = arithmetic_line_number(token, max_lines)
+        entry = table.get(token)
+        if expected is None:
+            assert entry is None, token
+            continue
+        line_number, port, mask = entry
+        assert line_number == expected
+        assert (port, mask) == ((line_number - 1) // 8, 1 << ((line_number - 1) % 8))
+        assert groupportbit_to_line_number(token, max_lines) == expected
+
+
+def test_table_is_built_once_per_line_count():
+    assert groupportbit_table(48) is groupportbit_table(48)
+    assert groupportbit_table(48) is not groupportbit_table(96)
+
+
+def test_legacy_bit_digits_8_and_9():
+    assert groupportbit_table(48)["0A8"][0] == 9
+    assert groupportbit_table(48)["0A9"][0] == 10
+
+
+@pytest.mark.parametrize("token", ["0D0", "4A0", "0a0", "0A", "0A10"])
+def test_malformed_tokens_raise(token):
+    with pytest.raises(ValueError, match="Invalid GroupPortBit format"):
+        groupportbit_to_line_number(token, 96)
+
+
+def test_line_past_the_model_raises():
+    with pytest.raises(ValueError, match="ACCESSIO_16"):
+        groupportbit_to_line_number("0C7", 16, "ACCESSIO_16")
+
+
+def test_compile_is_memoized():
+    compile_switch_command.cache_clear()
+    first = compile_switch_command("0;1A0,1;1B7,1", 96, "ACCESSIO_96")
+    assert compile_switch_command("0;1A0,1;1B7,1", 96, "ACCESSIO_96") is first
+    info = compile_switch_command.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    # Another line count is a separate entry
+    assert compile_switch_command("0;1A0,1;1B7,1", 48, "ACCESSIO_48") is not first
+
+
+def test_compiled_command_is_immutable():
+    compiled = compile_switch_command("0;0A0,1", 48, "ACCESSIO_48")
+    with pytest.raises(AttributeError):
+        compiled.reset = False
+    with pytest.raises(AttributeError):
+        compiled.set_masks = [0xFF] * 6
+    # apply returns a new image and leaves its argument alone
+    image = [0x5A] * 6
+    assert compiled.apply(image) == [0x01, 0, 0, 0, 0, 0]
+    assert image == [0x5A] * 6
@@ -0,0 +1,81 @@
+"""
+Writes that would not change any relay are skipped, except a reset, which
+always reaches the board.
+"""
+import pytest
+
+from accesio.accesio_dio import AccesDIO
+from accesio.command_compiler import compile_switch_command
+from accesio.dio_simulator import SimulatedBackend
+from accesio.dio_stats import DIOStats
+
+MODEL = "ACCESSIO_48"
+BOARD_ID = 0x01
+
+
+def make_dio(backend=None, **kwargs):
+    backend = backend or SimulatedBackend([(BOARD_ID, MODEL)])
+    dio = AccesDIO(MODEL, backend=backend, stats=DIOStats(), **kwargs)
+    return dio, dio.get_device_by_eeprom_byte(BOARD_ID), backend
+
+
+def compiled(command):
+    return compile_switch_command(command, 48, MODEL)
+
+
+def test_unchanged_command_is_elided():
+    dio, device_index, backend = make_dio()
+    assert dio.write_compiled_command(device_index, compiled("0;0B4,1;1A0,1")) != []
+    configures = backend.call_counts["DIO_Configure"]
+
+    # Same relays again, and a command whose tokens are already in place
+    assert dio.write_compiled_command(device_index, compiled("0B4,1;1A0,1")) == []
+    assert dio.write_compiled_command(device_index, compiled("0B4,1")) == []
+    assert backend.call_counts["DIO_Configure"] == configures
+    assert dio.get_write_stats(device_index) == {"writes": 1, "elided": 2}
+
+
+def test_reset_command_is_always_written():
+    dio, device_index, backend = make_dio()
+    dio.write_compiled_command(device_index, compiled("0"))
+    configures = backend.call_counts["DIO_Configure"]
+
+    # The shadow is already all low: a Reset still reaches the board
+    dio.write_compiled_command(device_index, compiled("0"))
+    dio.write_compiled_command(device_index, compiled("0;0B4,0"))
+    assert backend.call_counts["DIO_Configure"] == configures + 2
+    assert dio.get_write_stats(device_index)["elided"] == 0
+
+
+def test_reset_restores_a_board_changed_behind_the_shadow():
+    dio, device_index, backend = make_dio()
+    dio.write_compiled_command(device_index, compiled("0"))
+    backend.get_board(BOARD_ID).latch[2] = 0xFF      # e.g. another program, or a glitch
+    dio.write_compiled_command(device_index, compiled("0"))
+    assert backend.get_board(BOARD_ID).read_ports() == [0x00] * 6
+
+
+def test_reset_all_lines_low_is_always_written():
+    dio, device_index, backend = make_dio()
+    dio.reset_all_lines_low(device_index)
+    dio.reset_all_lines_low(device_index)
+    assert backend.call_counts["DIO_Configure"] == 2
+    assert dio.get_shadow(device_index) == [0x00] * 6
+
+
+def test_write_port_image_is_elided():
+    dio, device_index, backend = make_dio()
+    assert dio.write_port_image(device_index, [0x01, 0, 0, 0, 0, 0x80]) == list(range(6))
+    assert dio.write_port_image(device_index, [0x01, 0, 0, 0, 0, 0x80]) == []
+    assert backend.call_counts["DIO_Configure"] == 1
+    with pytest.raises(ValueError):
+        dio.write_port_image(device_index, [0x00] * 12)
+
+
+def test_read_back_alone_does_not_elide_the_first_write():
+    dio, device_index, backend = make_dio()
+    # Ports power up as inputs reading 0xFF, so setting a bit leaves the read-back image as it was
+    assert dio.write_compiled_command(device_index, compiled("0B4,1")) == list(range(6))
+    assert backend.get_board(BOARD_ID).out_mask == 0x3F
+    assert dio.write_compiled_command(device_index, compiled("0B4,1")) == []
+    assert backend.call_counts["DIO_Configure"] == 1
@@ -0,0 +1,53 @@
+"""
+xlsx_reader must read the shipped workbooks exactly like
+pd.read_excel(dtype=str, keep_default_na=False), which ConfigLoader used before.
+"""
+import glob
+import os
+
+import pytest
+
+from xlsx_reader import XlsxReader, read_xlsx_sheet
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+WORKBOOKS = sorted(glob.glob(os.path.join(CONFIG_DIR, "*.xlsx")))
+
+
+def test_workbooks_are_shipped():
+    assert WORKBOOKS, "no .xlsx file in config/"
+
+
+@pytest.mark.parametrize("path", WORKBOOKS, ids=os.path.basename)
+def test_sheets_match_pandas(path):
+    pd = pytest.importorskip("pandas")
+    with XlsxReader(path) as reader:
+        assert reader.sheet_names == pd.ExcelFile(path).sheet_names
+        for sheet_name in reader.sheet_names:
+            columns, records = reader.read_sheet(sheet_name)
+            frame = pd.read_excel(path, sheet_name=sheet_name, dtype=str, keep_default_na=False)
+            assert columns == [str(column) for column in frame.columns], sheet_name
+            expected = frame.to_dict('records')
+            assert len(records) == len(expected), sheet_name
+            for row, (record, pandas_record) in enumerate(zip(records, expected)):
+                for column, value in record.items():
+                    pandas_value = pandas_record[column]
+                    if not isinstance(pandas_value, str):
+                        # Error cells: pandas gives NaN, xlsx_reader keeps the text
+                        assert value.startswith("#"), (sheet_name, row, column, value)
+                        continue
+                    assert value == pandas_value, (sheet_name, row, column)
+
+
+@pytest.mark.parametrize("path", WORKBOOKS, ids=os.path.basename)
+def test_selected_columns_match_pandas(path):
+    pd = pytest.importorskip("pandas")
+    frame = pd.read_excel(path, sheet_name="DIO_List", dtype=str, keep_default_na=False)
+    wanted = ["HEXADDRESS", "NAME", "NOT A COLUMN"]
+    columns, records = read_xlsx_sheet(path, "DIO_List", columns=wanted)
+    assert columns == [name for name in wanted if name in frame.columns]
+    assert records == frame[columns].to_dict('records')
+
+
+def test_unknown_sheet_raises():
+    with pytest.raises(ValueError):
+        read_xlsx_sheet(WORKBOOKS[0], "No Such Sheet")
@@ -0,0 +1,344 @@
+"""
+Lightweight XLSX Reader
+Streams rows straight out of the xlsx zip/XML for the sheets (and columns)
+that are asked for, without pandas or openpyxl. Values match
+pd.read_excel(..., dtype=str, header=0, keep_default_na=False)
+"""
+import datetime
+import math
+import posixpath
+import re
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+
+# Built-in number formats that openpyxl treats as dates/times
+BUILTIN_DATE_FORMATS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+
+# Same idea as openpyxl.styles.numbers.is_date_format: drop literals, colors
+# and conditions, then look for date/time letters
+_FORMAT_STRIP_RE = re.compile(r'\[(?!(?:h+|m+|s+)\])[^\]]*\]|"[^"]*"|\\.|_.|\*.')
+_FORMAT_DATE_RE = re.compile(r'[dmhysDMHYS]')
+# Elapsed-time formats ([h]:mm:ss) give a timedelta instead of a datetime
+_FORMAT_TIMEDELTA_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+BUILTIN_TIMEDELTA_FORMATS = {46}
+
+_CELL_REF_RE = re.compile(r'([A-Z]+)(\d+)')
+
+
+def _is_date_format(fmt):
+    if not fmt:
+        return False
+    section = _FORMAT_STRIP_RE.sub('', fmt.split(';')[0])
+    return _FORMAT_DATE_RE.search(section) is not None
+
+
+def _is_timedelta_format(fmt):
+    return bool(fmt) and _FORMAT_TIMEDELTA_RE.search(fmt.split(';')[0]) is not None
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+
+def _from_excel(value, epoch, timedelta=False):
+    """Excel serial number -> datetime/time/timedelta, like openpyxl.utils.datetime.from_excel."""
+    if timedelta:
+        td = datetime.timedelta(days=value)
+        if td.microseconds:
+            td = datetime.timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        return (datetime.datetime.min + diff).time()
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1  # Excel's fictional 1900-02-29
+    return epoch + datetime.timedelta(days=day) + diff
+
+
+def _number_text(text):
+    """Numeric cell text -> the string pandas produces with dtype=str."""
+    value = float(text)
+    if math.isfinite(value) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _text_of(element):
+    """Text of a shared/inline string: plain <t>, or the <t> of every rich-text run."""
+    text = element.find(f"{NS_MAIN}t")
+    if text is not None:
+        return text.text or ""
+    return "".join(run.text or "" for run in element.iterfind(f"{NS_MAIN}r/{NS_MAIN}t"))
+
+
+class XlsxReader:
+    """
+    Reads sheets of one .xlsx workbook as rows of strings.
+
+    Only the workbook index, shared strings and number formats are loaded up
+    front; each sheet is decompressed and parsed only when it is read, one
+    row at a time.
+
+    Args:
+        path (str): Path to the .xlsx file.
+
+    Example:
+        with XlsxReader("Langley_Testhead Switch Path Configuration.xlsx") as reader:
+            columns, rows = reader.read_sheet("DIO_List", columns=["NAME", "MODEL", "HEXADDRESS"])
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.string_refs = {}   # sheet name -> shared string indexes used by its cells (sheets read so far)
+        self._refs = None
+        self._zip = zipfile.ZipFile(path)
+        try:
+            self._sheet_parts = self._read_workbook()
+            self._shared_strings = self._read_shared_strings()
+            self._date_styles, self._timedelta_styles = self._read_date_styles()
+        except Exception:
+            self._zip.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def sheet_names(self):
+        """Sheet names in workbook order"""
+        return list(self._sheet_parts)
+
+    def sheet_crc(self, sheet_name):
+        """
+        CRC-32 of a sheet's XML part, from the zip directory (nothing is decompressed).
+
+        An equal CRC means the sheet's cells are unchanged, but shared string
+        values must be compared separately (see shared_strings_at).
+        """
+        part = self._sheet_parts.get(sheet_name)
+        if part is None:
+            raise ValueError(f"Sheet '{sheet_name}' not found in {self.path}")
+        return self._zip.getinfo(part).CRC
+
+    def format_crc(self):
+        """Combined CRC-32 of the workbook and style parts, which decide how numbers and dates read."""
+        crc = 0
+        for part in ("xl/workbook.xml", "xl/styles.xml"):
+            try:
+                crc = zlib.crc32(self._zip.getinfo(part).CRC.to_bytes(4, 'little'), crc)
+            except KeyError:
+                pass
+        return crc
+
+    def shared_strings_at(self, indexes):
+        """Shared string values at the given indexes ("" for indexes past the end)."""
+        strings = self._shared_strings
+        return [strings[index] if index < len(strings) else "" for index in indexes]
+
+    # ***********************************
+    # Workbook level parts
+    # ***********************************
+    def _read_workbook(self):
+        targets = {}
+        with self._zip.open("xl/_rels/workbook.xml.rels") as f:
+            for rel in ET.parse(f).getroot().iter(f"{NS_PKG_REL}Relationship"):
+                target = rel.get("Target")
+                if target.startswith("/"):
+                    target = target[1:]
+                else:
+                    target = posixpath.normpath(posixpath.join("xl", target))
+                targets[rel.get("Id")] = target
+
+        sheets = {}
+        with self._zip.open("xl/workbook.xml") as f:
+            root = ET.parse(f).getroot()
+        properties = root.find(f"{NS_MAIN}workbookPr")
+        self._epoch = MAC_EPOCH if properties is not None and properties.get("date1904") in ("1", "true") else WINDOWS_EPOCH
+        for sheet in root.iter(f"{NS_MAIN}sheet"):
+            sheets[sheet.get("name")] = targets[sheet.get(f"{NS_REL}id")]
+        return sheets
+
+    def _read_shared_strings(self):
+        if "xl/sharedStrings.xml" not in self._zip.namelist():
+            return []
+        strings = []
+        with self._zip.open("xl/sharedStrings.xml") as f:
+            for _, element in ET.iterparse(f):
+                if element.tag == f"{NS_MAIN}si":
+                    strings.append(_text_of(element))
+                    element.clear()
+        return strings
+
+    def _read_date_styles(self):
+        """Indexes of cell styles (the s attribute) whose number format is a date, and an elapsed time."""
+        if "xl/styles.xml" not in self._zip.namelist():
+            return set(), set()
+        with self._zip.open("xl/styles.xml") as f:
+            root = ET.parse(f).getroot()
+        custom = {}
+        num_fmts = root.find(f"{NS_MAIN}numFmts")
+        if num_fmts is not None:
+            for fmt in num_fmts.iter(f"{NS_MAIN}numFmt"):
+                custom[int(fmt.get("numFmtId"))] = fmt.get("formatCode")
+        date_styles = set()
+        timedelta_styles = set()
+        cell_xfs = root.find(f"{NS_MAIN}cellXfs")
+        if cell_xfs is not None:
+            for index, xf in enumerate(cell_xfs.iter(f"{NS_MAIN}xf")):
+                fmt_id = int(xf.get("numFmtId", 0))
+                if fmt_id in BUILTIN_DATE_FORMATS or _is_date_format(custom.get(fmt_id)):
+                    date_styles.add(index)
+                if fmt_id in BUILTIN_TIMEDELTA_FORMATS or _is_timedelta_format(custom.get(fmt_id)):
+                    timedelta_styles.add(index)
+        return date_styles, timedelta_styles
+
+    # ***********************************
+    # Sheet streaming
+    # ***********************************
+    def _cell_text(self, cell):
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            inline = cell.find(f"{NS_MAIN}is")
+            return _text_of(inline) if inline is not None else ""
+        value = cell.find(f"{NS_MAIN}v")
+        if value is None or value.text is None:
+            return ""
+        text = value.text
+        if cell_type == "s":
+            index = int(text)
+            self._refs.add(index)
+            return self._shared_strings[index]
+        if cell_type in ("str", "e", "d"):
+            return text
+        if cell_type == "b":
+            return "True" if text.strip() not in ("0", "") else "False"
+        style = int(cell.get("s", 0))
+        if style in self._date_styles:
+            return str(_from_excel(float(text), self._epoch, style in self._timedelta_styles))
+        return _number_text(text)
+
+    def iter_raw_rows(self, sheet_name):
+        """
+        Yields every row of a sheet as a list of strings, from row 1, with
+        missing rows and cells filled in as "" (trailing blanks not trimmed).
+
+        Raises:
+            ValueError: If the workbook has no such sheet.
+        """
+        part = self._sheet_parts.get(sheet_name)
+        if part is None:
+            raise ValueError(f"Sheet '{sheet_name}' not found in {self.path}")
+        next_row = 1
+        self._refs = self.string_refs.setdefault(sheet_name, set())
+        with self._zip.open(part) as f:
+            for _, element in ET.iterparse(f):
+                if element.tag != f"{NS_MAIN}row":
+                    continue
+                row_number = int(element.get("r", next_row))
+                while next_row < row_number:
+                    yield []
+                    next_row += 1
+                values = []
+                for position, cell in enumerate(element.iter(f"{NS_MAIN}c")):
+                    match = _CELL_REF_RE.match(cell.get("r", ""))
+                    column = _column_index(match.group(1)) if match else len(values)
+                    if column < len(values):
+                        column = len(values)
+                    values.extend([""] * (column - len(values)))
+                    values.append(self._cell_text(cell))
+                element.clear()  # Keep memory flat on large sheets
+                yield values
+                next_row = row_number + 1
+
+    def read_sheet(self, sheet_name, columns=None):
+        """
+        Reads a sheet with the first row as header.
+
+        Header handling follows pandas: trailing empty rows and cells are
+        dropped, blank headers become "Unnamed: <index>" and repeated headers
+        get ".1", ".2", ... suffixes. One difference: error cells keep their
+        text (e.g. "#N/A") where pandas gives NaN, so every value is a string.
+
+        Args:
+            sheet_name (str): Sheet to read.
+            columns (list): Column names to keep, in this order. None keeps all.
+                            Names that are not in the header are ignored.
+
+        Returns:
+            tuple: (column names, list of row dicts with string values)
+
+        Raises:
+            ValueError: If the workbook has no such sheet.
+        """
+        rows = []
+        last_with_data = -1
+        for values in self.iter_raw_rows(sheet_name):
+            while values and values[-1] == "":
+                values.pop()
+            if values:
+                last_with_data = len(rows)
+            rows.append(values)
+        rows = rows[:last_with_data + 1]
+        if not rows:
+            return [], []
+
+        width = max(len(values) for values in rows)
+        header = rows[0] + [""] * (width - len(rows[0]))
+        names = [name if name != "" else f"Unnamed: {index}" for index, name in enumerate(header)]
+        unnamed = [index for index, name in enumerate(header) if name == ""]
+        # Same de-duplication as the pandas python parser: named columns first,
+        # and a suffix already used by another header is skipped
+        counts = {}
+        for index in [i for i in range(width) if i not in unnamed] + unnamed:
+            name = old_name = names[index]
+            count = counts.get(name, 0)
+            while count > 0:
+                counts[old_name] = count + 1
+                name = f"{old_name}.{count}"
+                count = count + 1 if name in names else counts.get(name, 0)
+            names[index] = name
+            counts[name] = count + 1
+
+        if columns is None:
+            keep = list(range(width))
+        else:
+            positions = {name: index for index, name in enumerate(names)}
+            keep = [positions[name] for name in columns if name in positions]
+        selected = [names[index] for index in keep]
+
+        records = []
+        for values in rows[1:]:
+            records.append({
+                names[index]: values[index] if index < len(values) else ""
+                for index in keep
+            })
+        return selected, records
+
+
+def read_xlsx_sheet(path, sheet_name, columns=None):
+    """
+    Reads one sheet of an .xlsx workbook (see XlsxReader.read_sheet).
+
+    Returns:
+        tuple: (column names, list of row dicts with string values)
+    """
+    with XlsxReader(path) as reader:
+        return reader.read_sheet(sheet_name, columns)